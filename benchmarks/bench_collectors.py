@@ -0,0 +1,128 @@
+"""
+Benchmarks SystemMetrics.update() and every collector against fake hardware: a generated procfs
+tree, a stub psutil and a stub nvidia-smi stream, so the results do not depend on the machine's
+sensors and are comparable between runs and machines.
+
+Reports the time per call of every collector and of a full update() tick, and the memory
+allocated per tick (tracemalloc), as a table and optionally as JSON:
+
+    python benchmarks/bench_collectors.py --iterations 2000 --json results.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+# The fake hardware back ends are shared with the tests
+TESTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests")
+if TESTS not in sys.path:
+    sys.path.insert(0, TESTS)
+from fake_backends import StubPsutil, build_fake_procfs, create_system_metrics, fake_backends
+from timing import environment, time_calls
+
+BACKENDS = ("procfs", "psutil")
+
+def _allocations(function: Callable[[], object], iterations: int) -> Dict[str, float]:
+    """
+    Returns the memory allocated by `function` per call: the transient peak above the memory
+    in use before the call, and the memory and blocks still held afterwards (growth).
+    """
+    tracemalloc.start()
+    try:
+        function()  # Let caches and lazily created objects settle
+        before = tracemalloc.take_snapshot()
+        peak = 0
+        for _ in range(iterations):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            function()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    growth = after.compare_to(before, "filename")
+    return {
+        "peak_bytes": peak,
+        "retained_bytes_per_call": sum(stat.size_diff for stat in growth) / iterations,
+        "retained_blocks_per_call": sum(stat.count_diff for stat in growth) / iterations,
+    }
+
+def bench_backend(backend: str, iterations: int, procfs_root: str, stub: StubPsutil) -> dict:
+    """Benchmarks every collector and update() of one backend."""
+    with fake_backends(stub):
+        metrics = create_system_metrics(backend, procfs_root)
+        try:
+            for name, _, _ in metrics._collectors():
+                metrics.set_collector_enabled(name)
+            metrics._deadlines.clear()
+            metrics.update()  # Opens the GPU stream and primes every counter
+            time.sleep(0.2)  # Give the stub nvidia-smi time to print its first reading
+
+            collectors = {}
+            for name, _, collect in metrics._collectors():
+                result = time_calls(collect, iterations)
+                result.update(_allocations(collect, max(1, iterations // 10)))
+                collectors[name] = result
+
+            def tick():
+                metrics._deadlines.clear()  # Make every collector due, like the first tick
+                metrics.update()
+
+            update = time_calls(tick, iterations)
+            update.update(_allocations(tick, max(1, iterations // 10)))
+        finally:
+            metrics.close_gpu_backend()
+    return {"collectors": collectors, "update": update}
+
+def print_results(results: dict):
+    header = f"{'':12} {'mean us':>10} {'p50 us':>10} {'p99 us':>10} {'peak B':>10} {'kept B':>8}"
+    for backend, result in results["backends"].items():
+        print(f"{backend} backend")
+        print(header)
+        rows = list(result["collectors"].items()) + [("update()", result["update"])]
+        for name, row in rows:
+            print(f"{name:12} {row['mean_us']:10.1f} {row['p50_us']:10.1f} {row['p99_us']:10.1f}"
+                  f" {row['peak_bytes']:10d} {row['retained_bytes_per_call']:8.1f}")
+        print()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=2000,
+                        help="Calls per collector (default: %(default)s)")
+    parser.add_argument("--backend", choices=BACKENDS + ("all",), default="all",
+                        help="Collect from the fake procfs tree or the stub psutil")
+    parser.add_argument("--cores", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=300)
+    parser.add_argument("--json", metavar="PATH", help="Write the results as JSON, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    backends = BACKENDS if args.backend == "all" else (args.backend,)
+    results = {
+        "benchmark": "collectors",
+        **environment(),
+        "iterations": args.iterations,
+        "cores": args.cores,
+        "processes": args.processes,
+        "backends": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="hwmom-bench-") as root:
+        build_fake_procfs(root, cores=args.cores, process_count=args.processes)
+        for backend in backends:
+            stub = StubPsutil(cores=args.cores, process_count=args.processes)
+            results["backends"][backend] = bench_backend(backend, args.iterations, root, stub)
+
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        print_results(results)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
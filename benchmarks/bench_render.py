@@ -0,0 +1,262 @@
+"""
+Benchmarks painting of the graph, circle and text cards on the offscreen Qt platform. Every
+frame renders a widget into a QImage at a given size and device pixel ratio, after moving its
+synthetic data on by one sample like a collection tick does.
+
+Reports milliseconds per frame (mean and percentiles) as a table and optionally as JSON. With
+--decimation, graph frames fetch their data decimated to the plot width from a history store,
+and the time of that fetch is reported as well:
+
+    python benchmarks/bench_render.py --frames 100 --json render.json
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import json
+import math
+import sys
+import tempfile
+import time
+from array import array
+from typing import Callable, List, Optional, Sequence, Tuple
+
+# The fake hardware back ends are shared with the tests
+TESTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests")
+if TESTS not in sys.path:
+    sys.path.insert(0, TESTS)
+from fake_backends import StubPsutil, create_system_metrics, fake_backends
+from timing import environment, summarize
+
+from collectors.decimation import DECIMATORS
+from collectors.history import TieredHistory
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage
+from PyQt6.QtWidgets import QApplication, QWidget
+from widgets.circle_widget import CircleWidget
+from widgets.graph_widget import GraphWidget
+from widgets.text_widget import TextWidget
+
+GRAPH_SIZES = ((240, 120), (480, 240), (1200, 400))
+CARD_SIZES = ((160, 160), (320, 320))
+POINTS = (60, 600, 3600, 100_000)
+DEVICE_PIXEL_RATIOS = (1.0, 2.0)
+WARMUP_FRAMES = 3
+MIN_FRAMES = 5  # Frames rendered even when a case exceeds its time budget
+
+def synthetic_history(count: int) -> array:
+    """A CPU-like load curve: a slow wave with faster ripples and occasional spikes."""
+    values = array("d", bytes(8 * count))
+    for i in range(count):
+        value = 40 + 25 * math.sin(i / 90) + 10 * math.sin(i / 7.3)
+        if i % 97 == 0:
+            value += 30
+        values[i] = min(100.0, max(0.0, value))
+    return values
+
+def render_frames(
+        widget: QWidget, size: Tuple[int, int], dpr: float, frames: int,
+        next_frame: Callable[[int], None], budget: float
+    ) -> Tuple[List[int], List[int]]:
+    """
+    Renders `frames` frames of `widget` into a QImage. Returns the time of each render and of
+    each `next_frame(i)` call, which updates the widget's data before frame i, in ns. Stops early
+    once the renders took `budget` seconds, so slow cases do not hold up the whole run.
+    """
+    widget.resize(*size)
+    image = QImage(
+        round(size[0] * dpr), round(size[1] * dpr), QImage.Format.Format_ARGB32_Premultiplied)
+    image.setDevicePixelRatio(dpr)
+    samples = []
+    updates = []
+    for frame in range(-WARMUP_FRAMES, frames):
+        start = time.perf_counter_ns()
+        next_frame(frame + WARMUP_FRAMES)
+        update = time.perf_counter_ns() - start
+        image.fill(Qt.GlobalColor.transparent)
+        start = time.perf_counter_ns()
+        widget.render(image)
+        elapsed = time.perf_counter_ns() - start
+        if frame >= 0:
+            samples.append(elapsed)
+            updates.append(update)
+            if len(samples) >= MIN_FRAMES and sum(samples) > budget * 1e9:
+                break
+    return samples, updates
+
+def bench_graph(
+        graph: GraphWidget, sizes: Sequence[Tuple[int, int]], points: Sequence[int],
+        dprs: Sequence[float], frames: int, budget: float, decimation: Optional[str] = None
+    ) -> List[dict]:
+    """
+    Renders the plot area of a graph card with histories of each length. With a decimation
+    method, every frame appends a sample to a history store and fetches the window from it,
+    reduced to the plot width, like GraphWidget.update_display does.
+    """
+    results = []
+    for count in points:
+        history = synthetic_history(count + frames + WARMUP_FRAMES)
+        view = memoryview(history)
+        store = None
+        if decimation is not None:
+            store = TieredHistory(count, 1.0, tiers=())
+            for value in history[:count]:
+                store.append(value)
+
+        def next_frame(frame: int):
+            # The window moves on by one sample per frame, like after a collection tick
+            if store is None:
+                graph.graph_area.set_values(view[frame:frame + count], 100.0, count, frame + count)
+                return
+            store.append(history[store.appended % len(history)])
+            values, seconds, position = store.fetch(
+                count, graph.graph_area.plot_width(), decimation)
+            graph.graph_area.set_values(values, 100.0, round(count / seconds), position)
+
+        for size in sizes:
+            for dpr in dprs:
+                samples, updates = render_frames(
+                    graph.graph_area, size, dpr, frames, next_frame, budget)
+                results.append(_result("GraphArea", size, dpr, count, samples, updates))
+    return results
+
+def bench_circle(
+        circle: CircleWidget, sizes: Sequence[Tuple[int, int]], dprs: Sequence[float],
+        frames: int, budget: float
+    ) -> List[dict]:
+    """Renders the progress ring of a circle card, including its value label."""
+    history = synthetic_history(frames + WARMUP_FRAMES)
+    results = []
+
+    def next_frame(frame: int):
+        value = history[frame]
+        circle.circular_progress.set_value(circle.format_value(value), value / 100)
+
+    for size in sizes:
+        for dpr in dprs:
+            samples, _ = render_frames(
+                circle.circular_progress, size, dpr, frames, next_frame, budget)
+            results.append(_result("CircularProgressLabel", size, dpr, 1, samples))
+    return results
+
+def bench_text(
+        text: TextWidget, sizes: Sequence[Tuple[int, int]], dprs: Sequence[float], frames: int,
+        budget: float
+    ) -> List[dict]:
+    """Renders a whole text card: its header and value label."""
+    history = synthetic_history(frames + WARMUP_FRAMES)
+    results = []
+
+    def next_frame(frame: int):
+        text.value_label.set_value(text.format_value(history[frame]))
+
+    for size in sizes:
+        for dpr in dprs:
+            samples, _ = render_frames(text, size, dpr, frames, next_frame, budget)
+            results.append(_result("TextWidget", size, dpr, 1, samples))
+    return results
+
+def _result(
+        widget: str, size: Tuple[int, int], dpr: float, points: int, samples, updates=None
+    ) -> dict:
+    timings = summarize(samples)
+    if updates:
+        timings["update_mean_us"] = summarize(updates)["mean_us"]
+    return {
+        "widget": widget,
+        "width": size[0],
+        "height": size[1],
+        "dpr": dpr,
+        "points": points,
+        "frames": len(samples),
+        **{key.replace("_us", "_ms"): value / 1000 for key, value in timings.items()},
+    }
+
+def print_results(results: dict):
+    print(f"{'widget':22} {'size':>9} {'dpr':>4} {'points':>7} "
+          f"{'mean ms':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'update ms':>9}")
+    for row in results["cases"]:
+        size = f"{row['width']}x{row['height']}"
+        print(f"{row['widget']:22} {size:>9} {row['dpr']:4g} {row['points']:7d} "
+              f"{row['mean_ms']:9.3f} {row['p50_ms']:9.3f} {row['p90_ms']:9.3f} "
+              f"{row['p99_ms']:9.3f} {row.get('update_mean_ms', float('nan')):9.3f}")
+
+def _sizes(text: str) -> List[Tuple[int, int]]:
+    """Parses sizes like "240x120,480x240"."""
+    return [tuple(int(n) for n in size.split("x")) for size in text.split(",")]
+
+def _numbers(kind):
+    return lambda text: [kind(n) for n in text.split(",")]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--frames", type=int, default=100,
+                        help="Timed frames per case (default: %(default)s)")
+    parser.add_argument("--budget", type=float, default=10.0,
+                        help="Seconds after which a case stops early (default: %(default)s)")
+    parser.add_argument("--widgets", type=lambda text: text.split(","),
+                        default=["graph", "circle", "text"],
+                        help="Comma separated subset of graph, circle and text")
+    parser.add_argument("--graph-sizes", type=_sizes, default=list(GRAPH_SIZES),
+                        help="Graph sizes in logical pixels, e.g. 240x120,1200x400")
+    parser.add_argument("--card-sizes", type=_sizes, default=list(CARD_SIZES),
+                        help="Circle and text card sizes in logical pixels")
+    parser.add_argument("--points", type=_numbers(int), default=list(POINTS),
+                        help="Graph history lengths, e.g. 60,600,100000")
+    parser.add_argument("--dpr", type=_numbers(float), default=list(DEVICE_PIXEL_RATIOS),
+                        help="Device pixel ratios, e.g. 1,1.5,2")
+    parser.add_argument("--decimation", choices=sorted(DECIMATORS),
+                        help="Fetch graph data from a history store, decimated to the plot width")
+    parser.add_argument("--full-redraw", action="store_true",
+                        help="Redraw the whole graph every frame instead of scrolling it")
+    parser.add_argument("--json", metavar="PATH", help="Write the results as JSON, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    app = QApplication(sys.argv[:1])
+    results = {
+        "benchmark": "render",
+        **environment(),
+        "qt_platform": app.platformName(),
+        "frames": args.frames,
+        "full_redraw": args.full_redraw,
+        "decimation": args.decimation,
+        "cases": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="hwmom-bench-") as root, fake_backends(StubPsutil()):
+        metrics = create_system_metrics("psutil", root)
+        cards = []
+        if "graph" in args.widgets:
+            graph = GraphWidget("cpu", metrics, "CPU")
+            graph.graph_area.scroll_blit = not args.full_redraw
+            # The cases size the rendered child themselves; the card's layout would resize it
+            graph.layout.setEnabled(False)
+            cards.append(graph)
+            results["cases"] += bench_graph(
+                graph, args.graph_sizes, args.points, args.dpr, args.frames, args.budget,
+                args.decimation)
+        if "circle" in args.widgets:
+            circle = CircleWidget("cpu", metrics, "CPU")
+            circle.layout.setEnabled(False)  # See the graph card
+            cards.append(circle)
+            results["cases"] += bench_circle(circle, args.card_sizes, args.dpr, args.frames,
+                                            args.budget)
+        if "text" in args.widgets:
+            text = TextWidget("cpu", metrics, "CPU")
+            cards.append(text)
+            results["cases"] += bench_text(text, args.card_sizes, args.dpr, args.frames,
+                                            args.budget)
+        for card in cards:
+            card.unsubscribe()
+        metrics.close_gpu_backend()
+
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        print_results(results)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import platform
+import statistics
+import time
+from typing import Callable, Dict, List
+
+def time_calls(function: Callable[[], object], iterations: int) -> Dict[str, float]:
+    """Calls `function` `iterations` times and returns the time per call in microseconds."""
+    samples: List[int] = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        function()
+        samples.append(time.perf_counter_ns() - start)
+    return summarize(samples)
+
+def summarize(samples_ns: List[int]) -> Dict[str, float]:
+    """Returns the mean, min and percentiles of durations in nanoseconds, in microseconds."""
+    samples = sorted(samples_ns)
+
+    def percentile(p: float) -> float:
+        return samples[min(len(samples) - 1, int(len(samples) * p))] / 1000
+
+    return {
+        "mean_us": statistics.fmean(samples) / 1000,
+        "p50_us": percentile(0.5),
+        "p90_us": percentile(0.9),
+        "p99_us": percentile(0.99),
+        "min_us": samples[0] / 1000,
+    }
+
+def environment() -> Dict[str, str]:
+    """Describes the machine, to tell apart results of different runs."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
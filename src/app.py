@@ -7,11 +7,19 @@ from widgets.card_dialog import AddCardDialog
 from widgets.circle_widget import CircleWidget
 from widgets.graph_widget import GraphWidget
 from widgets.text_widget import TextWidget
+from widgets.heatmap_widget import HeatmapWidget
+from widgets.process_widget import ProcessListWidget
+from widgets.overhead_widget import OverheadWidget
 from widgets.resize_preview import ResizePreview
 from widgets.landing_preview import LandingPreview
 from theme_manager import theme
 from collectors.system_metrics import SystemMetrics
+from collectors.metrics_worker import MetricsWorker
+from collectors.openmetrics import OpenMetricsExporter, parse_address
+from collectors.decimation import DECIMATORS
+from collectors.replay import MetricsRecorder, open_metric_source
 from layout_parser import LayoutParser
+from dataclasses import replace
 from pathlib import Path
 from typing import Optional
 from functools import partial
@@ -148,10 +156,14 @@ class MainWindow(QMainWindow):
         # Create the global SystemMetrics instance
         self.system_metrics = SystemMetrics()
         
-        # Setup metrics update timer
-        self.metrics_timer = QTimer()
-        self.metrics_timer.timeout.connect(self.system_metrics.update)
-        self.metrics_timer.start(self.system_metrics.update_interval)
+        # Collect metrics on a background thread; widgets are updated from its snapshots
+        self.metrics_worker = MetricsWorker(self.system_metrics)
+        self._skipped_updates = frozenset()  # Updated metrics of skipped snapshots
+        self.metrics_worker.snapshot_ready.connect(
+            self._dispatch_snapshot, Qt.ConnectionType.QueuedConnection)
+        self.exporter = None  # Started by _load_layout if the layout asks for it
+        self.recorder = None  # Likewise
+        self.graph_decimation = "minmax"  # Passed to new graph cards, set by _load_layout
         
         # Create main widget and set it as central
         self.main_widget = QWidget()
@@ -195,6 +207,10 @@ class MainWindow(QMainWindow):
         
         # Load default layout
         self._load_layout()
+
+        # Start collecting only now: _load_layout swaps histories and back ends, which must not
+        # happen while the collector thread uses them
+        self.metrics_worker.start()
     
     def _init_ui(self):
         """Initialize the user interface"""
@@ -266,6 +282,35 @@ class MainWindow(QMainWindow):
 
         self._refresh_empty_cell_buttons()
     
+    def closeEvent(self, event):
+        """Stop the metrics worker thread and release its resources before the window closes."""
+        self.metrics_worker.stop()
+        if self.exporter is not None:
+            self.exporter.close()
+        if self.recorder is not None:
+            self.recorder.close()
+        self.system_metrics.close_remote_hosts()
+        self.system_metrics.close_shared_memory()
+        self.system_metrics.close_gpu_backend()
+        self.system_metrics.flush_history()
+        super().closeEvent(event)
+
+    def _dispatch_snapshot(self, snapshot):
+        """
+        Hand the latest metrics snapshot to every card's widget. Runs on the GUI thread. If the
+        GUI fell behind, snapshots that a newer one replaced are skipped, since the collector may
+        already have overwritten their data. Their updated metrics are passed on with the newest.
+        """
+        if snapshot is not self.metrics_worker.latest_snapshot:
+            self._skipped_updates |= snapshot.updated
+            return
+        if self._skipped_updates:
+            snapshot = replace(snapshot, updated=snapshot.updated | self._skipped_updates)
+            self._skipped_updates = frozenset()
+        for card in self.cards:
+            if hasattr(card.widget, 'apply_snapshot'):
+                card.widget.apply_snapshot(snapshot)
+
     def _toggle_edit_mode(self):
         """Toggle visibility of remove buttons on all cards"""
         show = self.settings_button.isChecked()
@@ -386,27 +431,23 @@ class MainWindow(QMainWindow):
             "circle": CircleWidget,
             "graph": GraphWidget,
             "text": TextWidget,
+            "heatmap": HeatmapWidget,
+            "process": ProcessListWidget,
+            "overhead": OverheadWidget,
         }
         return widget_types.get(widget_type)
     
     def _format_title(self, metric_str: str) -> str:
         """Format metric string into a proper title."""
-        # Mapping of metric strings to display titles
-        metric_titles = {
-            'cpu': 'CPU',
-            'memory': 'Memory',
-            'gpu': 'GPU',
-            'gpu_temp': 'GPU Temp',
-            'gpu_memory': 'GPU Memory',
-            'ping': 'Ping'
-        }
-        
-        # Return mapped title or fallback to formatted string
-        return metric_titles.get(metric_str, metric_str.replace('_', ' ').title())
+        # Use the registered title, or fall back to the formatted string
+        descriptor = self.system_metrics.registry.get(metric_str)
+        if descriptor is not None:
+            return descriptor.title
+        return metric_str.replace('_', ' ').title()
     
     def _add_card_from_dialog(self, initial_position: Optional[tuple[int, int]] = None):
         """Show dialog and add card based on user input"""
-        dialog = AddCardDialog(self)
+        dialog = AddCardDialog(self.system_metrics.registry, self)
         if initial_position:
             dialog.row_pos_spin.setValue(initial_position[0] + 1)
             dialog.col_pos_spin.setValue(initial_position[1] + 1)
@@ -453,11 +494,13 @@ class MainWindow(QMainWindow):
         title = self._format_title(base_metric)
         
         # Create the widget with the metric string and system metrics
+        options = {"decimation": self.graph_decimation} if widget_class is GraphWidget else {}
         widget = widget_class(
             metric_str=metric_str,
             system_metrics=self.system_metrics,
             title=title,
-            accent_scheme=accent_scheme
+            accent_scheme=accent_scheme,
+            **options
         )
         
         # Create the card with the widget
@@ -506,6 +549,9 @@ class MainWindow(QMainWindow):
         for pos in positions_to_remove:
             del self.grid_positions[pos]
         
+        # Stop collecting the card's metric if no other card uses it
+        card.widget.unsubscribe()
+
         # Remove from cards list and layout
         self.cards.remove(card)
         self.grid_layout.removeWidget(card)
@@ -783,6 +829,56 @@ class MainWindow(QMainWindow):
             theme.set_theme(parser.theme_str)
             self._update_theme()
             self.theme_button.setChecked(parser.theme_str == 'dark')
+
+            # Select the GPU sampling backend
+            self.system_metrics.set_gpu_backend(parser.gpu_backend_str)
+
+            # Reduce graph windows with more samples than pixels, see GraphArea.decimation
+            if parser.graph_decimation in DECIMATORS:
+                self.graph_decimation = parser.graph_decimation
+            elif parser.graph_decimation == 'none':
+                self.graph_decimation = None
+            else:
+                print(f"Invalid graph decimation: {parser.graph_decimation}")
+
+            # Replay a recorded session or synthetic samples instead of reading the hardware
+            if parser.replay:
+                try:
+                    self.system_metrics.enable_replay(
+                        open_metric_source(str(Path(parser.replay).expanduser())),
+                        parser.replay_speed)
+                except (OSError, ValueError) as e:
+                    print(f"Cannot replay '{parser.replay}': {e}")
+
+            # Keep histories on disk so they survive restarts
+            if parser.history_dir:
+                self.system_metrics.enable_persistence(parser.history_dir)
+
+            # Publish the histories for other local processes (see SharedMetricsReader)
+            if parser.shared_memory:
+                try:
+                    self.system_metrics.enable_shared_memory(parser.shared_memory)
+                except FileExistsError:
+                    print(f"Shared memory '{parser.shared_memory}' is used by another process")
+
+            # Connect to remote agents, whose metrics are named "<name>:<metric>"
+            for name, address in parser.remote_hosts:
+                self.system_metrics.add_remote_host(name, *parse_address(address))
+
+            # Serve the metrics for Prometheus. The exposition is rendered on the worker thread.
+            if parser.openmetrics:
+                host, port = parse_address(parser.openmetrics)
+                self.exporter = OpenMetricsExporter(self.system_metrics, host, port)
+                self.exporter.start()
+                self.metrics_worker.snapshot_ready.connect(
+                    self.exporter.publish, Qt.ConnectionType.DirectConnection)
+
+            # Record the session for replay, also on the worker thread
+            if parser.record:
+                self.recorder = MetricsRecorder(
+                    self.system_metrics, str(Path(parser.record).expanduser()))
+                self.metrics_worker.snapshot_ready.connect(
+                    self.recorder.publish, Qt.ConnectionType.DirectConnection)
             
             # Set grid size from parser
             self.grid_size = (parser.n_rows, parser.n_cols)
@@ -0,0 +1,55 @@
+import time
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+def counter_delta(current: int, previous: int) -> int:
+    """
+    Returns how much a monotonically increasing counter grew, allowing for one wraparound.
+    Kernel counters are 32 or 64 bits wide depending on the field and the architecture. A counter
+    that wrapped while it was still below 2**32 is assumed to be 32 bits wide. A drop that would
+    mean growing by more than half the counter's range is a reset (e.g. a re-plugged device), in
+    which case the counter grew from zero.
+    """
+    if current >= previous:
+        return current - previous
+    width = 2**32 if previous < 2**32 else 2**64
+    delta = current + width - previous
+    if delta > width // 2:
+        return current
+    return delta
+
+class CounterRates:
+    """
+    Turns snapshots of cumulative counters (e.g. bytes received per network interface) into
+    per-second rates. Each key holds a tuple of counters; the rates are computed per key, so a
+    wraparound of one device's counter does not affect the others.
+    """
+    def __init__(self):
+        self._previous: Dict[str, Tuple[int, ...]] = {}
+        self._previous_time: Optional[float] = None
+
+    def update(
+            self, counters: Mapping[str, Sequence[int]], now: Optional[float] = None
+        ) -> Dict[str, List[float]]:
+        """
+        Stores a new snapshot and returns the rates of every key since the previous one. Keys
+        without a previous snapshot (the first call, new devices) are left out.
+        """
+        now = time.monotonic() if now is None else now
+        rates = {}
+        if self._previous_time is not None and now > self._previous_time:
+            elapsed = now - self._previous_time
+            for key, values in counters.items():
+                previous = self._previous.get(key)
+                if previous is None or len(previous) != len(values):
+                    continue
+                rates[key] = [
+                    counter_delta(value, last) / elapsed for value, last in zip(values, previous)
+                ]
+        self._previous = {key: tuple(values) for key, values in counters.items()}
+        self._previous_time = now
+        return rates
+
+    def reset(self):
+        """Forgets the previous snapshot, e.g. after collection was paused."""
+        self._previous = {}
+        self._previous_time = None
@@ -0,0 +1,146 @@
+"""
+Reduces metric histories to a few values per pixel column before they are drawn. Once a graph
+shows more samples than it has columns, drawing every sample costs time without adding detail,
+and a one-sample spike shows up or not depending on where it lands. Decimating first makes the
+cost of drawing depend on the graph's width instead of the history's length.
+
+Buckets are aligned to the number of samples ever appended to a buffer rather than to the start
+of the window, and the bucket that is still filling up is left out. A finished bucket therefore
+keeps its values while the window moves on, and the decimated series only changes at its ends,
+like the history it came from.
+"""
+import math
+from array import array
+from typing import Dict, Optional, Sequence, Tuple
+
+def bucket_size(window: int, columns: int) -> int:
+    """Number of samples per bucket to show `window` samples in at most `columns` buckets."""
+    return max(1, math.ceil(window / max(1, columns)))
+
+def _buckets(length: int, window: int, size: int, appended: int) -> Tuple[int, int]:
+    """
+    Returns (index of the first sample, number of buckets) of the finished buckets covering
+    the last `window` samples of a buffer of `length` samples, or as many as it holds. A full
+    buffer always yields the same number of buckets, leaving out the oldest one while it only
+    holds part of it, so buckets are never added at the front.
+    """
+    stop = length - appended % size
+    count = max(0, min(math.ceil(window / size), (length - size + 1) // size))
+    return stop - count * size, count
+
+def min_max(
+        low: Sequence[float], high: Sequence[float], level: Sequence[float], start: int,
+        count: int, size: int
+    ) -> array:
+    """
+    Reduces `count` buckets of `size` samples from index `start` on to their minimum and maximum,
+    so spikes are kept however many samples share a column. The pair is ordered like the samples,
+    (min, max) for rising buckets and (max, min) for falling ones, so the line keeps its
+    direction.
+
+    Args:
+        low (Sequence[float]): The samples, or the minimum of every bucket of a downsampled tier
+        high (Sequence[float]): The samples, or the maximum of every bucket of the tier
+        level (Sequence[float]): The samples, or the mean of every bucket of the tier
+        start (int): Index of the first sample of the first bucket
+        count (int): Number of buckets
+        size (int): Number of samples per bucket
+    """
+    values = array('d', bytes(16 * count))
+    for i in range(count):
+        a = start + i * size
+        b = a + size
+        lowest = min(low[a:b])
+        highest = max(high[a:b])
+        if level[a] <= level[b - 1]:
+            values[2 * i] = lowest
+            values[2 * i + 1] = highest
+        else:
+            values[2 * i] = highest
+            values[2 * i + 1] = lowest
+    return values
+
+def lttb(
+        low: Sequence[float], high: Sequence[float], level: Sequence[float], start: int,
+        count: int, size: int
+    ) -> array:
+    """
+    Picks one sample per bucket with Largest-Triangle-Three-Buckets: the sample that forms the
+    largest triangle with the averages of the previous and the next bucket. This keeps the shape
+    of the curve with half as many values as min_max, but can drop a spike next to a larger one
+    and looks at every sample in Python, so it is slower.
+
+    Unlike the original algorithm, the triangle starts at the previous bucket's average instead
+    of its picked sample, so a pick does not depend on where the window starts. The buckets
+    before and after the given ones must be finished. Takes the same arguments as min_max;
+    `low` and `high` are not used.
+    """
+    values = array('d', bytes(8 * count))
+
+    def average(a: int) -> Tuple[float, float]:
+        return a + (size - 1) / 2, sum(level[a:a + size]) / size
+
+    previous = average(start - size)
+    for i in range(count):
+        a = start + i * size
+        following = average(a + size)
+        ax, ay = previous
+        dx = following[0] - ax
+        dy = following[1] - ay
+        # Twice the triangle's area, up to a sign
+        best = max(range(a, a + size), key=lambda j: abs(dy * (j - ax) - dx * (level[j] - ay)))
+        values[i] = level[best]
+        previous = average(a)
+    return values
+
+# (function, values per bucket, finished buckets it needs on either side) for each method
+DECIMATORS = {"minmax": (min_max, 2, 0), "lttb": (lttb, 1, 1)}
+CACHED_SIZES = 4  # Bucket sizes cached per buffer, e.g. for graphs of different widths
+
+def decimate(
+        method: str, low: Sequence[float], high: Sequence[float], level: Sequence[float],
+        window: int, columns: int, appended: int, cache: Optional[Dict] = None
+    ) -> Tuple[array, float, int]:
+    """
+    Reduces the last `window` samples to `columns` buckets with "minmax" or "lttb". Returns the
+    values, the number of samples each value stands for and the position after the last value,
+    counting every value the method produces from the first sample ever appended on. The position
+    grows by the values of each finished bucket, which is how far the series moved.
+
+    Finished buckets never change, so with a `cache` (a dict kept with the buffers) only the
+    buckets finished since the previous call are computed, and the cost of a call depends on
+    the number of columns rather than on the window.
+
+    Args:
+        method (str): "minmax" or "lttb"
+        low, high, level (Sequence[float]): Views of the buffers, see min_max
+        window (int): Number of most recent samples to cover
+        columns (int): Number of pixel columns to reduce them to
+        appended (int): Number of samples ever appended to the buffers (RingBuffer.appended)
+        cache (Optional[Dict]): Decimated buckets of earlier calls
+    """
+    function, per_bucket, margin = DECIMATORS[method]
+    size = bucket_size(window, columns)
+    # Leave out the buckets that the method needs as neighbours
+    start, count = _buckets(len(level) - 2 * margin * size, window, size, appended)
+    start += margin * size
+    # Index of the first bucket counted from the first sample ever appended
+    first = (appended - len(level) + start) // size
+
+    values = None
+    if cache is not None and (method, size) in cache:
+        cached_first, cached = cache[(method, size)]
+        offset = (first - cached_first) * per_bucket
+        if 0 <= offset < len(cached):
+            values = cached[offset:offset + count * per_bucket]
+    if values is None:
+        values = array('d')
+    reused = len(values) // per_bucket
+    values.extend(function(low, high, level, start + reused * size, count - reused, size))
+
+    if cache is not None:
+        cache.pop((method, size), None)
+        cache[(method, size)] = (first, values)
+        while len(cache) > CACHED_SIZES:
+            del cache[next(iter(cache))]
+    return values, size / per_bucket, (first + count) * per_bucket
@@ -0,0 +1,290 @@
+import ctypes
+import os
+import subprocess
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+@dataclass(frozen=True)
+class GpuSample:
+    """A single reading from the first GPU. Memory values are in MiB."""
+    temperature: float
+    utilization: float
+    memory_used: float
+    memory_total: float
+
+class GpuBackend(ABC):
+    """
+    Base class for GPU sampling backends. A backend is opened once and then sampled every tick,
+    so it should keep any expensive state (library handles, processes) alive between samples.
+    """
+    name = ""
+
+    @abstractmethod
+    def open(self) -> bool:
+        """Prepares the backend. Returns False if it is not available on this machine."""
+
+    @abstractmethod
+    def sample(self) -> Optional[GpuSample]:
+        """Returns the latest reading, or None if no reading is available."""
+
+    def is_alive(self) -> bool:
+        """Returns False once the backend has failed for good and needs to be opened again."""
+        return True
+
+    def close(self):
+        """Releases the backend's resources."""
+
+class _NvmlUtilization(ctypes.Structure):
+    _fields_ = [("gpu", ctypes.c_uint), ("memory", ctypes.c_uint)]
+
+class _NvmlMemory(ctypes.Structure):
+    _fields_ = [
+        ("total", ctypes.c_ulonglong),
+        ("free", ctypes.c_ulonglong),
+        ("used", ctypes.c_ulonglong),
+    ]
+
+class NvmlBackend(GpuBackend):
+    """
+    Reads the GPU through the NVIDIA Management Library using ctypes. Every sample is three
+    in-process calls, with no process creation at all.
+
+    Args:
+        library: An already loaded NVML library. Loaded from the driver when None. Any object
+            exposing the same nvml* functions can be passed, which allows testing without a GPU.
+        device_index (int): Index of the GPU to sample
+    """
+    name = "nvml"
+
+    _NVML_SUCCESS = 0
+    _NVML_TEMPERATURE_GPU = 0
+
+    def __init__(self, library=None, device_index: int = 0):
+        self.library = library
+        self.device_index = device_index
+        self._handle = None
+
+    @staticmethod
+    def _load_library():
+        """Loads the NVML shared library shipped with the NVIDIA driver."""
+        if sys.platform.startswith("win"):
+            candidates = [
+                os.path.join(os.environ.get("SystemRoot", r"C:\Windows"), "System32", "nvml.dll"),
+                os.path.join(os.environ.get("ProgramFiles", r"C:\Program Files"),
+                             "NVIDIA Corporation", "NVSMI", "nvml.dll"),
+            ]
+        else:
+            candidates = ["libnvidia-ml.so.1", "libnvidia-ml.so"]
+
+        for candidate in candidates:
+            try:
+                return ctypes.CDLL(candidate)
+            except OSError:
+                continue
+        return None
+
+    def open(self) -> bool:
+        if self.library is None:
+            self.library = self._load_library()
+        if self.library is None:
+            return False
+
+        # The library may not expose the functions we need (e.g. a very old driver)
+        try:
+            if self.library.nvmlInit_v2() != self._NVML_SUCCESS:
+                return False
+        except AttributeError:
+            return False
+        handle = ctypes.c_void_p()
+        try:
+            result = self.library.nvmlDeviceGetHandleByIndex_v2(
+                ctypes.c_uint(self.device_index), ctypes.byref(handle))
+        except AttributeError:
+            result = None
+        if result != self._NVML_SUCCESS:
+            self.library.nvmlShutdown()  # Balances the successful nvmlInit_v2
+            return False
+
+        self._handle = handle
+        return True
+
+    def sample(self) -> Optional[GpuSample]:
+        if self._handle is None:
+            return None
+
+        temperature = ctypes.c_uint()
+        utilization = _NvmlUtilization()
+        memory = _NvmlMemory()
+        results = (
+            self.library.nvmlDeviceGetTemperature(
+                self._handle, ctypes.c_uint(self._NVML_TEMPERATURE_GPU), ctypes.byref(temperature)),
+            self.library.nvmlDeviceGetUtilizationRates(self._handle, ctypes.byref(utilization)),
+            self.library.nvmlDeviceGetMemoryInfo(self._handle, ctypes.byref(memory)),
+        )
+        if any(result != self._NVML_SUCCESS for result in results):
+            return None
+
+        return GpuSample(
+            temperature=float(temperature.value),
+            utilization=float(utilization.gpu),
+            memory_used=memory.used / (1024**2),  # Bytes to MiB
+            memory_total=memory.total / (1024**2),
+        )
+
+    def close(self):
+        if self._handle is not None:
+            self._handle = None
+            self.library.nvmlShutdown()
+
+class NvidiaSmiStreamBackend(GpuBackend):
+    """
+    Runs a single long-lived `nvidia-smi --query-gpu=... --loop-ms=<interval>` process and parses
+    its output incrementally on a reader thread. Sampling only returns the most recent parsed line,
+    so it never blocks and never forks. Opening only starts the process; sample() returns None
+    until its first reading has arrived.
+
+    A process that stops printing counts as dead even while it is still running (e.g. when
+    nvidia-smi hangs), so it can be replaced.
+
+    Args:
+        interval_ms (int): How often nvidia-smi should print a new reading
+        command (Optional[Sequence[str]]): Command to run instead of nvidia-smi. The command must
+            print lines of `index, temperature, utilization, memory.used, memory.total`. Used to
+            test against a fake stream script.
+        startup_timeout (float): Seconds the first reading may take before the process counts
+            as dead
+    """
+    name = "nvidia-smi"
+
+    QUERY = "index,temperature.gpu,utilization.gpu,memory.used,memory.total"
+    # Readings older than this many intervals are stale
+    STALE_INTERVALS = 5
+
+    def __init__(
+            self, interval_ms: int = 1000, command: Optional[Sequence[str]] = None,
+            startup_timeout: float = 5.0
+        ):
+        self.interval_ms = interval_ms
+        self.command = list(command) if command else [
+            'nvidia-smi',
+            f'--query-gpu={self.QUERY}',
+            '--format=csv,noheader,nounits',
+            f'--loop-ms={interval_ms}',
+        ]
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self._reader = None
+        self._latest = None  # (monotonic time, GpuSample) of the most recent reading
+        self._opened = 0.0  # Monotonic time the process was started
+
+    def open(self) -> bool:
+        try:
+            self.process = subprocess.Popen(
+                self.command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                stdin=subprocess.DEVNULL,
+                text=True,
+                bufsize=1,  # Line buffered
+                startupinfo=hidden_startupinfo()
+            )
+        except (OSError, ValueError):
+            return False
+        self._opened = time.monotonic()
+
+        # Don't wait for the first reading: nvidia-smi can take seconds to start, and open() runs
+        # on the collector thread. A process that exits or never prints is found by is_alive().
+        self._reader = threading.Thread(
+            target=self._read_stream, name="nvidia-smi-reader", daemon=True)
+        self._reader.start()
+        return True
+
+    def _read_stream(self):
+        """Parses lines from the nvidia-smi process until it exits."""
+        stream = self.process.stdout
+        try:
+            for line in stream:
+                sample = self.parse_line(line)
+                if sample is not None:
+                    # Atomic reference swap, read by sample()
+                    self._latest = (time.monotonic(), sample)
+        except (OSError, ValueError):
+            pass  # Stream was closed by close()
+
+    @staticmethod
+    def parse_line(line: str) -> Optional[GpuSample]:
+        """Parses one CSV line. Returns None for other GPUs and for malformed lines."""
+        try:
+            index, temp, util, mem_used, mem_total = (float(part) for part in line.split(','))
+        except ValueError:
+            return None
+        if index != 0:
+            return None
+        return GpuSample(temp, util, mem_used, mem_total)
+
+    def sample(self) -> Optional[GpuSample]:
+        latest = self._latest
+        if latest is None or not self.is_alive():
+            return None
+        return latest[1]
+
+    def is_alive(self) -> bool:
+        if self.process is None or self.process.poll() is not None:
+            return False
+        latest = self._latest
+        if latest is None:
+            return time.monotonic() - self._opened < self.startup_timeout
+        return time.monotonic() - latest[0] < self.STALE_INTERVALS * self.interval_ms / 1000
+
+    def close(self):
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.terminate()
+                try:
+                    self.process.wait(timeout=1)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+            self.process.stdout.close()
+            self.process = None
+        self._latest = None
+
+# Backend factories, called with the sampling interval in milliseconds
+GPU_BACKENDS = {
+    NvmlBackend.name: lambda interval_ms: NvmlBackend(),
+    NvidiaSmiStreamBackend.name: lambda interval_ms: NvidiaSmiStreamBackend(interval_ms),
+}
+
+def open_gpu_backend(preferred: str = "auto", interval_ms: int = 1000) -> Optional[GpuBackend]:
+    """
+    Opens the preferred GPU backend, falling back to the other backends if it is not available.
+    "auto" tries NVML first, then the nvidia-smi stream. "none" disables GPU sampling. Returns
+    None if no backend could be opened.
+    """
+    if preferred == "none":
+        return None
+
+    order: List[str] = list(GPU_BACKENDS)
+    if preferred in GPU_BACKENDS:
+        order.remove(preferred)
+        order.insert(0, preferred)
+    elif preferred != "auto":
+        print(f"Unknown GPU backend '{preferred}', using auto detection")
+
+    for name in order:
+        backend = GPU_BACKENDS[name](interval_ms)
+        if backend.open():
+            return backend
+    return None
+
+def hidden_startupinfo():
+    """Returns STARTUPINFO that hides the console window of child processes on Windows."""
+    startupinfo = None
+    if hasattr(subprocess, 'STARTUPINFO'):
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        startupinfo.wShowWindow = subprocess.SW_HIDE
+    return startupinfo
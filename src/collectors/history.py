@@ -0,0 +1,419 @@
+import math
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from collectors.decimation import decimate
+
+# (index of the next write, number of samples, samples appended, generation), see RingBuffer.cursor
+Cursor = Tuple[int, int, int, int]
+
+@dataclass
+class RingStorage:
+    """
+    Memory behind a RingBuffer. By default it is allocated in process memory, but it can also be
+    cut out of a larger buffer such as a memory-mapped file (see history_file.py), in which case
+    the samples, the write cursor and the timestamps live in that file.
+
+    Attributes:
+        data (memoryview): 2 * slots doubles holding the mirrored samples
+        cursor (memoryview): Two int64 values, the index of the next write and the sample count
+        times (Optional[memoryview]): 2 * slots doubles with the time of each sample, or None
+    """
+    data: memoryview
+    cursor: memoryview
+    times: Optional[memoryview] = None
+
+    @staticmethod
+    def slots(capacity: int) -> int:
+        """Number of physical slots for a capacity: one spare slot, see RingBuffer."""
+        return capacity + 1
+
+    @classmethod
+    def nbytes(cls, capacity: int) -> int:
+        """Size in bytes of a storage with timestamps, as laid out by from_buffer."""
+        return 16 + 2 * (2 * cls.slots(capacity) * 8)
+
+    @classmethod
+    def allocate(cls, capacity: int) -> "RingStorage":
+        """Allocates an in-memory storage without timestamps."""
+        data = memoryview(array('d', bytes(2 * cls.slots(capacity) * 8)))
+        return cls(data=data, cursor=memoryview(array('q', [0, 0])))
+
+    @classmethod
+    def from_buffer(cls, buffer: memoryview, offset: int, capacity: int) -> "RingStorage":
+        """Lays out a storage with timestamps in buffer[offset:offset + nbytes(capacity)]."""
+        size = 2 * cls.slots(capacity) * 8
+        cursor = buffer[offset:offset + 16].cast('q')
+        data = buffer[offset + 16:offset + 16 + size].cast('d')
+        times = buffer[offset + 16 + size:offset + 16 + 2 * size].cast('d')
+        return cls(data=data, cursor=cursor, times=times)
+
+class RingBuffer:
+    """
+    Fixed-capacity metric history backed by a flat buffer of doubles. Appending is O(1) and never
+    allocates. Every sample is written twice, at index i and at i + slots, so the most recent
+    samples are always one contiguous block and view() can return them as a memoryview without
+    copying or reordering.
+
+    The buffer keeps one spare slot beyond its capacity. The next append writes into that slot,
+    so a view stays intact while the collector adds one more sample. This lets a snapshot taken
+    on the collector thread be read on the GUI thread during the following tick.
+
+    Args:
+        capacity (int): Maximum number of samples kept
+        initial (float): Sample the history starts with, so widgets always have a value to show.
+            Not added when the storage already holds samples.
+        storage (Optional[RingStorage]): Memory to use, allocated in process memory when None
+    """
+    def __init__(
+            self, capacity: int, initial: float = 0.0, storage: Optional[RingStorage] = None
+        ):
+        self.capacity = capacity
+        self._slots = RingStorage.slots(capacity)
+        if storage is None:
+            storage = RingStorage.allocate(capacity)
+        self._data = storage.data
+        self._times = storage.times
+        self._cursor = storage.cursor  # [index of the next write, number of samples]
+        self._memory = self._data.toreadonly()
+        # Samples appended by this process, which decimation aligns its buckets to. Not reset by
+        # clear(), so it numbers every sample uniquely.
+        self.appended = 0
+        self.generation = 0  # Number of clear() calls
+        if self._cursor[1] == 0:
+            self.append(initial)
+
+    def __len__(self) -> int:
+        return self._cursor[1]
+
+    def __getitem__(self, index):
+        return self.view()[index]
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.view())
+
+    def append(self, value: float, timestamp: Optional[float] = None):
+        """Adds a sample, overwriting the oldest one once the buffer is full."""
+        head, count = self._cursor[0], self._cursor[1]
+        self._data[head] = value
+        self._data[head + self._slots] = value
+        if self._times is not None:
+            if timestamp is None:
+                timestamp = time.time()
+            self._times[head] = timestamp
+            self._times[head + self._slots] = timestamp
+        self._cursor[0] = (head + 1) % self._slots
+        if count < self.capacity:
+            self._cursor[1] = count + 1
+        self.appended += 1
+
+    def cursor(self) -> Cursor:
+        """
+        Returns (index of the next write, number of samples, samples appended, generation).
+        view() accepts it to read the buffer as it was when the cursor was taken, which stays
+        intact while the collector appends one more sample (see the spare slot above). The
+        generation tells readers on other threads that the buffer was cleared in between.
+        """
+        return self._cursor[0], self._cursor[1], self.appended, self.generation
+
+    def view(self, cursor: Optional[Cursor] = None) -> memoryview:
+        """Returns a read-only view of the samples, oldest first. Does not copy."""
+        head, count = (self._cursor[0], self._cursor[1]) if cursor is None else cursor[:2]
+        start = (head - count) % self._slots
+        return self._memory[start:start + count]
+
+    def timestamps(self) -> Optional[memoryview]:
+        """Returns a read-only view of the sample times matching view(), or None."""
+        if self._times is None:
+            return None
+        count = self._cursor[1]
+        start = (self._cursor[0] - count) % self._slots
+        return self._times.toreadonly()[start:start + count]
+
+    def latest(self) -> float:
+        """Returns the most recent sample."""
+        return self._data[(self._cursor[0] - 1) % self._slots]
+
+    def latest_time(self) -> Optional[float]:
+        """Returns the time of the most recent sample, if timestamps are stored."""
+        if self._times is None or self._cursor[1] == 0:
+            return None
+        return self._times[(self._cursor[0] - 1) % self._slots]
+
+    def clear(self, initial: float = 0.0):
+        """Drops all samples and starts over with a single initial sample."""
+        self._cursor[0] = 0
+        self._cursor[1] = 0
+        self.generation += 1
+        self.append(initial)
+
+class MatrixRingBuffer:
+    """
+    Fixed-capacity history of samples that hold several values each, such as the utilisation of
+    every CPU core. Samples are rows of a 2-D buffer of floats and are mirrored like in RingBuffer,
+    so the most recent samples are one contiguous block. Appending copies one row and never
+    allocates beyond the temporary array for the row.
+
+    Args:
+        rows (int): Number of values per sample (e.g. the number of CPU cores)
+        capacity (int): Maximum number of samples kept
+        initial (float): Value of every entry of the first sample
+    """
+    def __init__(self, rows: int, capacity: int, initial: float = 0.0):
+        self.rows = rows
+        self.capacity = capacity
+        self._slots = capacity + 1  # One spare slot, see RingBuffer
+        self._data = array('f', bytes(2 * self._slots * rows * 4))  # float32 halves the memory
+        self._memory = memoryview(self._data).toreadonly()
+        self._head = 0
+        self._count = 0
+        self.appended = 0  # Samples appended so far, like RingBuffer.appended
+        self.generation = 0  # Number of clear() calls
+        self.append([initial] * rows)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, values: Sequence[float]):
+        """Adds a sample of `rows` values, overwriting the oldest sample once the buffer is full."""
+        if len(values) != self.rows:
+            raise ValueError(f"Expected {self.rows} values, got {len(values)}")
+        row = array('f', values)
+        start = self._head * self.rows
+        mirror = start + self._slots * self.rows
+        self._data[start:start + self.rows] = row
+        self._data[mirror:mirror + self.rows] = row
+        self._head = (self._head + 1) % self._slots
+        if self._count < self.capacity:
+            self._count += 1
+        self.appended += 1
+
+    def cursor(self) -> Cursor:
+        """Returns a cursor for view(), see RingBuffer.cursor."""
+        return self._head, self._count, self.appended, self.generation
+
+    def view(self, cursor: Optional[Cursor] = None) -> memoryview:
+        """
+        Returns a read-only flat view of the samples, oldest first. Sample i is
+        view[i * rows:(i + 1) * rows]. Does not copy.
+        """
+        head, count = (self._head, self._count) if cursor is None else cursor[:2]
+        start = (head - count) % self._slots
+        return self._memory[start * self.rows:(start + count) * self.rows]
+
+    def latest(self) -> memoryview:
+        """Returns a read-only view of the most recent sample."""
+        start = (self._head - 1) % self._slots * self.rows
+        return self._memory[start:start + self.rows]
+
+    def clear(self, initial: float = 0.0):
+        """Drops all samples and starts over with a single initial sample."""
+        self._head = 0
+        self._count = 0
+        self.generation += 1
+        self.append([initial] * self.rows)
+
+class HistoryTier:
+    """
+    Downsampled copy of a history. Every `factor` raw samples are reduced to one bucket holding
+    their minimum, maximum and mean. The bucket is built up incrementally, so adding a sample
+    costs a few comparisons and an addition.
+
+    Args:
+        factor (int): Number of raw samples per bucket
+        capacity (int): Number of buckets kept
+        seconds (float): Time covered by one bucket
+        storages (Optional[Sequence[RingStorage]]): Storage for the min, max and mean buffers
+    """
+    def __init__(
+            self, factor: int, capacity: int, seconds: float,
+            storages: Optional[Sequence[RingStorage]] = None
+        ):
+        self.factor = factor
+        self.capacity = capacity
+        self.seconds = seconds
+        storages = storages or (None, None, None)
+        self.minimum = RingBuffer(capacity, storage=storages[0])
+        self.maximum = RingBuffer(capacity, storage=storages[1])
+        self.mean = RingBuffer(capacity, storage=storages[2])
+        self._reset_bucket()
+
+    def _reset_bucket(self):
+        self._bucket_count = 0
+        self._bucket_sum = 0.0
+        self._bucket_min = float('inf')
+        self._bucket_max = float('-inf')
+
+    def add(self, value: float, timestamp: Optional[float] = None):
+        """Adds a raw sample to the current bucket, and stores the bucket once it is full."""
+        self._bucket_count += 1
+        self._bucket_sum += value
+        if value < self._bucket_min:
+            self._bucket_min = value
+        if value > self._bucket_max:
+            self._bucket_max = value
+
+        if self._bucket_count == self.factor:
+            self.minimum.append(self._bucket_min, timestamp)
+            self.maximum.append(self._bucket_max, timestamp)
+            self.mean.append(self._bucket_sum / self.factor, timestamp)
+            self._reset_bucket()
+
+    def clear(self):
+        """Drops all buckets."""
+        self.minimum.clear()
+        self.maximum.clear()
+        self.mean.clear()
+        self._reset_bucket()
+
+    def fill_gap(self, now: float, value: float = 0.0):
+        """Appends `value` buckets for the time between the last stored bucket and now."""
+        last = self.mean.latest_time()
+        if last is None:
+            return
+        missing = min(self.capacity, int((now - last) / self.seconds))
+        for i in range(1, missing + 1):
+            timestamp = last + i * self.seconds
+            self.minimum.append(value, timestamp)
+            self.maximum.append(value, timestamp)
+            self.mean.append(value, timestamp)
+        self._reset_bucket()
+
+class TieredHistory(RingBuffer):
+    """
+    Ring buffer of raw samples that also keeps coarser tiers for long time windows. By default the
+    raw samples cover 10 minutes, 10-second buckets cover an hour and 60-second buckets cover a
+    day. fetch() picks the finest resolution that shows a window in about as many points as the
+    graph has pixels, so drawing a 24 hour window costs the same as drawing a 60 second one.
+
+    Args:
+        capacity (int): Number of raw samples kept
+        interval (float): Seconds between raw samples
+        tiers: (bucket seconds, bucket count) for each downsampled tier, finest first
+        initial (float): Sample the history starts with
+        storages (Optional[Sequence[RingStorage]]): Storage for every buffer, in the order given
+            by ring_capacities(). Allocated in process memory when None.
+    """
+    DEFAULT_TIERS = ((10, 360), (60, 1440))
+
+    def __init__(
+            self, capacity: int, interval: float = 1.0,
+            tiers: Sequence[Tuple[float, int]] = DEFAULT_TIERS, initial: float = 0.0,
+            storages: Optional[Sequence[RingStorage]] = None
+        ):
+        self.interval = interval
+        self.tiers: List[HistoryTier] = []  # Created after the initial sample is stored
+        # (generation, decimation cache) by seconds per value. Only fetch() uses them, on the
+        # thread that draws; clear() starts a new generation instead of touching them.
+        self._decimated: Dict[float, Tuple[int, Dict]] = {}
+        storages = storages or [None] * len(self.ring_capacities(capacity, tiers))
+        super().__init__(capacity, initial, storages[0])
+        self.tiers = [
+            HistoryTier(
+                max(1, round(seconds / interval)), tier_capacity, seconds,
+                storages[1 + 3 * i:4 + 3 * i]
+            )
+            for i, (seconds, tier_capacity) in enumerate(tiers)
+        ]
+
+    @staticmethod
+    def ring_capacities(
+            capacity: int, tiers: Sequence[Tuple[float, int]] = DEFAULT_TIERS
+        ) -> List[int]:
+        """Capacity of every buffer: the raw samples, then min, max and mean of each tier."""
+        capacities = [capacity]
+        for _, tier_capacity in tiers:
+            capacities.extend([tier_capacity] * 3)
+        return capacities
+
+    def append(self, value: float, timestamp: Optional[float] = None):
+        """Adds a sample to the raw history and to every tier."""
+        super().append(value, timestamp)
+        for tier in self.tiers:
+            tier.add(value, timestamp)
+
+    def clear(self, initial: float = 0.0):
+        """Drops all samples, including the downsampled tiers."""
+        super().clear(initial)
+        for tier in self.tiers:
+            tier.clear()
+
+    def cursors(self) -> Tuple[Cursor, ...]:
+        """
+        Returns the cursor (see RingBuffer.cursor) of the raw samples and of every tier, which
+        fetch() accepts to read the history as it was when they were taken. Call it on the
+        collector thread, between appends.
+        """
+        return (self.cursor(),) + tuple(tier.mean.cursor() for tier in self.tiers)
+
+    def fill_gap(self, now: Optional[float] = None, value: float = 0.0):
+        """
+        Appends `value` samples for the time between the last stored sample and now, so data
+        restored from disk keeps its place on the time axis. Needs timestamped storage.
+        """
+        now = time.time() if now is None else now
+        last = self.latest_time()
+        if last is None:
+            return
+        missing = min(self.capacity, int((now - last) / self.interval))
+        for i in range(1, missing + 1):
+            RingBuffer.append(self, value, last + i * self.interval)
+        for tier in self.tiers:
+            tier.fill_gap(now, value)
+
+    def fetch(
+            self, window_seconds: float, max_points: int, decimation: Optional[str] = None,
+            cursors: Optional[Tuple[Cursor, ...]] = None
+        ) -> Tuple[Sequence[float], float, int]:
+        """
+        Returns a read-only view of the values covering the last window_seconds, together with the
+        number of seconds between two values and the position after the last value (the number of
+        values of that resolution so far, see RingBuffer.appended). Between two fetches of the
+        same window, the position grows by the number of values appended to the series. Uses the
+        finest resolution that covers the window in at most max_points values; if none does, the
+        coarsest resolution covering it.
+
+        With a decimation method ("minmax" or "lttb", see decimation.py), uses the finest
+        resolution covering the window instead, and reduces it to max_points columns once it holds
+        more values, e.g. not right after startup. The values are then a new array rather than a
+        view.
+
+        `cursors` (see cursors()) reads the history as it was when they were taken, so a fetch on
+        the GUI thread sees every buffer at the same sample while the collector appends.
+        """
+        cursors = self.cursors() if cursors is None else cursors
+        # (seconds per value, mean, minimum, maximum, cursor) from finest to coarsest
+        resolutions = [(self.interval, self, self, self, cursors[0])] + [
+            (tier.seconds, tier.mean, tier.minimum, tier.maximum, cursor)
+            for tier, cursor in zip(self.tiers, cursors[1:])
+        ]
+        covering = [
+            resolution for resolution in resolutions
+            if resolution[0] * resolution[1].capacity >= window_seconds
+        ] or resolutions[-1:]
+
+        if decimation is not None:
+            seconds, buffer, minimum, maximum, cursor = covering[0]
+            n_values = max(1, math.ceil(window_seconds / seconds))
+            view = buffer.view(cursor)
+            # Buckets are sized for the whole window, so they stay put while the buffer fills up
+            if min(n_values, len(view)) > max_points:
+                # Buckets cached before the buffer was cleared hold other samples
+                cached = self._decimated.get(seconds)
+                if cached is None or cached[0] != cursor[3]:
+                    cached = self._decimated[seconds] = (cursor[3], {})
+                values, samples_per_value, position = decimate(
+                    decimation, minimum.view(cursor), maximum.view(cursor), view, n_values,
+                    max_points, cursor[2], cached[1])
+                return values, seconds * samples_per_value, position
+            return view[-n_values:], seconds, cursor[2]
+
+        seconds, buffer, _, _, cursor = covering[-1]
+        for candidate_seconds, candidate, _, _, candidate_cursor in covering:
+            if math.ceil(window_seconds / candidate_seconds) <= max_points:
+                seconds, buffer, cursor = candidate_seconds, candidate, candidate_cursor
+                break
+
+        n_values = max(1, math.ceil(window_seconds / seconds))
+        return buffer.view(cursor)[-n_values:], seconds, cursor[2]
@@ -0,0 +1,94 @@
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import List, Sequence, Tuple
+from collectors.history import RingStorage, TieredHistory
+
+class HistoryFile:
+    """
+    Fixed-size memory-mapped file holding one metric's TieredHistory. Samples are written straight
+    into the mapping by the ring buffers, so persisting costs nothing beyond the append itself and
+    the OS writes dirty pages back in the background. On startup the file is mapped again and the
+    ring buffers use it as is, so the previous data is available without parsing or copying.
+
+    Layout (little endian):
+        header: magic b"HWMH", version (uint32), interval (double), ring count (uint32),
+                one capacity (int64) per ring
+        rings:  per ring a cursor (two int64), 2 * slots sample doubles, 2 * slots time doubles
+
+    A file whose header does not match the requested layout is reset.
+
+    Args:
+        path (Path): File to map, created if it does not exist
+        capacity (int): Number of raw samples
+        interval (float): Seconds between raw samples
+        tiers: (bucket seconds, bucket count) of the downsampled tiers
+    """
+    MAGIC = b"HWMH"
+    VERSION = 1
+    _HEADER = struct.Struct("<4sIdI")
+
+    def __init__(
+            self, path: Path, capacity: int, interval: float,
+            tiers: Sequence[Tuple[float, int]] = TieredHistory.DEFAULT_TIERS
+        ):
+        self.path = Path(path)
+        self.capacity = capacity
+        self.interval = interval
+        self.tiers = tiers
+        self.ring_capacities = TieredHistory.ring_capacities(capacity, tiers)
+
+        header = self._HEADER.pack(self.MAGIC, self.VERSION, interval, len(self.ring_capacities))
+        header += struct.pack(f"<{len(self.ring_capacities)}q", *self.ring_capacities)
+        self._header = header + bytes(-len(header) % 8)  # Keep the rings 8-byte aligned
+        size = len(self._header) + sum(RingStorage.nbytes(c) for c in self.ring_capacities)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # O_BINARY keeps Windows from translating line endings in the header
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            self.restored = self._matches_header(fd, size)
+            if not self.restored:
+                # New file or different layout: start from an empty, zero-filled file
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+            self._mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)  # The mapping keeps its own reference to the file
+
+        if not self.restored:
+            self._mmap[:len(self._header)] = self._header
+        self._buffer = memoryview(self._mmap)
+
+    def _matches_header(self, fd: int, size: int) -> bool:
+        """Returns True if the file has exactly the expected size and header."""
+        if os.fstat(fd).st_size != size:
+            return False
+        # os.pread is Unix only
+        os.lseek(fd, 0, os.SEEK_SET)
+        return os.read(fd, len(self._header)) == self._header
+
+    def storages(self) -> List[RingStorage]:
+        """Returns the storage of every ring, in the order expected by TieredHistory."""
+        storages = []
+        offset = len(self._header)
+        for capacity in self.ring_capacities:
+            storages.append(RingStorage.from_buffer(self._buffer, offset, capacity))
+            offset += RingStorage.nbytes(capacity)
+        return storages
+
+    def open_history(self) -> TieredHistory:
+        """
+        Returns a TieredHistory backed by this file. Restored histories are padded with zeros for
+        the time HWMom was not running, so old samples keep their place on the time axis.
+        """
+        history = TieredHistory(
+            self.capacity, self.interval, self.tiers, storages=self.storages())
+        if self.restored:
+            history.fill_gap()
+        return history
+
+    def flush(self):
+        """Writes dirty pages to disk. The OS does this on its own; call it before exiting."""
+        self._mmap.flush()
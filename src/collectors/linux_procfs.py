@@ -0,0 +1,347 @@
+import glob
+import os
+import re
+import sys
+from typing import Dict, List, Optional, Set, Tuple
+
+class ProcFile:
+    """
+    A procfs or sysfs file that stays open and is re-read from offset 0 on every call. Reading with
+    os.preadv into a reused buffer avoids the open/close syscalls and the buffer allocation that a
+    fresh open() costs each tick. The kernel regenerates the file contents on every read.
+
+    Args:
+        path (str): Path of the file
+        size (int): Initial buffer size. The buffer grows when a read fills it completely.
+    """
+    def __init__(self, path: str, size: int = 4096):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY)
+        self.buffer = bytearray(size)
+
+    def read(self) -> memoryview:
+        """
+        Returns a view of the current contents. The view points into the reused buffer, so it is
+        only valid until the next read.
+        """
+        while True:
+            length = os.preadv(self.fd, [self.buffer], 0)
+            if length < len(self.buffer):
+                return memoryview(self.buffer)[:length]
+            self.buffer = bytearray(2 * len(self.buffer))  # Buffer too small, read again
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+class TemperatureSensor:
+    """
+    A temperature input found during discovery.
+
+    Args:
+        key (str): Metric key, e.g. "nvme0_composite"
+        title (str): Readable name, e.g. "nvme0 Composite"
+        file (ProcFile): The open input file, in millidegrees Celsius
+        aliases (List[str]): Other keys of this sensor, e.g. "nvme0" for a device's first input
+    """
+    def __init__(self, key: str, title: str, file: ProcFile, aliases: List[str]):
+        self.key = key
+        self.title = title
+        self.file = file
+        self.aliases = aliases
+
+class LinuxProcReader:
+    """
+    Fast-path reader for the Linux metrics HWMom uses, as a replacement for the psutil calls of
+    SystemMetrics. Files are opened once and only the needed fields are parsed:
+    - /proc/stat: CPU utilisation, per core and on average
+    - /proc/meminfo: MemTotal and MemAvailable
+    - /sys/class/hwmon/hwmon*/fan*_input: fan speeds, discovered once
+    - /sys/class/hwmon/hwmon*/temp*_input and /sys/class/thermal/thermal_zone*/temp:
+      temperatures, discovered once
+    - /proc/diskstats: I/O counters of whole disks
+    - /proc/net/dev: byte counters of every network interface
+
+    Args:
+        root (str): Directory containing proc/ and sys/. Point this at a fake tree to test the
+            parsers without a Linux machine.
+    """
+    MEMINFO_HEAD = 256  # Bytes of /proc/meminfo holding MemTotal, MemFree and MemAvailable
+
+    # Virtual block devices. Their I/O is either not real disk I/O or is also counted on the disks
+    # below them (device mapper and software RAID).
+    VIRTUAL_DISK_PREFIXES = (b"loop", b"ram", b"zram", b"dm-", b"md")
+    SECTOR_SIZE = 512  # /proc/diskstats always counts 512 byte sectors
+
+    def __init__(self, root: str = "/"):
+        self.root = root
+        self._stat = ProcFile(os.path.join(root, "proc", "stat"))
+        self._meminfo = ProcFile(os.path.join(root, "proc", "meminfo"))
+        self._fans: Optional[List[ProcFile]] = None  # Discovered on first use
+        self._optional: Dict[str, Optional[ProcFile]] = {}  # Files opened on first use
+        self._disks: Optional[Set[bytes]] = None  # Whole disks, discovered on first use
+        self._temperatures: Optional[Dict[str, TemperatureSensor]] = None  # By sensor key
+        self._last_cpu_times: Optional[List[Tuple[int, int]]] = None
+
+    @classmethod
+    def create(cls, root: Optional[str] = None) -> Optional["LinuxProcReader"]:
+        """
+        Returns a reader, or None if the fast path is not available (not Linux, or procfs is
+        missing). A custom root is always tried, so fake trees also work on other platforms.
+        """
+        if root is None:
+            if not sys.platform.startswith("linux"):
+                return None
+            root = "/"
+        try:
+            return cls(root)
+        except OSError:
+            return None
+
+    def _read_cpu_times(self) -> List[Tuple[int, int]]:
+        """Returns (busy, total) clock ticks for the aggregate "cpu" line and every core."""
+        times = []
+        for line in self._stat.read().tobytes().split(b"\n"):
+            if not line.startswith(b"cpu"):
+                break  # The cpu lines come first
+            # user nice system idle iowait irq softirq steal [guest guest_nice]
+            fields = [int(field) for field in line.split()[1:9]]
+            total = sum(fields)  # Guest time is already included in user and nice
+            idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+            times.append((total - idle, total))
+        return times
+
+    def cpu_percent(self) -> Tuple[float, List[float]]:
+        """
+        Returns the average and the per-core CPU utilisation in percent since the previous call,
+        like psutil.cpu_percent. The first call returns zeros.
+        """
+        times = self._read_cpu_times()
+        last = self._last_cpu_times
+        self._last_cpu_times = times
+        if last is None or len(last) != len(times):
+            return 0.0, [0.0] * (len(times) - 1)
+
+        percents = []
+        for (busy, total), (last_busy, last_total) in zip(times, last):
+            delta_total = total - last_total
+            delta_busy = busy - last_busy
+            if delta_total <= 0:
+                percents.append(0.0)
+            else:
+                percents.append(min(100.0, max(0.0, 100.0 * delta_busy / delta_total)))
+        return percents[0], percents[1:]
+
+    def _meminfo_fields(self) -> Tuple[int, int]:
+        """Returns (MemTotal, MemAvailable) in bytes."""
+        total = available = 0
+        # Both fields are within the first few lines, so only those are copied and parsed
+        for line in self._meminfo.read()[:self.MEMINFO_HEAD].tobytes().split(b"\n"):
+            if line.startswith(b"MemTotal:"):
+                total = int(line.split()[1]) * 1024
+            elif line.startswith(b"MemAvailable:"):
+                available = int(line.split()[1]) * 1024
+                break  # MemAvailable comes after MemTotal
+        return total, available
+
+    def memory_total(self) -> int:
+        """Returns the installed memory in bytes."""
+        return self._meminfo_fields()[0]
+
+    def memory_used(self) -> int:
+        """Returns the used memory in bytes, computed like psutil (total - available)."""
+        total, available = self._meminfo_fields()
+        return total - available
+
+    def _discover_fans(self) -> List[ProcFile]:
+        """Opens every fan*_input file of every hwmon device."""
+        pattern = os.path.join(self.root, "sys", "class", "hwmon", "hwmon*")
+        fans = []
+        for device in self._numeric_sorted(glob.glob(pattern)):
+            paths = glob.glob(os.path.join(device, "fan*_input"))
+            if not paths:
+                # Older kernels put the sensor files in the device directory
+                paths = glob.glob(os.path.join(device, "device", "fan*_input"))
+            for path in self._numeric_sorted(paths):
+                try:
+                    fans.append(ProcFile(path, 64))
+                except OSError:
+                    continue
+        return fans
+
+    @staticmethod
+    def _numeric_sorted(paths: List[str]) -> List[str]:
+        """Sorts paths with numbers compared by value, so hwmon2 comes before hwmon10."""
+        return sorted(paths, key=lambda path: [
+            int(part) if part.isdigit() else part for part in re.split(r"(\d+)", path)])
+
+    def fan_speeds(self) -> List[float]:
+        """Returns the speed of every fan in RPM. Fans that fail to read are skipped."""
+        if self._fans is None:
+            self._fans = self._discover_fans()
+        speeds = []
+        for fan in self._fans:
+            try:
+                speeds.append(float(fan.read().tobytes()))
+            except (OSError, ValueError):
+                continue
+        return speeds
+
+    @staticmethod
+    def _read_text(path: str, default: str = "") -> str:
+        """Reads a small sysfs attribute once, e.g. a sensor label."""
+        try:
+            with open(path) as file:
+                return file.read().strip()
+        except OSError:
+            return default
+
+    @staticmethod
+    def _slug(text: str) -> str:
+        """Turns a sensor label into a metric key, e.g. "Package id 0" -> "package_id_0"."""
+        return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+    def _discover_temperatures(self) -> Dict[str, "TemperatureSensor"]:
+        """
+        Opens every hwmon temperature input and every thermal zone that is not also an hwmon
+        device. Each device gets a key made of its name and a per-name index (e.g. "nvme0"). Its
+        first input is available under that key, and every input under key_label (e.g.
+        "coretemp0_core_3"). Devices are numbered in hwmon order. Keys that are taken already (e.g.
+        by two inputs with the same label) get a suffix ("_2", "_3", ...), taken aliases are
+        dropped.
+        """
+        sensors: Dict[str, TemperatureSensor] = {}
+        counts: Dict[str, int] = {}
+        taken: Set[str] = set()  # Keys and aliases
+
+        def add(device: str, label: str, path: str, aliases: List[str]):
+            try:
+                sensor_file = ProcFile(path, 64)
+            except OSError:
+                return
+            base = f"{device}_{self._slug(label)}" if label else device
+            key = base
+            suffix = 2
+            while key in taken:
+                key = f"{base}_{suffix}"
+                suffix += 1
+            aliases = [alias for alias in aliases if alias not in taken and alias != key]
+            taken.update(aliases, [key])
+            sensors[key] = TemperatureSensor(key, f"{device} {label}".strip(), sensor_file, aliases)
+
+        hwmon_names = set()
+        pattern = os.path.join(self.root, "sys", "class", "hwmon", "hwmon*")
+        for directory in self._numeric_sorted(glob.glob(pattern)):
+            name = self._slug(self._read_text(os.path.join(directory, "name"), "hwmon"))
+            hwmon_names.add(name)
+            device = f"{name}{counts.get(name, 0)}"
+            counts[name] = counts.get(name, 0) + 1
+
+            inputs = self._numeric_sorted(glob.glob(os.path.join(directory, "temp*_input")))
+            for index, path in enumerate(inputs):
+                label = self._read_text(path[:-len("input")] + "label")
+                label = label or os.path.basename(path)[:-len("_input")]
+                add(device, label, path, [device] if index == 0 else [])
+
+        pattern = os.path.join(self.root, "sys", "class", "thermal", "thermal_zone*")
+        for directory in self._numeric_sorted(glob.glob(pattern)):
+            name = self._slug(self._read_text(os.path.join(directory, "type"), "thermal"))
+            if name in hwmon_names:
+                continue  # Already read through hwmon
+            device = f"{name}{counts.get(name, 0)}"
+            counts[name] = counts.get(name, 0) + 1
+            add(device, "", os.path.join(directory, "temp"), [])
+        return sensors
+
+    def temperature_sensors(self) -> List["TemperatureSensor"]:
+        """Returns the temperature sensors, discovering them on the first call."""
+        if self._temperatures is None:
+            self._temperatures = self._discover_temperatures()
+        return list(self._temperatures.values())
+
+    def temperatures(self) -> Dict[str, float]:
+        """Returns the temperature of every sensor in °C, by sensor key."""
+        readings = {}
+        for sensor in self.temperature_sensors():
+            try:
+                readings[sensor.key] = int(sensor.file.read().tobytes()) / 1000  # Millidegrees
+            except (OSError, ValueError):
+                continue  # Some sensors fail while their device is asleep
+        return readings
+
+    def _optional_file(self, relative_path: str) -> Optional[ProcFile]:
+        """Opens a file once, returning None if it does not exist."""
+        if relative_path not in self._optional:
+            try:
+                self._optional[relative_path] = ProcFile(
+                    os.path.join(self.root, relative_path), 16384)
+            except OSError:
+                self._optional[relative_path] = None
+        return self._optional[relative_path]
+
+    def _discover_disks(self) -> Optional[Set[bytes]]:
+        """Returns the names of the whole disks in /sys/block, or None if it is not available."""
+        try:
+            names = os.listdir(os.path.join(self.root, "sys", "block"))
+        except OSError:
+            return None
+        return {
+            name.encode() for name in names
+            if not name.encode().startswith(self.VIRTUAL_DISK_PREFIXES)
+        }
+
+    def disk_counters(self) -> Dict[str, Tuple[int, int, int, int, int, int]]:
+        """
+        Returns (reads, sectors read, milliseconds reading, writes, sectors written, milliseconds
+        writing) for every whole disk, as the kernel counts them. The fields wrap independently,
+        so they are only summed or scaled (see SECTOR_SIZE) after taking their deltas. Partitions
+        are left out so their I/O is not counted twice.
+        """
+        diskstats = self._optional_file(os.path.join("proc", "diskstats"))
+        if diskstats is None:
+            return {}
+        if self._disks is None:
+            self._disks = self._discover_disks()
+
+        counters = {}
+        for line in diskstats.read().tobytes().split(b"\n"):
+            fields = line.split()
+            if len(fields) < 11:
+                continue
+            name = fields[2]
+            if self._disks is not None:
+                if name not in self._disks:
+                    continue
+            elif name.startswith(self.VIRTUAL_DISK_PREFIXES):
+                continue
+            # reads merged sectors ms, writes merged sectors ms
+            reads, _, read_sectors, read_ms, writes, _, write_sectors, write_ms = (
+                int(field) for field in fields[3:11])
+            counters[name.decode()] = (
+                reads, read_sectors, read_ms, writes, write_sectors, write_ms)
+        return counters
+
+    def net_counters(self) -> Dict[str, Tuple[int, int]]:
+        """Returns (bytes received, bytes sent) for every network interface."""
+        net_dev = self._optional_file(os.path.join("proc", "net", "dev"))
+        if net_dev is None:
+            return {}
+        counters = {}
+        for line in net_dev.read().tobytes().split(b"\n")[2:]:  # Skip the two header lines
+            name, _, values = line.partition(b":")
+            fields = values.split()
+            if len(fields) < 9:
+                continue
+            counters[name.strip().decode()] = (int(fields[0]), int(fields[8]))
+        return counters
+
+    def close(self):
+        """Closes every open file."""
+        optional = [proc_file for proc_file in self._optional.values() if proc_file is not None]
+        temperatures = [sensor.file for sensor in (self._temperatures or {}).values()]
+        for proc_file in [self._stat, self._meminfo] + (self._fans or []) + optional + temperatures:
+            proc_file.close()
+        self._fans = None
+        self._optional = {}
+        self._temperatures = None
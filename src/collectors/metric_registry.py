@@ -0,0 +1,73 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+from collectors.history import MatrixRingBuffer, TieredHistory
+
+def value_formatter(spec: str, unit: str = "") -> Callable[[float], str]:
+    """
+    Returns a function formatting a value with a format spec and a unit, e.g. 12.3GB. The spec
+    is kept in the function's `spec` attribute, so it can be sent to remote dashboards.
+    """
+    def format_value(value: float) -> str:
+        return f"{value:{spec}}{unit}"
+    format_value.spec = spec
+    return format_value
+
+@dataclass
+class MetricDescriptor:
+    """
+    Everything the dashboard needs to know about one metric. Widgets resolve their descriptor
+    once when they are created, so per-tick work is a direct attribute access instead of parsing
+    the metric string again.
+
+    Attributes:
+        id (str): Metric string used in layouts and snapshots (e.g. "gpu_temp")
+        collector (str): Name of the SystemMetrics collector that samples this metric
+        unit (str): Unit of the values (e.g. "GB")
+        title (str): Title shown on cards
+        label (str): Name shown in the add card dialog. Empty to hide the metric there.
+        history (Union[TieredHistory, MatrixRingBuffer]): The metric's history
+        max_value (Callable[[], float]): Returns the value drawn as 100% by circles and graphs
+        format (Callable[[float], str]): Formats a value for display, including the unit
+        kind (str): "value" for one value per sample, "matrix" for one value per row (e.g. per
+            CPU core) stored in a MatrixRingBuffer
+    """
+    id: str
+    collector: str
+    unit: str
+    title: str
+    label: str
+    history: Union[TieredHistory, MatrixRingBuffer]
+    max_value: Callable[[], float]
+    format: Callable[[float], str]
+    kind: str = "value"
+
+class MetricRegistry:
+    """
+    Lookup table from metric strings to MetricDescriptors. A metric can be registered under
+    additional aliases (e.g. "ram" for "memory"); lookups are a single dictionary access.
+    """
+    def __init__(self):
+        self._by_string: Dict[str, MetricDescriptor] = {}
+        self._descriptors: List[MetricDescriptor] = []
+
+    def register(self, descriptor: MetricDescriptor, aliases: Iterable[str] = ()):
+        """Adds a descriptor, reachable by its id and by every alias."""
+        self._descriptors.append(descriptor)
+        self._by_string[descriptor.id] = descriptor
+        for alias in aliases:
+            self._by_string[alias] = descriptor
+
+    def get(self, string: str) -> Optional[MetricDescriptor]:
+        """Returns the descriptor for a metric string, or None if the metric is unknown."""
+        return self._by_string.get(string)
+
+    def __getitem__(self, string: str) -> MetricDescriptor:
+        return self._by_string[string]
+
+    def __iter__(self) -> Iterator[MetricDescriptor]:
+        """Iterates over the descriptors (without aliases) in registration order."""
+        return iter(self._descriptors)
+
+    def for_collector(self, collector: str) -> List[MetricDescriptor]:
+        """Returns the descriptors of the metrics sampled by a collector."""
+        return [d for d in self._descriptors if d.collector == collector]
@@ -0,0 +1,43 @@
+import threading
+from typing import Callable, Optional
+from collectors.system_metrics import MetricsSnapshot, SystemMetrics
+
+class MetricsThread:
+    """
+    Runs SystemMetrics.update() on a plain Python thread. This is the Qt-free counterpart of
+    MetricsWorker for headless use: the thread sleeps until the next collector is due, and after
+    every tick that collected something it passes a MetricsSnapshot to `snapshot_callback`, which
+    is called on the collector thread.
+
+    Args:
+        system_metrics (SystemMetrics): The SystemMetrics instance to update
+        snapshot_callback (Optional[Callable[[MetricsSnapshot], None]]): Called with every new
+            snapshot, or None if snapshots are not needed
+    """
+    def __init__(
+            self, system_metrics: SystemMetrics,
+            snapshot_callback: Optional[Callable[[MetricsSnapshot], None]] = None
+        ):
+        self.system_metrics = system_metrics
+        self.snapshot_callback = snapshot_callback
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="MetricsThread", daemon=True)
+
+    def start(self):
+        """Starts the collector thread."""
+        self._thread.start()
+
+    def stop(self):
+        """Stops the collector thread and waits for the current tick to finish."""
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self):
+        """Runs the due collectors, publishes a snapshot and sleeps until the next deadline."""
+        while not self._stop_event.is_set():
+            collected = self.system_metrics.update()
+            if collected and self.snapshot_callback is not None:
+                updated = self.system_metrics.updated_metrics(collected)
+                self.snapshot_callback(self.system_metrics.snapshot(updated))
+            self._stop_event.wait(self.system_metrics.next_update_delay())
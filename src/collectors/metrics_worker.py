@@ -0,0 +1,66 @@
+from PyQt6.QtCore import Qt, QObject, QThread, QTimer, pyqtSignal, pyqtSlot
+from collectors.system_metrics import SystemMetrics
+
+class MetricsWorker(QObject):
+    """
+    Runs SystemMetrics.update() on a dedicated background thread. Some collectors block for a long
+    time (ping waits up to 2 seconds), so running them on the GUI thread freezes the dashboard.
+    The worker sleeps until the next collector is due, and after every tick that collected
+    something it emits a MetricsSnapshot through snapshot_ready. Connect to it with a queued
+    connection so widgets update on the GUI thread.
+
+    Args:
+        system_metrics (SystemMetrics): The global SystemMetrics instance
+    """
+    snapshot_ready = pyqtSignal(object)
+    _stop_requested = pyqtSignal()
+
+    def __init__(self, system_metrics: SystemMetrics):
+        super().__init__()
+        self.system_metrics = system_metrics
+        self.timer = None
+        # The most recent snapshot. Queued receivers can skip snapshots that a newer one replaced.
+        self.latest_snapshot = None
+
+        # The worker lives on its own thread, so its slots and timer run there
+        self.worker_thread = QThread()
+        self.worker_thread.setObjectName("MetricsWorker")
+        self.moveToThread(self.worker_thread)
+        self.worker_thread.started.connect(self._start_timer)
+        self._stop_requested.connect(self._stop_timer)
+
+    def start(self):
+        """Starts the collector thread."""
+        self.worker_thread.start()
+
+    def stop(self):
+        """Stops the collector thread and waits for the current tick to finish."""
+        if self.worker_thread.isRunning():
+            self._stop_requested.emit()
+            self.worker_thread.wait()
+
+    @pyqtSlot()
+    def _start_timer(self):
+        """Creates the update timer. Runs on the worker thread so the timer fires there."""
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self._tick)
+        self.timer.start(0)
+
+    @pyqtSlot()
+    def _stop_timer(self):
+        """Stops the update timer and ends the thread's event loop."""
+        if self.timer is not None:
+            self.timer.stop()
+        self.worker_thread.quit()
+
+    @pyqtSlot()
+    def _tick(self):
+        """Runs the due collectors, publishes a snapshot and sleeps until the next deadline."""
+        collected = self.system_metrics.update()
+        if collected:
+            updated = self.system_metrics.updated_metrics(collected)
+            self.latest_snapshot = self.system_metrics.snapshot(updated)
+            self.snapshot_ready.emit(self.latest_snapshot)
+        self.timer.start(int(self.system_metrics.next_update_delay() * 1000))
@@ -0,0 +1,177 @@
+import math
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from collectors.metric_registry import MetricDescriptor
+from collectors.system_metrics import MetricsSnapshot, SystemMetrics
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Label name of the part after ":" in metric ids such as "net_rx:eth0"
+LABEL_NAMES = {
+    "net_rx": "interface",
+    "net_tx": "interface",
+    "temp": "sensor",
+    "hwmom_collect_ms": "collector",
+}
+
+def parse_address(string: str, default_host: str = "127.0.0.1") -> Tuple[str, int]:
+    """Parses "port" or "host:port" into (host, port)."""
+    host, _, port = string.strip().rpartition(":")
+    return host or default_host, int(port)
+
+def _escape(value: str) -> str:
+    """Escapes a label value."""
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_number(value: float) -> str:
+    """Formats a sample value. Non-finite values use the OpenMetrics spelling (e.g. "+Inf")."""
+    value = float(value)
+    if math.isfinite(value):
+        return repr(value)
+    if math.isnan(value):
+        return "NaN"
+    return "+Inf" if value > 0 else "-Inf"
+
+class OpenMetricsExporter:
+    """
+    Serves the latest metric values over HTTP in the OpenMetrics text format, for Prometheus
+    to scrape. Every metric of a running collector becomes a gauge named after its id, e.g.
+    "hwmom_cpu" or hwmom_net_rx{interface="eth0"}, and its max value (the value drawn as 100%)
+    is exported as hwmom_max_value{metric="cpu"}. HWMom's own overhead metrics are exported as
+    "hwmom_self_*".
+
+    The exposition is rendered by publish() once per collection tick, on the collector thread.
+    Only the samples of updated metrics are formatted again; the rest are reused from the
+    previous tick. A scrape then just writes the finished bytes, so scrapes never wait for the
+    collector or the GUI, and vice versa.
+
+    Args:
+        system_metrics (SystemMetrics): The SystemMetrics instance whose metrics are exported
+        host (str): Address to listen on. The default only accepts local connections.
+        port (int): Port to listen on, 0 picks a free port
+    """
+    def __init__(self, system_metrics: SystemMetrics, host: str = "127.0.0.1", port: int = 9101):
+        self.system_metrics = system_metrics
+        self.host = host
+        self.port = port
+        self.body = b"# EOF\n"  # Replaced as a whole by publish(), so scrapes need no lock
+        self._samples: Dict[str, Tuple[str, str]] = {}  # id -> (sample lines, max value line)
+        self._families: Dict[str, List[MetricDescriptor]] = {}
+        self._headers: Dict[str, str] = {}
+        for descriptor in system_metrics.registry:
+            name, _ = self._split_id(descriptor)
+            if name not in self._families:
+                self._families[name] = []
+                # "Network RX (eth0)" describes the family as "Network RX"
+                help_text = (descriptor.label or descriptor.title).split(" (")[0]
+                unit = f" ({descriptor.unit})" if descriptor.unit else ""
+                self._headers[name] = f"# HELP {name} {help_text}{unit}\n# TYPE {name} gauge\n"
+            self._families[name].append(descriptor)
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @staticmethod
+    def _split_id(descriptor: MetricDescriptor) -> Tuple[str, str]:
+        """Returns the metric family name and the label part of a metric id."""
+        base, _, label = descriptor.id.partition(":")
+        name = re.sub(r"[^a-zA-Z0-9_]", "_", base)
+        # HWMom's own metrics ("hwmom_cpu") must not clash with the system's ("cpu")
+        if name.startswith("hwmom_"):
+            name = f"hwmom_self_{name[len('hwmom_'):]}"
+        else:
+            name = f"hwmom_{name}"
+        if label:
+            label = f'{LABEL_NAMES.get(base, "name")}="{_escape(label)}"'
+        return name, label
+
+    def _render_samples(self, descriptor: MetricDescriptor, values) -> Tuple[str, str]:
+        """Formats the sample lines and the max value line of one metric."""
+        name, label = self._split_id(descriptor)
+        if descriptor.kind == "matrix":
+            rows = descriptor.history.rows
+            prefix = f"{label}," if label else ""
+            lines = "".join(
+                f'{name}{{{prefix}core="{row}"}} {_format_number(value)}\n'
+                for row, value in enumerate(values[-rows:]))
+        else:
+            labels = f"{{{label}}}" if label else ""
+            lines = f"{name}{labels} {_format_number(values[-1])}\n"
+
+        max_value = descriptor.max_value()
+        max_line = ""
+        if max_value is not None:
+            max_line = (f'hwmom_max_value{{metric="{_escape(descriptor.id)}"}} '
+                        f"{_format_number(max_value)}\n")
+        return lines, max_line
+
+    def _is_running(self, descriptor: MetricDescriptor) -> bool:
+        """Whether a metric is being collected. Collector times also need their collector."""
+        system_metrics = self.system_metrics
+        if not getattr(system_metrics, f"collect_{descriptor.collector}_enabled", False):
+            return False
+        base, _, collector = descriptor.id.partition(":")
+        if base == "hwmom_collect_ms":
+            return getattr(system_metrics, f"collect_{collector}_enabled", False)
+        return True
+
+    def publish(self, snapshot: MetricsSnapshot):
+        """Renders the exposition for a new snapshot. Called on the collector thread."""
+        parts = []
+        max_lines = []
+        for name, descriptors in self._families.items():
+            family = []
+            for descriptor in descriptors:
+                if not self._is_running(descriptor):
+                    self._samples.pop(descriptor.id, None)  # Stopped, drop its last values
+                    continue
+                samples = self._samples.get(descriptor.id)
+                if samples is None or descriptor.id in snapshot.updated:
+                    values = snapshot.get_history(descriptor.id)
+                    if not values:
+                        continue
+                    samples = self._samples[descriptor.id] = self._render_samples(
+                        descriptor, values)
+                family.append(samples[0])
+                max_lines.append(samples[1])
+            if family:
+                parts.append(self._headers[name])
+                parts.extend(family)
+        if max_lines:
+            parts.append("# HELP hwmom_max_value Value drawn as 100% for a metric\n"
+                         "# TYPE hwmom_max_value gauge\n")
+            parts.extend(max_lines)
+        parts.append("# EOF\n")
+        self.body = "".join(parts).encode()
+
+    def start(self):
+        """Starts serving on a background thread."""
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = exporter.body
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Don't log every scrape
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(
+            target=self._server.serve_forever, name="OpenMetricsExporter", daemon=True).start()
+
+    def close(self):
+        """Stops serving."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,182 @@
+import heapq
+import os
+import sys
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+import psutil
+
+@dataclass(frozen=True)
+class ProcessInfo:
+    """A process in a top-N list. CPU is in percent of one core, RSS in bytes, I/O in bytes/s."""
+    pid: int
+    name: str
+    cpu_percent: float
+    rss: int
+    io_rate: float
+
+class _ProcessState:
+    """Per-PID state kept between scans, used to turn cumulative counters into rates."""
+    __slots__ = ("name", "cpu_time", "io_bytes", "sampled_at", "cpu_percent", "rss", "io_rate",
+                 "process")
+
+    def __init__(self, name: str, process=None):
+        self.name = name
+        self.cpu_time: Optional[float] = None
+        self.io_bytes: Optional[int] = None
+        self.sampled_at = 0.0
+        self.cpu_percent = 0.0
+        self.rss = 0
+        self.io_rate = 0.0
+        self.process = process  # psutil.Process when not reading /proc directly
+
+class ProcessScanner:
+    """
+    Finds the processes using the most CPU, memory and I/O without scanning the whole process
+    table every tick. Each call to scan() visits PIDs from the current pass until its time budget
+    is used up, so with thousands of processes one pass spreads over several ticks. Rates are
+    computed per PID from the counters of its previous visit, which the scanner caches.
+
+    On Linux, /proc/[pid]/stat and /proc/[pid]/io are read directly; elsewhere psutil.Process is
+    used with oneshot().
+
+    Args:
+        procfs_root (Optional[str]): Directory containing proc/. None uses psutil instead.
+        top_n (int): Number of processes kept in each top list
+        budget (float): Seconds a scan() call may spend reading processes
+    """
+    SORT_KEYS = ("cpu", "rss", "io")
+
+    def __init__(self, procfs_root: Optional[str] = None, top_n: int = 10, budget: float = 0.003):
+        self.procfs_root = procfs_root
+        self.top_n = top_n
+        self.budget = budget
+        self._states: Dict[int, _ProcessState] = {}
+        self._pending: List[int] = []  # PIDs left to visit in the current pass
+        self.process_count = 0
+        if procfs_root is not None:
+            self._clock_ticks = os.sysconf("SC_CLK_TCK")
+            self._page_size = os.sysconf("SC_PAGE_SIZE")
+
+    @classmethod
+    def create(cls, procfs_root: Optional[str] = None, **kwargs) -> "ProcessScanner":
+        """Returns a scanner reading /proc directly on Linux, or through psutil elsewhere."""
+        if procfs_root is None and sys.platform.startswith("linux"):
+            procfs_root = "/"
+        return cls(procfs_root, **kwargs)
+
+    def _list_pids(self) -> List[int]:
+        if self.procfs_root is None:
+            return psutil.pids()
+        names = os.listdir(os.path.join(self.procfs_root, "proc"))
+        return [int(name) for name in names if name.isdigit()]
+
+    def _start_pass(self):
+        """Lists the processes again and forgets the ones that exited."""
+        pids = self._list_pids()
+        alive = set(pids)
+        for pid in [pid for pid in self._states if pid not in alive]:
+            del self._states[pid]
+        self.process_count = len(pids)
+        self._pending = pids
+        self._pending.reverse()  # Visit in ascending order, popping from the end
+
+    def _read_file(self, pid: int, name: str) -> bytes:
+        fd = os.open(os.path.join(self.procfs_root, "proc", str(pid), name), os.O_RDONLY)
+        try:
+            return os.read(fd, 4096)
+        finally:
+            os.close(fd)
+
+    def _sample_procfs(self, pid: int, state: Optional[_ProcessState]):
+        """Returns (name, cpu seconds, rss bytes, io bytes or None) from /proc/[pid]."""
+        stat = self._read_file(pid, "stat")
+        # The name is in parentheses and may itself contain spaces and parentheses
+        head, _, rest = stat.rpartition(b")")
+        if state is not None:
+            name = state.name
+        else:
+            name = head.partition(b"(")[2].decode(errors="replace")
+        fields = rest.split()
+        # Fields after the name start at field 3 (state): utime is field 14, stime 15, rss 24
+        cpu_time = (int(fields[11]) + int(fields[12])) / self._clock_ticks
+        rss = int(fields[21]) * self._page_size
+
+        io_bytes = None
+        try:
+            for line in self._read_file(pid, "io").split(b"\n"):
+                if line.startswith((b"read_bytes:", b"write_bytes:")):
+                    io_bytes = (io_bytes or 0) + int(line.split()[1])
+        except OSError:
+            pass  # Only readable for our own processes unless running as root
+        return name, cpu_time, rss, io_bytes
+
+    def _sample_psutil(self, process, state: Optional[_ProcessState]):
+        """Returns (name, cpu seconds, rss bytes, io bytes or None) through psutil."""
+        with process.oneshot():
+            name = state.name if state is not None else process.name()
+            times = process.cpu_times()
+            rss = process.memory_info().rss
+            try:
+                io = process.io_counters()
+                io_bytes = io.read_bytes + io.write_bytes
+            except (psutil.AccessDenied, AttributeError, NotImplementedError):
+                io_bytes = None
+        return name, times.user + times.system, rss, io_bytes
+
+    def _visit(self, pid: int, now: float):
+        """Samples one process and updates its cached rates."""
+        state = self._states.get(pid)
+        process = None
+        try:
+            if self.procfs_root is not None:
+                name, cpu_time, rss, io_bytes = self._sample_procfs(pid, state)
+            else:
+                # Reuse the Process object, which psutil uses to detect reused PIDs
+                process = state.process if state is not None else psutil.Process(pid)
+                name, cpu_time, rss, io_bytes = self._sample_psutil(process, state)
+        except (OSError, ValueError, IndexError, psutil.Error):
+            self._states.pop(pid, None)  # Exited, or not accessible
+            return
+
+        if state is None:
+            state = self._states[pid] = _ProcessState(name, process)
+        elif now > state.sampled_at:
+            elapsed = now - state.sampled_at
+            state.cpu_percent = max(0.0, 100 * (cpu_time - state.cpu_time) / elapsed)
+            if io_bytes is not None and state.io_bytes is not None:
+                state.io_rate = max(0, io_bytes - state.io_bytes) / elapsed
+        state.cpu_time = cpu_time
+        state.io_bytes = io_bytes
+        state.rss = rss
+        state.sampled_at = now
+
+    def scan(self):
+        """Visits processes until the time budget is used up, continuing the current pass."""
+        start = time.perf_counter()
+        if not self._pending:
+            self._start_pass()
+        while self._pending and time.perf_counter() - start < self.budget:
+            self._visit(self._pending.pop(), time.monotonic())
+
+    def top(self) -> Mapping[str, Tuple[ProcessInfo, ...]]:
+        """Returns the top processes by "cpu", "rss" and "io", highest first."""
+        keys = {
+            "cpu": lambda item: item[1].cpu_percent,
+            "rss": lambda item: item[1].rss,
+            "io": lambda item: item[1].io_rate,
+        }
+        return MappingProxyType({
+            sort_key: tuple(
+                ProcessInfo(pid, state.name, state.cpu_percent, state.rss, state.io_rate)
+                for pid, state in heapq.nlargest(self.top_n, self._states.items(), key=key)
+            )
+            for sort_key, key in keys.items()
+        })
+
+    def reset(self):
+        """Forgets all cached processes."""
+        self._states = {}
+        self._pending = []
+        self.process_count = 0
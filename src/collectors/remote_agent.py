@@ -0,0 +1,201 @@
+import queue
+import socket
+import socketserver
+import threading
+from typing import Dict, List, Optional, Set
+from collectors.remote_protocol import (
+    SUBSCRIBE, UNSUBSCRIBE, encode_catalog, encode_entry, encode_samples, read_frame)
+from collectors.system_metrics import CollectorSubscription, MetricsSnapshot, SystemMetrics
+
+class _AgentConnection:
+    """
+    One dashboard connected to the agent. Frames are queued by the collector thread and sent by
+    a writer thread, so a slow dashboard never stalls collection; one that falls too far behind
+    is disconnected and has to reconnect.
+    """
+    MAX_QUEUED_FRAMES = 64
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.collectors: Set[str] = set()  # Collectors the dashboard subscribed to
+        self.backlog: Set[str] = set()  # Subscribed collectors whose history was not sent yet
+        self.subscriptions: Dict[str, CollectorSubscription] = {}
+        self.lock = threading.Lock()
+        self.closed = False
+        self._frames: "queue.Queue[Optional[bytes]]" = queue.Queue(self.MAX_QUEUED_FRAMES)
+        self._writer = threading.Thread(target=self._write, name="AgentWriter", daemon=True)
+        self._writer.start()
+
+    def send(self, frame: bytes):
+        """Queues a frame without blocking. Disconnects the dashboard if its queue is full."""
+        try:
+            self._frames.put_nowait(frame)
+        except queue.Full:
+            self.close()
+
+    def _write(self):
+        while True:
+            frame = self._frames.get()
+            if frame is None:
+                return
+            try:
+                self.sock.sendall(frame)
+            except OSError:
+                self.close()
+                return
+
+    def close(self):
+        """Closes the socket. The reader then ends the connection and releases the collectors."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self._frames.put_nowait(None)
+        except queue.Full:
+            pass  # The writer fails on the closed socket instead
+
+class MetricsAgent:
+    """
+    Streams metrics to remote HWMom dashboards over TCP. A dashboard that connects receives a
+    catalog of the agent's metrics, then subscribes to the collectors it shows. Subscriptions
+    start the collectors on the agent like local widgets do, and are released when the
+    dashboard disconnects. After every collection tick, publish() sends each dashboard one frame
+    with the new samples of its collectors, preceded by the full history of newly subscribed
+    collectors. See remote_protocol for the frame format.
+
+    Args:
+        system_metrics (SystemMetrics): The SystemMetrics instance whose metrics are streamed
+        host (str): Address to listen on. Use "0.0.0.0" to accept other machines.
+        port (int): Port to listen on, 0 picks a free port
+    """
+    def __init__(self, system_metrics: SystemMetrics, host: str = "127.0.0.1", port: int = 9102):
+        self.system_metrics = system_metrics
+        self.host = host
+        self.port = port
+        self._connections: List[_AgentConnection] = []
+        self._lock = threading.Lock()  # Guards the connection list and collector subscriptions
+        self._server: Optional[socketserver.ThreadingTCPServer] = None
+
+        # The catalog numbers the metrics, so sample frames only need to carry the index. Top
+        # process lists are only kept in snapshots and are not streamed.
+        self._descriptors = [
+            descriptor for descriptor in system_metrics.registry if descriptor.kind != "table"]
+        self._index = {descriptor.id: i for i, descriptor in enumerate(self._descriptors)}
+        self._by_collector: Dict[str, list] = {}
+        for descriptor in self._descriptors:
+            self._by_collector.setdefault(descriptor.collector, []).append(descriptor)
+        self._catalog = encode_catalog(socket.gethostname(), [
+            {
+                "id": descriptor.id,
+                "collector": descriptor.collector,
+                "unit": descriptor.unit,
+                "title": descriptor.title,
+                "label": descriptor.label,
+                "kind": descriptor.kind,
+                "rows": getattr(descriptor.history, "rows", 1),
+                "interval": system_metrics.collector_intervals[descriptor.collector] / 1000,
+                "spec": getattr(descriptor.format, "spec", ".1f"),
+            }
+            for descriptor in self._descriptors
+        ])
+
+    def _entry(self, descriptor, values, samples: int) -> bytes:
+        max_value = descriptor.max_value()
+        return encode_entry(
+            self._index[descriptor.id], values, samples, max_value if max_value is not None else 0)
+
+    def publish(self, snapshot: MetricsSnapshot):
+        """Sends the new samples to every dashboard. Called on the collector thread."""
+        with self._lock:
+            connections = list(self._connections)
+        entries: Dict[str, bytes] = {}  # Encoded once per tick, shared by all dashboards
+        for connection in connections:
+            with connection.lock:
+                collectors = list(connection.collectors)
+                backlog = connection.backlog
+                connection.backlog = set()
+            parts = []
+            for collector in collectors:
+                for descriptor in self._by_collector.get(collector, ()):
+                    values = snapshot.get_history(descriptor.id)
+                    rows = getattr(descriptor.history, "rows", 1)
+                    if collector in backlog:
+                        # Newly subscribed: send the whole history so graphs start filled
+                        parts.append(self._entry(descriptor, values, len(values) // rows))
+                    elif descriptor.id in snapshot.updated:
+                        entry = entries.get(descriptor.id)
+                        if entry is None:
+                            entry = entries[descriptor.id] = self._entry(
+                                descriptor, values[len(values) - rows:], 1)
+                        parts.append(entry)
+            if parts:
+                connection.send(encode_samples(snapshot.timestamp, parts))
+
+    def _handle(self, sock: socket.socket):
+        """Serves one dashboard until it disconnects. Runs on its own thread."""
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = _AgentConnection(sock)
+        connection.send(self._catalog)
+        with self._lock:
+            self._connections.append(connection)
+        try:
+            while True:
+                frame = read_frame(sock)
+                if frame is None:
+                    break
+                frame_type, payload = frame
+                collector = payload.decode()
+                if collector not in self._by_collector:
+                    continue
+                with self._lock, connection.lock:
+                    if frame_type == SUBSCRIBE and collector not in connection.collectors:
+                        connection.subscriptions[collector] = self.system_metrics.subscribe(
+                            collector)
+                        connection.collectors.add(collector)
+                        connection.backlog.add(collector)
+                    elif frame_type == UNSUBSCRIBE and collector in connection.collectors:
+                        connection.subscriptions.pop(collector).release()
+                        connection.collectors.discard(collector)
+                        connection.backlog.discard(collector)
+        except (OSError, ValueError, ConnectionError):
+            pass
+        finally:
+            with self._lock, connection.lock:
+                self._connections.remove(connection)
+                for subscription in connection.subscriptions.values():
+                    subscription.release()
+                connection.subscriptions = {}
+                connection.collectors = set()
+            connection.close()
+
+    def start(self):
+        """Starts accepting dashboards on a background thread."""
+        agent = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                agent._handle(self.request)
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True  # Restarting the agent must not wait for TIME_WAIT
+            daemon_threads = True
+
+        self._server = Server((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(
+            target=self._server.serve_forever, name="MetricsAgent", daemon=True).start()
+
+    def close(self):
+        """Stops accepting dashboards and disconnects the connected ones."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            connection.close()
@@ -0,0 +1,234 @@
+import json
+import queue
+import socket
+import threading
+from typing import Dict, List, Optional, Set
+from collectors.history import MatrixRingBuffer, TieredHistory
+from collectors.metric_registry import MetricDescriptor, MetricRegistry, value_formatter
+from collectors.remote_protocol import (
+    CATALOG, SAMPLES, SUBSCRIBE, UNSUBSCRIBE, decode_samples, encode_frame, read_frame)
+
+class RemoteHost:
+    """
+    Connection from the dashboard to a MetricsAgent on another machine. The agent's metrics are
+    added to the registry as "<name>:<metric>" (e.g. "rack1:cpu"), sampled by the collectors
+    "<name>:<collector>", so cards show them like local metrics. Subscribing to such a collector
+    (see SystemMetrics.set_collector_enabled) subscribes to it on the agent.
+
+    Frames are received on a background thread, which reconnects with a growing delay after the
+    connection drops. They are queued and applied by apply_pending() on the collector thread, so
+    like local histories, remote histories are only written by that thread. Subscriptions are
+    queued as well and sent by a writer thread, so the GUI thread never waits for the network.
+
+    Args:
+        name (str): Name of the host in metric strings, e.g. "rack1"
+        host (str): Address of the agent
+        port (int): Port of the agent
+        registry (MetricRegistry): Registry the remote metrics are added to
+        history_seconds (float): Length of the full-resolution histories
+    """
+    RECONNECT_DELAYS = (1, 2, 5, 10, 30)  # Seconds to wait before each reconnection attempt
+
+    def __init__(
+            self, name: str, host: str, port: int, registry: MetricRegistry,
+            history_seconds: float = 600
+        ):
+        if ":" in name:
+            raise ValueError(f"Remote host names cannot contain ':' ({name!r})")
+        self.name = name
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self.history_seconds = history_seconds
+        self.connected = False
+
+        self._inbox: "queue.SimpleQueue" = queue.SimpleQueue()  # (frame type, payload)
+        self._outbox: "queue.SimpleQueue" = queue.SimpleQueue()  # Frames, None stops the writer
+        self._lock = threading.Lock()  # Guards the socket and the subscribed collectors
+        self._sock: Optional[socket.socket] = None
+        self._enabled: Set[str] = set()  # Agent collectors the dashboard uses
+        self._released: Set[str] = set()  # Disabled since the last apply_pending
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"RemoteHost-{name}", daemon=True)
+        self._writer = threading.Thread(
+            target=self._write, name=f"RemoteHostWriter-{name}", daemon=True)
+
+        # Metrics of the current connection, by their index in the agent's catalog
+        self._metrics: List[MetricDescriptor] = []
+        self._rows: List[int] = []
+        self._max_values: Dict[str, float] = {}
+
+    def start(self):
+        """Starts connecting to the agent."""
+        self._thread.start()
+        self._writer.start()
+
+    def close(self):
+        """Disconnects and stops reconnecting."""
+        self._stop.set()
+        with self._lock:
+            if self._sock is not None:
+                try:
+                    self._sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        self._outbox.put(None)
+        for thread in (self._thread, self._writer):
+            if thread.is_alive():
+                thread.join()
+
+    def _send(self, frame_type: int, collector: str):
+        """Queues a (un)subscription for the writer thread."""
+        self._outbox.put(encode_frame(frame_type, collector.encode()))
+
+    def _write(self):
+        """
+        Sends queued frames on the current connection. Frames queued while disconnected are
+        dropped; a new connection subscribes to every enabled collector again.
+        """
+        while True:
+            frame = self._outbox.get()
+            if frame is None:
+                return
+            with self._lock:
+                sock = self._sock
+            if sock is None:
+                continue
+            try:
+                sock.sendall(frame)
+            except OSError:
+                pass  # The receiving thread notices the broken connection and reconnects
+
+    def set_collector_enabled(self, collector: str, enabled: bool = True):
+        """Subscribes to or unsubscribes from a collector of the agent (e.g. "gpu")."""
+        with self._lock:
+            if enabled and collector not in self._enabled:
+                self._enabled.add(collector)
+                self._released.discard(collector)
+                self._send(SUBSCRIBE, collector)
+            elif not enabled and collector in self._enabled:
+                self._enabled.discard(collector)
+                self._released.add(collector)
+                self._send(UNSUBSCRIBE, collector)
+
+    def _run(self):
+        """Receives frames, reconnecting after errors until close() is called."""
+        attempt = 0
+        while not self._stop.is_set():
+            try:
+                sock = socket.create_connection((self.host, self.port), timeout=5)
+            except OSError:
+                delay = self.RECONNECT_DELAYS[min(attempt, len(self.RECONNECT_DELAYS) - 1)]
+                attempt += 1
+                self._stop.wait(delay)
+                continue
+            attempt = 0
+            sock.settimeout(None)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            try:
+                frame = read_frame(sock)
+                if frame is None or frame[0] != CATALOG:
+                    raise ConnectionError("The agent did not send its catalog")
+                self._inbox.put(frame)
+                with self._lock:
+                    self._sock = sock
+                    self.connected = True
+                    for collector in self._enabled:
+                        self._send(SUBSCRIBE, collector)
+                while not self._stop.is_set():
+                    frame = read_frame(sock)
+                    if frame is None:
+                        break
+                    self._inbox.put(frame)
+            except (OSError, ValueError, ConnectionError):
+                pass
+            finally:
+                with self._lock:
+                    self._sock = None
+                    self.connected = False
+                sock.close()
+            self._stop.wait(self.RECONNECT_DELAYS[0])
+
+    def _apply_catalog(self, payload: bytes, updated: Set[str]):
+        """
+        Registers the agent's metrics, reusing the descriptors of a previous connection. Their
+        collectors count as updated, so a snapshot goes out and cards waiting for the metrics
+        resolve them and subscribe.
+        """
+        catalog = json.loads(payload)
+        self._metrics = []
+        self._rows = []
+        for metric in catalog["metrics"]:
+            metric_id = f"{self.name}:{metric['id']}"
+            rows = int(metric.get("rows", 1))
+            descriptor = self.registry.get(metric_id)
+            if descriptor is None:
+                interval = float(metric["interval"])
+                capacity = int(self.history_seconds / interval)
+                if metric["kind"] == "matrix":
+                    history = MatrixRingBuffer(rows, capacity)
+                else:
+                    history = TieredHistory(capacity, interval)
+                label = metric["label"]
+                descriptor = MetricDescriptor(
+                    id=metric_id,
+                    collector=f"{self.name}:{metric['collector']}",
+                    unit=metric["unit"],
+                    title=f"{self.name} {metric['title']}",
+                    label=f"{label} ({self.name})" if label else "",
+                    history=history,
+                    max_value=lambda metric_id=metric_id: self._max_values.get(metric_id, 0),
+                    format=value_formatter(metric.get("spec", ".1f"), metric["unit"]),
+                    kind=metric["kind"],
+                )
+                self.registry.register(descriptor)
+            else:
+                descriptor.history.clear()  # The agent sends its full history again
+            self._metrics.append(descriptor)
+            self._rows.append(rows)
+            updated.add(descriptor.collector)
+
+    def _apply_samples(self, payload: bytes, updated: Set[str]):
+        """Appends the samples of a frame to the histories of subscribed collectors."""
+        for index, samples, max_value, values in decode_samples(payload, self._rows):
+            descriptor = self._metrics[index]
+            collector = descriptor.collector[len(self.name) + 1:]
+            if collector not in self._enabled:
+                continue  # Sent before the agent received our unsubscription
+            self._max_values[descriptor.id] = max_value
+            rows = self._rows[index]
+            if descriptor.kind == "matrix":
+                for sample in range(samples):
+                    descriptor.history.append(values[sample * rows:(sample + 1) * rows])
+            else:
+                for value in values:
+                    descriptor.history.append(value)
+            updated.add(descriptor.collector)
+
+    def apply_pending(self) -> List[str]:
+        """
+        Applies the frames received since the last call and clears the histories of released
+        collectors. Returns the remote collectors (e.g. "rack1:cpu") that received samples or
+        were (re)registered by a catalog. Called on the collector thread.
+        """
+        with self._lock:
+            released, self._released = self._released, set()
+        for collector in released:
+            for descriptor in self.registry.for_collector(f"{self.name}:{collector}"):
+                descriptor.history.clear()
+
+        updated: Set[str] = set()
+        while True:
+            try:
+                frame_type, payload = self._inbox.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if frame_type == CATALOG:
+                    self._apply_catalog(payload, updated)
+                elif frame_type == SAMPLES:
+                    self._apply_samples(payload, updated)
+            except (ValueError, KeyError, IndexError):
+                pass  # Malformed frame from an incompatible agent, skip it
+        return sorted(updated)
@@ -0,0 +1,81 @@
+import json
+import socket
+import struct
+import sys
+from array import array
+from typing import Iterator, Optional, Sequence, Tuple
+
+# Frames start with a type and the length of the payload that follows
+HEADER = struct.Struct("!BI")
+CATALOG = 1  # Agent -> dashboard: JSON description of the agent's metrics, sent on connect
+SAMPLES = 2  # Agent -> dashboard: new samples of several metrics, batched per tick
+SUBSCRIBE = 3  # Dashboard -> agent: UTF-8 collector name to start streaming
+UNSUBSCRIBE = 4  # Dashboard -> agent: UTF-8 collector name to stop streaming
+
+# SAMPLES payload: timestamp and number of entries, then per entry the metric's index in the
+# catalog, the number of samples and the metric's max value, followed by samples * rows floats
+SAMPLES_HEADER = struct.Struct("!dH")
+ENTRY_HEADER = struct.Struct("!HIf")
+
+MAX_FRAME = 64 * 1024 * 1024  # Anything larger is a protocol error
+_SWAP_FLOATS = sys.byteorder == "little"  # The protocol is big-endian throughout
+
+def encode_frame(frame_type: int, payload: bytes) -> bytes:
+    return HEADER.pack(frame_type, len(payload)) + payload
+
+def encode_catalog(hostname: str, metrics: Sequence[dict]) -> bytes:
+    payload = json.dumps({"host": hostname, "metrics": list(metrics)}).encode()
+    return encode_frame(CATALOG, payload)
+
+def encode_entry(index: int, values: Sequence[float], samples: int, max_value: float) -> bytes:
+    """Encodes `samples` samples of one metric. `values` holds samples * rows floats."""
+    floats = array("f", values)
+    if _SWAP_FLOATS:
+        floats.byteswap()
+    return ENTRY_HEADER.pack(index, samples, max_value) + floats.tobytes()
+
+def encode_samples(timestamp: float, entries: Sequence[bytes]) -> bytes:
+    return encode_frame(SAMPLES, SAMPLES_HEADER.pack(timestamp, len(entries)) + b"".join(entries))
+
+def decode_samples(
+        payload: bytes, rows_of: Sequence[int]
+    ) -> Iterator[Tuple[int, int, float, array]]:
+    """
+    Yields (metric index, number of samples, max value, floats) for every entry of a SAMPLES
+    payload. `rows_of` gives the number of values per sample of each metric in the catalog.
+    """
+    _, count = SAMPLES_HEADER.unpack_from(payload, 0)
+    offset = SAMPLES_HEADER.size
+    for _ in range(count):
+        index, samples, max_value = ENTRY_HEADER.unpack_from(payload, offset)
+        offset += ENTRY_HEADER.size
+        size = samples * rows_of[index] * 4
+        floats = array("f", payload[offset:offset + size])
+        if _SWAP_FLOATS:
+            floats.byteswap()
+        offset += size
+        yield index, samples, max_value, floats
+
+def read_exactly(sock: socket.socket, size: int) -> Optional[bytes]:
+    """Reads `size` bytes, or returns None if the connection was closed."""
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+def read_frame(sock: socket.socket) -> Optional[Tuple[int, bytes]]:
+    """Reads one frame as (type, payload), or returns None if the connection was closed."""
+    header = read_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    frame_type, length = HEADER.unpack(header)
+    if length > MAX_FRAME:
+        raise ConnectionError(f"Frame of {length} bytes is too large")
+    payload = read_exactly(sock, length) if length else b""
+    if payload is None:
+        return None
+    return frame_type, payload
@@ -0,0 +1,406 @@
+import json
+import math
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterator, List, Optional, Set, TextIO, Tuple
+from collectors.history import MatrixRingBuffer, TieredHistory
+from collectors.metric_registry import MetricDescriptor, MetricRegistry, value_formatter
+
+RECORDING_VERSION = 1
+
+# A sample of a source: (seconds since the start of the source, values by metric id, max values
+# that changed by metric id). Matrix metrics have a list of values, one per row.
+Sample = Tuple[float, Dict[str, object], Dict[str, float]]
+
+class MetricsRecorder:
+    """
+    Records a live session to a JSON Lines file that RecordingSource can play back. The first
+    line describes the recorded metrics; every following line holds the samples of one
+    collection tick, e.g. {"timestamp": 1700000000.25, "values": {"cpu": 12.5}}. Max values are
+    included whenever they change, so replays scale cards like the live session did.
+
+    Like OpenMetricsExporter, the recorder is fed with the snapshot of every collection tick.
+
+    Args:
+        system_metrics: The SystemMetrics instance whose metrics are recorded
+        path (str): File to write, replaced if it exists
+    """
+    def __init__(self, system_metrics, path: str):
+        # Top process lists are only kept in snapshots and are not recorded
+        self._descriptors = {
+            descriptor.id: descriptor for descriptor in system_metrics.registry
+            if descriptor.kind != "table"}
+        self._max_values: Dict[str, float] = {}
+        self._stream: TextIO = open(path, "w")
+        self._write({"hwmom_recording": RECORDING_VERSION, "metrics": [
+            {
+                "id": descriptor.id,
+                "collector": descriptor.collector,
+                "unit": descriptor.unit,
+                "title": descriptor.title,
+                "label": descriptor.label,
+                "kind": descriptor.kind,
+                "rows": getattr(descriptor.history, "rows", 1),
+                "interval": system_metrics.collector_intervals[descriptor.collector] / 1000,
+                "spec": getattr(descriptor.format, "spec", ".1f"),
+            }
+            for descriptor in self._descriptors.values()
+        ]})
+
+    def _write(self, record: dict):
+        self._stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def publish(self, snapshot):
+        """Writes the new samples of a collection tick. Called on the collector thread."""
+        values = {}
+        max_values = {}
+        for metric_id in snapshot.updated:
+            descriptor = self._descriptors.get(metric_id)
+            if descriptor is None:
+                continue
+            if descriptor.kind == "matrix":
+                values[metric_id] = [round(value, 3) for value in descriptor.history.latest()]
+            else:
+                values[metric_id] = round(descriptor.history.latest(), 3)
+            max_value = descriptor.max_value()
+            if max_value is not None and self._max_values.get(metric_id) != max_value:
+                self._max_values[metric_id] = max_values[metric_id] = max_value
+        if not values:
+            return
+        record = {"timestamp": round(snapshot.timestamp, 3), "values": values}
+        if max_values:
+            record["max"] = max_values
+        self._write(record)
+        self._stream.flush()
+
+    def close(self):
+        self._stream.close()
+
+class MetricSource(ABC):
+    """
+    Base class for sources of replayed samples (see MetricsReplay). A source describes its
+    metrics like MetricsRecorder does, and then produces samples in time order.
+    """
+    @abstractmethod
+    def catalog(self) -> List[dict]:
+        """Returns a description of every metric, as in the first line of a recording."""
+
+    @abstractmethod
+    def samples(self) -> Iterator[Sample]:
+        """Yields the samples from the start of the source. May be infinite."""
+
+class RecordingSource(MetricSource):
+    """
+    Plays back a file written by MetricsRecorder. The JSON Lines output of headless mode
+    (`--headless --format jsonl`) can be played back as well; its metrics are then described by
+    the current SystemMetrics, or as plain values if it does not know them.
+
+    Args:
+        path (str): The recording
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._catalog: List[dict] = []
+        with open(path) as f:
+            first = json.loads(f.readline() or "{}")
+        if "hwmom_recording" in first:
+            if first["hwmom_recording"] != RECORDING_VERSION:
+                raise ValueError(f"{path} is a recording of an unsupported version")
+            self._catalog = first["metrics"]
+        else:
+            # Headless output: every key but the timestamp is a metric
+            for metric_id, value in first.items():
+                if metric_id == "timestamp":
+                    continue
+                matrix = isinstance(value, list)
+                self._catalog.append({
+                    "id": metric_id,
+                    "kind": "matrix" if matrix else "value",
+                    "rows": len(value) if matrix else 1,
+                })
+
+    def catalog(self) -> List[dict]:
+        return self._catalog
+
+    def samples(self) -> Iterator[Sample]:
+        start = None
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Truncated last line of a recording that is still being written
+                if "hwmom_recording" in record or "timestamp" not in record:
+                    continue
+                if start is None:
+                    start = record["timestamp"]
+                values = record.get("values")
+                if values is None:
+                    values = {key: value for key, value in record.items() if key != "timestamp"}
+                yield record["timestamp"] - start, values, record.get("max", {})
+
+def wave(period: float, phase: float) -> Callable[[float, random.Random], float]:
+    """A slow wave with faster ripples, like a steady background load."""
+    def generate(t: float, rng: random.Random) -> float:
+        return (0.5 + 0.35 * math.sin(2 * math.pi * t / period + phase)
+                + 0.1 * math.sin(14 * math.pi * t / period + phase))
+    return generate
+
+def random_walk(step: float, start: float) -> Callable[[float, random.Random], float]:
+    """A value drifting randomly between 0 and 1, like memory use or temperatures."""
+    state = [start]
+
+    def generate(t: float, rng: random.Random) -> float:
+        state[0] = min(1.0, max(0.0, state[0] + rng.uniform(-step, step)))
+        return state[0]
+    return generate
+
+def spikes(rate: float, baseline: float) -> Callable[[float, random.Random], float]:
+    """A low baseline with random bursts, like disk or network traffic."""
+    def generate(t: float, rng: random.Random) -> float:
+        if rng.random() < rate:
+            return rng.uniform(0.5, 1.0)
+        return baseline * rng.random()
+    return generate
+
+def square(period: float, duty: float) -> Callable[[float, random.Random], float]:
+    """Alternating busy and idle phases, like a periodic batch job."""
+    def generate(t: float, rng: random.Random) -> float:
+        busy = (t % period) < duty * period
+        return (0.9 if busy else 0.1) + rng.uniform(-0.05, 0.05)
+    return generate
+
+GENERATORS = {"wave": wave, "random_walk": random_walk, "spikes": spikes, "square": square}
+
+# Dashboard metrics produced by SyntheticSource in addition to its synthetic ones:
+# (id, collector, generator, lowest value, highest value, max value)
+SYSTEM_METRICS = (
+    ("cpu", "cpu", "wave", 0, 100, 100),
+    ("memory", "memory", "random_walk", 4, 28, 32),
+    ("gpu", "gpu", "square", 0, 100, 100),
+    ("gpu_temp", "gpu", "random_walk", 35, 85, 100),
+    ("gpu_memory", "gpu", "random_walk", 1, 7.5, 8),
+    ("ping", "ping", "spikes", 8, 120, 500),
+    ("fan_speed", "fan", "wave", 800, 2400, 6000),
+    ("disk_read", "disk", "spikes", 0, 400, 400),
+    ("disk_write", "disk", "spikes", 0, 200, 200),
+)
+
+class SyntheticSource(MetricSource):
+    """
+    Generates realistic looking samples for the main dashboard metrics (CPU, memory, GPU, ...)
+    and for any number of extra metrics "synthetic_000", "synthetic_001", ... sampled by the
+    collector "synthetic". Every metric follows one of GENERATORS with its own parameters.
+    Samples are reproducible for a given seed.
+
+    Args:
+        count (int): Number of extra metrics
+        interval (float): Seconds between samples
+        seed (int): Seed of the random parameters and noise
+    """
+    def __init__(self, count: int = 100, interval: float = 1.0, seed: int = 0):
+        self.interval = interval
+        self.seed = seed
+        rng = random.Random(seed)
+        self._metrics = []  # (id, generator name, generator parameters, lowest, highest value)
+        self._catalog = []
+        self._max_values = {}
+        for metric_id, collector, kind, low, high, max_value in SYSTEM_METRICS:
+            self._add(metric_id, collector, kind, rng, low, high, max_value)
+        names = sorted(GENERATORS)
+        for i in range(count):
+            kind = names[i % len(names)]
+            self._add(f"synthetic_{i:03d}", "synthetic", kind, rng, 0, 100, 100,
+                      unit="%", title=f"Synthetic {i} ({kind})")
+
+    @staticmethod
+    def _parameters(kind: str, rng: random.Random) -> Tuple[float, float]:
+        """Draws the parameters of a generator."""
+        if kind == "wave":
+            return rng.uniform(20, 300), rng.uniform(0, 2 * math.pi)
+        if kind == "random_walk":
+            return rng.uniform(0.005, 0.05), rng.random()
+        if kind == "spikes":
+            return rng.uniform(0.02, 0.2), rng.uniform(0.02, 0.2)
+        return rng.uniform(10, 120), rng.uniform(0.2, 0.8)
+
+    def _add(self, metric_id: str, collector: str, kind: str, rng: random.Random, low: float,
+             high: float, max_value: float, unit: str = "", title: str = ""):
+        self._metrics.append((metric_id, kind, self._parameters(kind, rng), low, high))
+        self._max_values[metric_id] = max_value
+        entry = {"id": metric_id, "collector": collector, "interval": self.interval}
+        if title:
+            entry.update(unit=unit, title=title, label=title)
+        self._catalog.append(entry)
+
+    def catalog(self) -> List[dict]:
+        return self._catalog
+
+    def samples(self) -> Iterator[Sample]:
+        # Fresh generators, so every pass produces the same samples
+        rng = random.Random(self.seed)
+        generators = [
+            (metric_id, GENERATORS[kind](*parameters), low, high)
+            for metric_id, kind, parameters, low, high in self._metrics
+        ]
+        tick = 0
+        while True:
+            t = tick * self.interval
+            values = {
+                metric_id: round(low + (high - low) * min(1.0, max(0.0, generate(t, rng))), 3)
+                for metric_id, generate, low, high in generators
+            }
+            yield t, values, self._max_values if tick == 0 else {}
+            tick += 1
+
+class MetricsReplay:
+    """
+    Feeds the samples of a MetricSource into the registry of a SystemMetrics, replacing the
+    collectors the source provides (see SystemMetrics.enable_replay). Samples are applied at the
+    pace they were recorded at, scaled by `speed`, by apply_due() on the collector thread.
+
+    Metrics the registry does not know are registered, so cards can show them. Known metrics
+    keep their descriptor, but use the max values of the source, e.g. the GPU memory of the
+    recorded machine. Their histories are re-created if the source samples them at a different
+    interval, so time axes stay right.
+
+    Args:
+        source (MetricSource): Where the samples come from
+        system_metrics: The SystemMetrics whose histories are written
+        speed (float): Replay speed, 2 plays back twice as fast as recorded
+        loop (bool): Start over at the end of the source
+    """
+    def __init__(self, source: MetricSource, system_metrics, speed: float = 1.0, loop: bool = True):
+        if speed <= 0:
+            raise ValueError("The replay speed must be positive")
+        self.source = source
+        self.speed = speed
+        self.loop = loop
+        self.finished = False
+        self.max_values: Dict[str, float] = {}
+        self.collectors: Set[str] = set()  # Collectors provided by the source
+        self._descriptors: Dict[str, MetricDescriptor] = {}
+        self._register(system_metrics)
+
+        self._samples = source.samples()
+        self._next: Optional[Sample] = None
+        self._start = time.monotonic()
+        self._offset = 0.0  # Source time at which the current pass started, for loops
+        self._last_time: Optional[float] = None  # Source time of the previous two samples
+        self._gap = 0.0  # Time between the previous two samples
+        self._advance()
+
+    def _register(self, system_metrics):
+        """Resolves or registers the metrics of the source."""
+        registry: MetricRegistry = system_metrics.registry
+        for metric in self.source.catalog():
+            metric_id = metric["id"]
+            descriptor = registry.get(metric_id)
+            if descriptor is None:
+                collector = metric.get("collector", "replay")
+                interval = float(metric.get("interval", 1.0))
+                system_metrics.collector_intervals.setdefault(collector, interval * 1000)
+                capacity = int(system_metrics.history_seconds / interval)
+                rows = int(metric.get("rows", 1))
+                matrix = metric.get("kind") == "matrix"
+                unit = metric.get("unit", "")
+                descriptor = MetricDescriptor(
+                    id=metric_id,
+                    collector=collector,
+                    unit=unit,
+                    title=metric.get("title", metric_id),
+                    label=metric.get("label", metric_id),
+                    history=MatrixRingBuffer(rows, capacity) if matrix
+                    else TieredHistory(capacity, interval),
+                    max_value=self._max_value(metric_id),
+                    format=value_formatter(metric.get("spec", ".1f"), unit),
+                    kind="matrix" if matrix else "value",
+                )
+                registry.register(descriptor)
+            elif descriptor.kind == "matrix":
+                rows = int(metric.get("rows", descriptor.history.rows))
+                if rows != descriptor.history.rows:
+                    # Recorded on a machine with a different number of cores
+                    descriptor.history = MatrixRingBuffer(rows, descriptor.history.capacity)
+            elif descriptor.kind == "value" and "interval" in metric:
+                interval = float(metric["interval"])
+                if interval != descriptor.history.interval:
+                    # Sampled at another pace than the live collector, e.g. a SyntheticSource
+                    system_metrics.collector_intervals[descriptor.collector] = interval * 1000
+                    descriptor.history = TieredHistory(
+                        int(system_metrics.history_seconds / interval), interval)
+            if descriptor.kind == "table":
+                continue
+            self._descriptors[metric_id] = descriptor
+            self.collectors.add(descriptor.collector)
+
+    def _max_value(self, metric_id: str, fallback: Optional[Callable[[], float]] = None):
+        """Returns the max value function of a replayed metric."""
+        def max_value() -> float:
+            if metric_id in self.max_values:
+                return self.max_values[metric_id]
+            if fallback is not None:
+                return fallback()
+            values = self._descriptors[metric_id].history.view()
+            return max(1, max(values, default=0))
+        return max_value
+
+    def _advance(self):
+        """Reads the next sample, starting over at the end of the source if looping."""
+        if self._next is not None:
+            if self._last_time is not None:
+                self._gap = self._next[0] - self._last_time
+            self._last_time = self._next[0]
+        self._next = next(self._samples, None)
+        if self._next is None and self.loop and self._last_time is not None:
+            # Start the next pass one sample interval after the last sample
+            self._offset += self._last_time + (self._gap or 1.0)
+            self._last_time = None
+            self._samples = self.source.samples()
+            self._next = next(self._samples, None)
+        if self._next is None:
+            self.finished = True
+
+    def next_delay(self) -> float:
+        """Returns the number of seconds until the next sample is due."""
+        if self._next is None:
+            return math.inf
+        due = self._start + (self._offset + self._next[0]) / self.speed
+        return max(0.0, due - time.monotonic())
+
+    def apply_due(self, enabled: Callable[[str], bool]) -> List[str]:
+        """
+        Appends the samples that are due to the histories of enabled collectors. Returns the
+        collectors that received samples. Called on the collector thread.
+        """
+        updated: Set[str] = set()
+        while self._next is not None and self.next_delay() == 0:
+            _, values, max_values = self._next
+            for metric_id, max_value in max_values.items():
+                descriptor = self._descriptors.get(metric_id)
+                if descriptor is not None and metric_id not in self.max_values:
+                    # Prefer the source's max value from now on
+                    descriptor.max_value = self._max_value(metric_id, descriptor.max_value)
+                self.max_values[metric_id] = max_value
+            for metric_id, value in values.items():
+                descriptor = self._descriptors.get(metric_id)
+                if descriptor is None or not enabled(descriptor.collector):
+                    continue
+                try:
+                    descriptor.history.append(value)
+                except (ValueError, TypeError):
+                    continue  # Malformed value, e.g. a matrix with a different number of rows
+                updated.add(descriptor.collector)
+            self._advance()
+        return sorted(updated)
+
+def open_metric_source(spec: str) -> MetricSource:
+    """
+    Opens the source described by `spec`: "synthetic" or "synthetic:<count>" for a
+    SyntheticSource with that many extra metrics, otherwise the path of a recording.
+    """
+    name, _, count = spec.partition(":")
+    if name == "synthetic":
+        return SyntheticSource(int(count) if count else 100)
+    return RecordingSource(spec)
@@ -0,0 +1,203 @@
+import json
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Sequence, TypeVar
+from collectors.history import RingStorage, TieredHistory
+from collectors.metric_registry import MetricDescriptor, MetricRegistry, value_formatter
+
+T = TypeVar("T")
+
+# Layout of a shared metrics segment (little endian):
+#   header:  magic b"HWMS", version (uint32), sequence (uint64), catalog length (uint32), padding
+#   catalog: JSON list of the metrics with the offset of their rings, padded to 8 bytes
+#   rings:   per metric the rings of a TieredHistory, laid out like in a HistoryFile
+MAGIC = b"HWMS"
+VERSION = 1
+_HEADER = struct.Struct("<4sIQI4x")
+_SEQUENCE_OFFSET = 8
+
+class _Segment(shared_memory.SharedMemory):
+    """
+    SharedMemory that can be closed while histories or snapshots still hold views into it. The
+    mapping is then released together with the last view instead of raising BufferError.
+    """
+    def close(self):
+        try:
+            super().close()
+        except BufferError:
+            pass
+
+    def __del__(self):
+        self.close()
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attaches to an existing segment without taking over its cleanup."""
+    try:
+        return _Segment(name, track=False)  # Python 3.13+
+    except TypeError:
+        pass
+    segment = _Segment(name)
+    try:
+        # Before 3.13, the resource tracker would unlink the segment when this process exits
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(segment._name, "shared_memory")
+    except (ImportError, AttributeError):
+        pass  # Windows has no resource tracker; the segment lives as long as a handle is open
+    return segment
+
+class SharedMetricsPublisher:
+    """
+    Keeps the metric histories of a SystemMetrics in a named shared memory segment, so other
+    processes can read them without collecting anything (see SharedMetricsReader). The ring
+    buffers are allocated inside the segment, so publishing costs nothing beyond the appends.
+
+    Writers and readers are synchronised with a seqlock: the sequence number in the header is
+    odd while SystemMetrics.update() writes, and is incremented again when it is done. Readers
+    retry when the number was odd or changed while they read.
+
+    Per-core histories and persisted histories (see SystemMetrics.enable_persistence) are not
+    published, since they already live in other memory.
+
+    Args:
+        system_metrics: The SystemMetrics instance whose histories are published
+        name (str): Name of the segment, e.g. "hwmom"
+    """
+    def __init__(self, system_metrics, name: str = "hwmom"):
+        self.name = name
+        tiers = TieredHistory.DEFAULT_TIERS
+        descriptors = [
+            descriptor for descriptor in system_metrics.registry
+            if descriptor.kind != "matrix" and descriptor.id not in system_metrics.history_files
+        ]
+
+        # Describe every metric and where its rings are, relative to the end of the catalog
+        catalog = []
+        offset = 0
+        for descriptor in descriptors:
+            interval = system_metrics.collector_intervals[descriptor.collector] / 1000
+            capacity = int(system_metrics.history_seconds / interval)
+            catalog.append({
+                "id": descriptor.id,
+                "collector": descriptor.collector,
+                "unit": descriptor.unit,
+                "title": descriptor.title,
+                "label": descriptor.label,
+                "kind": descriptor.kind,
+                "spec": getattr(descriptor.format, "spec", ".1f"),
+                "interval": interval,
+                "capacity": capacity,
+                "tiers": tiers,
+                "offset": offset,
+            })
+            offset += sum(RingStorage.nbytes(c) for c in TieredHistory.ring_capacities(capacity))
+        catalog_bytes = json.dumps(catalog).encode()
+        catalog_bytes += b" " * (-len(catalog_bytes) % 8)  # Keep the rings 8-byte aligned
+        data_start = _HEADER.size + len(catalog_bytes)
+
+        self._segment = _Segment(name, create=True, size=data_start + offset)
+        buffer = self._segment.buf
+        buffer[:_HEADER.size] = _HEADER.pack(MAGIC, VERSION, 0, len(catalog_bytes))
+        buffer[_HEADER.size:data_start] = catalog_bytes
+        self._sequence = buffer[_SEQUENCE_OFFSET:_SEQUENCE_OFFSET + 8].cast("Q")
+
+        # Move every history into the segment. Collectors are not running yet, so the histories
+        # only hold their initial sample.
+        for descriptor, metric in zip(descriptors, catalog):
+            descriptor.history = TieredHistory(
+                metric["capacity"], metric["interval"], tiers,
+                storages=_ring_storages(buffer, data_start + metric["offset"], metric["capacity"]))
+
+    def begin_write(self):
+        """Marks the histories as being written (odd sequence number)."""
+        self._sequence[0] += 1
+
+    def end_write(self):
+        """Marks the histories as consistent again (even sequence number)."""
+        self._sequence[0] += 1
+
+    def close(self):
+        """Removes the segment. Attached readers keep their mapping until they close it."""
+        self._segment.unlink()
+        self._segment.close()
+
+def _ring_storages(buffer: memoryview, offset: int, capacity: int) -> List[RingStorage]:
+    """Returns the storage of every ring of a TieredHistory laid out at `offset`."""
+    storages = []
+    for ring_capacity in TieredHistory.ring_capacities(capacity):
+        storages.append(RingStorage.from_buffer(buffer, offset, ring_capacity))
+        offset += RingStorage.nbytes(ring_capacity)
+    return storages
+
+class SharedMetricsReader:
+    """
+    Read-only access to the histories published by another HWMom process. The histories are
+    TieredHistory objects backed directly by the shared segment, so reading them does not copy.
+    Use read() to get a consistent result while the publisher keeps writing.
+
+    Attributes:
+        registry (MetricRegistry): Descriptors of the published metrics. Their max value is not
+            published and is always None.
+
+    Args:
+        name (str): Name of the segment given to SharedMetricsPublisher
+    """
+    def __init__(self, name: str = "hwmom"):
+        self._segment = _attach(name)
+        buffer = self._segment.buf.toreadonly()
+        magic, version, _, catalog_length = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            self._segment.close()
+            raise ValueError(f"{name!r} is not a HWMom metrics segment of version {VERSION}")
+        self._sequence = buffer[_SEQUENCE_OFFSET:_SEQUENCE_OFFSET + 8].cast("Q")
+        data_start = _HEADER.size + catalog_length
+        catalog = json.loads(bytes(buffer[_HEADER.size:data_start]))
+
+        self.registry = MetricRegistry()
+        for metric in catalog:
+            tiers = [tuple(tier) for tier in metric["tiers"]]
+            storages = _ring_storages(buffer, data_start + metric["offset"], metric["capacity"])
+            # Every ring already holds at least its initial sample, so this does not write
+            history = TieredHistory(metric["capacity"], metric["interval"], tiers,
+                                    storages=storages)
+            self.registry.register(MetricDescriptor(
+                id=metric["id"],
+                collector=metric["collector"],
+                unit=metric["unit"],
+                title=metric["title"],
+                label=metric["label"],
+                history=history,
+                max_value=lambda: None,
+                format=value_formatter(metric["spec"], metric["unit"]),
+                kind=metric["kind"],
+            ))
+
+    def sequence(self) -> int:
+        """Returns the publisher's sequence number. It changes with every collection tick."""
+        return self._sequence[0]
+
+    def read(self, function: Callable[[], T]) -> T:
+        """
+        Calls `function` until it ran while the publisher was not writing, and returns its
+        result. `function` should copy what it needs out of the histories.
+        """
+        while True:
+            start = self._sequence[0]
+            if start & 1:
+                time.sleep(0.0005)  # A write is in progress, it takes well below a millisecond
+                continue
+            result = function()
+            if self._sequence[0] == start:
+                return result
+
+    def latest(self, metric_ids: Optional[Sequence[str]] = None) -> Dict[str, float]:
+        """Returns a consistent set of the latest value of every (or the given) metric."""
+        descriptors = [self.registry[metric_id] for metric_id in metric_ids] \
+            if metric_ids is not None else list(self.registry)
+        return self.read(lambda: {
+            descriptor.id: descriptor.history.latest() for descriptor in descriptors})
+
+    def close(self):
+        """Detaches from the segment."""
+        self.registry = MetricRegistry()  # Drop the views into the segment before closing it
+        self._segment.close()
@@ -1,7 +1,83 @@
+import os
 import psutil
-import subprocess
-from typing import Dict, List, Optional, Tuple
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Sequence, Set, Tuple, Union
 from ping3 import ping
+from collectors.gpu_backends import GpuBackend, open_gpu_backend
+from collectors.history import MatrixRingBuffer, TieredHistory
+from collectors.counters import CounterRates
+from collectors.history_file import HistoryFile
+from collectors.linux_procfs import LinuxProcReader
+from collectors.processes import ProcessScanner
+from collectors.remote_host import RemoteHost
+from collectors.replay import MetricSource, MetricsReplay
+from collectors.shared_metrics import SharedMetricsPublisher
+from collectors.metric_registry import MetricDescriptor, MetricRegistry, value_formatter
+
+@dataclass(frozen=True)
+class MetricsSnapshot:
+    """
+    Read-only access to all metric histories at the end of a collection tick. Snapshots are
+    created on the collector thread and handed to the widgets.
+
+    The stores keep changing on the collector thread. get_history() and fetch() therefore read
+    them at the cursors taken with the snapshot rather than at their current end. The data at a
+    cursor stays intact while the collector appends one more sample (see RingBuffer), so only the
+    newest snapshot should be read.
+    """
+    timestamp: float
+    stores: Mapping[str, Union[TieredHistory, MatrixRingBuffer]]
+    # Cursors of every store, the raw samples first. See TieredHistory.cursors
+    cursors: Mapping[str, tuple]
+    updated: frozenset = frozenset()  # Metric ids that received a new sample this tick
+    # Top processes by "cpu", "rss" and "io", see ProcessScanner.top
+    processes: Mapping[str, tuple] = field(default_factory=dict)
+    # Value drawn as 100% for each metric, computed on the collector thread
+    max_values: Mapping[str, float] = field(default_factory=dict)
+
+    def get_history(self, string: str) -> Sequence[float]:
+        """Returns the history for a metric id, or (0,) if the metric is unknown."""
+        store = self.stores.get(string)
+        if store is None:
+            return (0,)
+        return store.view(self.cursors[string][0])
+
+    def appended(self, string: str) -> int:
+        """Returns the number of samples appended to a metric's history, see RingBuffer.appended."""
+        cursors = self.cursors.get(string)
+        return cursors[0][2] if cursors else 0
+
+    def fetch(
+            self, string: str, window_seconds: float, max_points: int,
+            decimation: Optional[str] = None
+        ) -> Tuple[Sequence[float], float, Optional[int]]:
+        """
+        Returns (values, seconds per value, position) for a time window, see TieredHistory.fetch.
+        The position is None for unknown metrics.
+        """
+        store = self.stores.get(string)
+        if not isinstance(store, TieredHistory):
+            return (0,), window_seconds, None
+        return store.fetch(window_seconds, max_points, decimation, self.cursors[string])
+
+class CollectorSubscription:
+    """
+    A widget's claim on a collector, returned by SystemMetrics.subscribe. Releasing it more than
+    once has no effect, so it can be released both explicitly and when the widget is destroyed.
+    """
+    def __init__(self, system_metrics: "SystemMetrics", collector: str):
+        self.system_metrics = system_metrics
+        self.collector = collector
+        self.active = True
+
+    def release(self, *_):
+        """Gives up the claim. Extra arguments allow connecting this to Qt signals."""
+        if self.active:
+            self.active = False
+            self.system_metrics.unsubscribe(self.collector)
 
 class SystemMetrics:
     """
@@ -11,178 +87,615 @@ class SystemMetrics:
     - Prevents multiple calls to the same collector if we e.g. have multiple GPU widgets.
     - Allows us to use a single class for all widgets of the same type (graph/circle/etc.)
     - Stores only a single history for each metric, as opposed to one for each widget.
+
+    Every metric is described once in the metric registry (see _register_metrics), which holds
+    its collector, unit, max value, formatting and history.
+
+    Collectors are reference-counted by the widgets subscribed to them. When the last subscriber
+    goes away, the collector stops, its histories are cleared and its resources (e.g. the GPU
+    backend) are closed. A new subscriber starts it again.
     """
-    def __init__(self):
+    # Collectors due within this many seconds of each other run in the same wakeup
+    SCHEDULER_SLACK = 0.02
+    # Longest time samples received from remote hosts wait before they are applied
+    REMOTE_POLL_INTERVAL = 0.1
+    # Seconds between attempts to open a GPU backend after none could be opened
+    GPU_REOPEN_DELAY = 60
+
+    def __init__(self, gpu_backend: str = "auto", procfs_root: Optional[str] = None):
         self.collect_cpu_enabled = False
+        self.collect_cpu_freq_enabled = False
         self.collect_gpu_enabled = False
         self.collect_memory_enabled = False
         self.collect_ping_enabled = False
         self.collect_fan_enabled = False
+        self.collect_disk_enabled = False
+        self.collect_net_enabled = False
+        self.collect_processes_enabled = False
+        self.collect_temps_enabled = False
+        self.collect_overhead_enabled = False
+
+        self.update_interval = 1000  # Longest time between two scheduler wakeups, in milliseconds
+        self.history_seconds = 600  # 10 minutes of full-resolution history
 
-        self.update_interval = 1000  # milliseconds
-        self.history_size = int(60 / (self.update_interval / 1000)) # 60 seconds of history
+        # Sampling period of each collector in milliseconds. Cheap collectors run more often.
+        self.collector_intervals = {
+            "cpu": 250,
+            "cpu_freq": 1000,
+            "gpu": 1000,
+            "memory": 1000,
+            "ping": 5000,  # Slow and uses the network
+            "fan": 2000,
+            "disk": 1000,
+            "net": 1000,
+            "processes": 2000,
+            "temps": 2000,
+            "overhead": 1000,
+        }
+        self._deadlines: Dict[str, float] = {}  # Next time.monotonic() each collector is due
+        self._subscribers: Dict[str, int] = {}  # Number of live widgets using each collector
+        self._running: Set[str] = set()  # Collectors that ran since they were last released
         
-        # Initialize histories with default values
-        self.cpu_history = [0]
-        self.gpu_history = [0]
-        self.gpu_temp_history = [0]
-        self.gpu_memory_history = [0]
-        self.system_memory_history = [0]
-        self.ping_history = [0]
-        self.fan_history = [0]
+        self.history_files: Dict[str, HistoryFile] = {}  # Set by enable_persistence
+        self.remote_hosts: Dict[str, RemoteHost] = {}  # Agents added by add_remote_host
+        self.shared_metrics: Optional[SharedMetricsPublisher] = None  # See enable_shared_memory
+        self.replay: Optional[MetricsReplay] = None  # See enable_replay
 
         # Max values (used to calculate relative usage for circle and graph widgets):
         self.max_system_memory = None
         self.max_cpu_usage = 100 # CPU usage is always percentage based
+        self.max_cpu_freq = None  # Highest core frequency in MHz, None if not available
         self.max_gpu_usage = 100 # GPU usage is always percentage based
         self.max_gpu_memory = None
         self.max_gpu_temp = 100 # Arbitrary max value
         self.max_ping = 500 # Arbitrary max value
         self.max_fan_speed = 6000 # Arbitrary max value
+        self.max_temp = 100 # Arbitrary max value for temperature sensors
+        # Disk and network rates have no fixed max. Graphs scale to the peak of the history, but
+        # never below these values.
+        self.min_scale_disk_throughput = 10  # MB/s
+        self.min_scale_disk_iops = 100
+        self.min_scale_disk_await = 10  # ms
+        self.min_scale_net_throughput = 1  # MB/s
+        # Max values of the latest snapshot, only recomputed for metrics with new samples
+        self._max_values: Dict[str, float] = {}
+
+        # HWMom's own cost. Collector times are added up by update() on the collector thread; widget
+        # times are added up by the GUI thread. Each thread only writes its own totals, and
+        # collect_overhead_metrics turns them into averages per call.
+        self._collect_ns: Dict[str, int] = {}
+        self._collect_calls: Dict[str, int] = {}
+        self.update_display_ns = 0
+        self.update_display_calls = 0
+        self.paint_ns = 0
+        self.paint_calls = 0
+        self._overhead_totals: Dict[str, Tuple[int, int]] = {}  # Totals at the last overhead tick
+        self._overhead_cpu: Optional[Tuple[float, float]] = None  # (process CPU s, monotonic s)
+
+        # Turn the cumulative disk and network counters into per-second rates
+        self._disk_rates = CounterRates()
+        self._net_rates = CounterRates()
+
+        # GPU backend (NVML or a persistent nvidia-smi stream), opened on first use and reopened
+        # when it fails. Only the collector thread opens and closes it.
+        self.gpu_backend_name = gpu_backend
+        self.gpu_backend: Optional[GpuBackend] = None
+        self._gpu_backend_retry = 0.0  # Monotonic time of the next attempt to open a backend
+        self._gpu_backend_changed = False  # Set by set_gpu_backend
+        self._gpu_backend_sampled = False  # Whether the open backend has produced a sample
+
+        # Linux fast path for CPU, memory and fans; psutil is used when it is not available.
+        # procfs_root points the reader at a fake /proc and /sys tree.
+        self.linux_reader = LinuxProcReader.create(procfs_root)
 
-        # Initialize max values and collect initial metrics
+        # Top-N processes, scanned incrementally. Replaced as a whole after every scan.
+        self.process_scanner = ProcessScanner.create(
+            self.linux_reader.root if self.linux_reader is not None else None)
+        self.top_processes = self.process_scanner.top()
+
+        # Initialize max values, describe every metric (including its history) and collect
+        # initial metrics
         self.update_max_values()
+        self.registry = MetricRegistry()
+        self._register_metrics()
         self.update()
     
-    def update(self):
-        """Updates the metrics."""
-        if self.collect_cpu_enabled:
-            self.collect_cpu_metrics()
-        if self.collect_gpu_enabled:
-            self.collect_gpu_metrics()
-        if self.collect_memory_enabled:
-            self.collect_memory_metrics()
-        if self.collect_ping_enabled:
-            self.collect_ping()
-        if self.collect_fan_enabled:
-            self.collect_fan_metrics()
-
-    def get_metric_from_string(self, string: str):
-        """Returns a metric history based on a string."""
-        if not string:
+    def _collectors(self):
+        """Returns (name, enabled, collect function) for every collector."""
+        return (
+            ("cpu", self.collect_cpu_enabled, self.collect_cpu_metrics),
+            ("cpu_freq", self.collect_cpu_freq_enabled, self.collect_cpu_freq_metrics),
+            ("gpu", self.collect_gpu_enabled, self.collect_gpu_metrics),
+            ("memory", self.collect_memory_enabled, self.collect_memory_metrics),
+            ("ping", self.collect_ping_enabled, self.collect_ping),
+            ("fan", self.collect_fan_enabled, self.collect_fan_metrics),
+            ("disk", self.collect_disk_enabled, self.collect_disk_metrics),
+            ("net", self.collect_net_enabled, self.collect_net_metrics),
+            ("processes", self.collect_processes_enabled, self.collect_process_metrics),
+            ("temps", self.collect_temps_enabled, self.collect_temp_metrics),
+            ("overhead", self.collect_overhead_enabled, self.collect_overhead_metrics),
+        )
+
+    def _register_metrics(self):
+        """Registers a descriptor for every metric. New metrics only need to be added here."""
+        def register(metric_id, collector, unit, title, label, max_value, spec, aliases=()):
+            self.registry.register(MetricDescriptor(
+                id=metric_id,
+                collector=collector,
+                unit=unit,
+                title=title,
+                label=label,
+                history=self._create_history(collector),
+                max_value=max_value,
+                format=value_formatter(spec, unit),
+            ), aliases)
+
+        register("memory", "memory", "GB", "Memory", "Memory Usage",
+                 lambda: self.max_system_memory, ".1f", aliases=["ram"])
+        register("cpu", "cpu", "%", "CPU", "CPU Usage", lambda: self.max_cpu_usage, ".0f")
+        register("gpu", "gpu", "%", "GPU", "GPU Usage", lambda: self.max_gpu_usage, ".0f")
+        register("gpu_temp", "gpu", "°C", "GPU Temp", "GPU Temperature",
+                 lambda: self.max_gpu_temp, ".0f")
+        register("gpu_memory", "gpu", "GB", "GPU Memory", "GPU Memory",
+                 lambda: self.max_gpu_memory, ".1f")
+        register("fan_speed", "fan", "", "Fan Speed", "Fan Speed",
+                 lambda: self.max_fan_speed, ".1f")
+        register("ping", "ping", "ms", "Ping", "Ping", lambda: self.max_ping, ".0f")
+
+        # Disk I/O of all whole disks
+        register("disk_read", "disk", "MB/s", "Disk Read", "Disk Read Speed",
+                 lambda: self._history_peak("disk_read", self.min_scale_disk_throughput), ".1f")
+        register("disk_write", "disk", "MB/s", "Disk Write", "Disk Write Speed",
+                 lambda: self._history_peak("disk_write", self.min_scale_disk_throughput), ".1f")
+        register("disk_iops", "disk", "", "Disk IOPS", "Disk IOPS",
+                 lambda: self._history_peak("disk_iops", self.min_scale_disk_iops), ".0f")
+        register("disk_await", "disk", "ms", "Disk Await", "Disk Await",
+                 lambda: self._history_peak("disk_await", self.min_scale_disk_await), ".1f")
+
+        # Throughput of every network interface, e.g. "net_rx:eth0"
+        for interface in self._network_interfaces():
+            for direction, name in (("rx", "RX"), ("tx", "TX")):
+                metric_id = f"net_{direction}:{interface}"
+                register(metric_id, "net", "MB/s", f"{interface} {name}",
+                         f"Network {name} ({interface})",
+                         lambda metric_id=metric_id: self._history_peak(
+                             metric_id, self.min_scale_net_throughput), ".2f")
+
+        # Temperature sensors found in hwmon and thermal zones, e.g. "temp:nvme0" (Linux only)
+        if self.linux_reader is not None:
+            for sensor in self.linux_reader.temperature_sensors():
+                register(f"temp:{sensor.key}", "temps", "°C", sensor.title,
+                         f"Temperature ({sensor.title})", lambda: self.max_temp, ".0f",
+                         aliases=[f"temp:{alias}" for alias in sensor.aliases])
+
+        # Top processes. The history holds the process count; the top lists are in snapshots.
+        self.registry.register(MetricDescriptor(
+            id="processes",
+            collector="processes",
+            unit="",
+            title="Top Processes",
+            label="Top Processes",
+            history=self._create_history("processes"),
+            max_value=lambda: max(1, self.process_scanner.process_count),
+            format=value_formatter(".0f"),
+            kind="table",
+        ))
+
+        # HWMom's own overhead, shown together on the overhead card
+        register("hwmom_cpu", "overhead", "%", "HWMom Overhead", "HWMom CPU Usage",
+                 lambda: self._history_peak("hwmom_cpu", 5), ".1f")
+        register("hwmom_update_ms", "overhead", "ms", "HWMom Widget Updates",
+                 "HWMom Widget Update Time",
+                 lambda: self._history_peak("hwmom_update_ms", 1), ".2f")
+        register("hwmom_paint_ms", "overhead", "ms", "HWMom Painting", "HWMom Paint Time",
+                 lambda: self._history_peak("hwmom_paint_ms", 1), ".2f")
+        for name, _, _ in self._collectors():
+            metric_id = f"hwmom_collect_ms:{name}"
+            register(metric_id, "overhead", "ms", f"HWMom {name} collector",
+                     f"HWMom Collect Time ({name})",
+                     lambda metric_id=metric_id: self._history_peak(metric_id, 1), ".2f")
+
+        # Per-core metrics, one row per logical core
+        if self.linux_reader is not None:
+            self.cpu_core_count = len(self.linux_reader.cpu_percent()[1]) or 1
+        else:
+            self.cpu_core_count = psutil.cpu_count() or 1
+        self.registry.register(MetricDescriptor(
+            id="cpu_cores",
+            collector="cpu",
+            unit="%",
+            title="CPU Cores",
+            label="CPU Core Usage",
+            history=self._create_matrix_history("cpu"),
+            max_value=lambda: self.max_cpu_usage,
+            format=value_formatter(".0f", "%"),
+            kind="matrix",
+        ))
+        if self.max_cpu_freq is not None:
+            self.registry.register(MetricDescriptor(
+                id="cpu_core_freq",
+                collector="cpu_freq",
+                unit="MHz",
+                title="CPU Core Frequency",
+                label="CPU Core Frequency",
+                history=self._create_matrix_history("cpu_freq"),
+                max_value=lambda: self.max_cpu_freq,
+                format=value_formatter(".0f", "MHz"),
+                kind="matrix",
+            ))
+
+    def _create_matrix_history(self, collector: str) -> MatrixRingBuffer:
+        """Creates a per-core history sampled at the collector's interval."""
+        interval = self.collector_intervals[collector] / 1000
+        return MatrixRingBuffer(self.cpu_core_count, int(self.history_seconds / interval))
+
+    def _history_peak(self, metric_id: str, floor: float) -> float:
+        """Returns the highest value in a metric's raw history, but at least `floor`."""
+        values = self.registry[metric_id].history.view()
+        return max(floor, max(values, default=0))
+
+    def _network_interfaces(self) -> List[str]:
+        """Returns the names of the network interfaces, without the loopback interface."""
+        if self.linux_reader is not None:
+            interfaces = self.linux_reader.net_counters()
+        else:
+            try:
+                interfaces = psutil.net_io_counters(pernic=True)
+            except (AttributeError, OSError, RuntimeError):
+                interfaces = {}
+        return [name for name in interfaces if name not in ("lo", "lo0")]
+
+    def _record(self, metric_id: str, value: float):
+        """Appends a sample to a metric's history."""
+        self.registry[metric_id].history.append(value)
+
+    def set_collector_enabled(self, collector: str, enabled: bool = True):
+        """Turns a collector (e.g. "gpu", or "rack1:gpu" on a remote host) on or off."""
+        host, _, remote_collector = collector.partition(":")
+        if remote_collector and host in self.remote_hosts:
+            self.remote_hosts[host].set_collector_enabled(remote_collector, enabled)
+            return
+        setattr(self, f"collect_{collector}_enabled", enabled)
+
+    def add_remote_host(self, name: str, host: str, port: int) -> RemoteHost:
+        """
+        Connects to a MetricsAgent. Its metrics appear as "<name>:<metric>" once connected, and
+        are kept up to date by update().
+        """
+        remote_host = RemoteHost(name, host, port, self.registry, self.history_seconds)
+        self.remote_hosts[name] = remote_host
+        remote_host.start()
+        return remote_host
+
+    def close_remote_hosts(self):
+        """Disconnects from all remote hosts."""
+        for remote_host in self.remote_hosts.values():
+            remote_host.close()
+
+    def subscribe(self, collector: str) -> CollectorSubscription:
+        """Registers a user of a collector and enables it. Release the returned subscription."""
+        self._subscribers[collector] = self._subscribers.get(collector, 0) + 1
+        self.set_collector_enabled(collector, True)
+        return CollectorSubscription(self, collector)
+
+    def unsubscribe(self, collector: str):
+        """
+        Removes a user of a collector. The last one disables it; the collector thread then
+        releases it before its next tick (see _release_collector).
+        """
+        count = max(0, self._subscribers.get(collector, 0) - 1)
+        self._subscribers[collector] = count
+        if count == 0:
+            self.set_collector_enabled(collector, False)
+
+    def _release_collector(self, name: str):
+        """Clears the histories of a collector that is no longer used and closes its resources."""
+        self._running.discard(name)
+        self._deadlines.pop(name, None)
+        for descriptor in self.registry.for_collector(name):
+            descriptor.history.clear()
+        if name == "gpu":
+            self.close_gpu_backend()
+        elif name == "disk":
+            self._disk_rates.reset()  # Don't compute a rate across the pause
+        elif name == "net":
+            self._net_rates.reset()
+        elif name == "overhead":
+            self._overhead_totals = {}
+            self._overhead_cpu = None
+        elif name == "processes":
+            self.process_scanner.reset()
+            self.top_processes = self.process_scanner.top()
+
+    def _create_history(self, collector: str) -> TieredHistory:
+        """Creates an in-memory history sampled at the collector's interval."""
+        interval = self.collector_intervals[collector] / 1000
+        return TieredHistory(int(self.history_seconds / interval), interval)
+
+    def update(self) -> List[str]:
+        """
+        Runs every enabled collector whose deadline has passed, batching collectors that are due
+        at about the same time into one wakeup. Returns the names of the collectors that ran.
+        """
+        if self.shared_metrics is not None:
+            self.shared_metrics.begin_write()
+            try:
+                return self._update()
+            finally:
+                self.shared_metrics.end_write()
+        return self._update()
+
+    def _update(self) -> List[str]:
+        now = time.monotonic()
+        collected = []
+        replayed = self.replay.collectors if self.replay is not None else ()
+        # Release here rather than in unsubscribe, so histories are only ever modified by the
+        # thread that collects them. Covers collectors only a replay provides, e.g. "synthetic".
+        for name in list(self._running):
+            if not self._collector_enabled(name):
+                self._release_collector(name)
+        for name, enabled, collect in self._collectors():
+            if not enabled:
+                continue
+            if name in replayed:
+                continue
+            deadline = self._deadlines.get(name, now)
+            if deadline - now > self.SCHEDULER_SLACK:
+                continue
+
+            start = time.perf_counter_ns()
+            collect()
+            self._collect_ns[name] = self._collect_ns.get(name, 0) + time.perf_counter_ns() - start
+            self._collect_calls[name] = self._collect_calls.get(name, 0) + 1
+            collected.append(name)
+            self._running.add(name)
+
+            # Keep a steady cadence, but skip missed periods instead of catching up after a stall
+            interval = self.collector_intervals[name] / 1000
+            next_deadline = deadline + interval
+            if next_deadline <= now:
+                next_deadline = now + interval
+            self._deadlines[name] = next_deadline
+
+        # Replayed samples that are due count as collected by the collectors they replace
+        if self.replay is not None:
+            replayed = self.replay.apply_due(self._collector_enabled)
+            self._running.update(replayed)
+            collected.extend(replayed)
+
+        # Samples received from remote hosts count as collected by their remote collectors
+        for remote_host in self.remote_hosts.values():
+            collected.extend(remote_host.apply_pending())
+        return collected
+
+    def _collector_enabled(self, collector: str) -> bool:
+        return getattr(self, f"collect_{collector}_enabled", False)
+
+    def next_update_delay(self) -> float:
+        """Returns the number of seconds until the next collector is due."""
+        now = time.monotonic()
+        delay = self.update_interval / 1000
+        if self.remote_hosts:
+            delay = self.REMOTE_POLL_INTERVAL
+        replayed = ()
+        if self.replay is not None:
+            replayed = self.replay.collectors
+            delay = min(delay, self.replay.next_delay())
+        for name, enabled, _ in self._collectors():
+            if enabled and name not in replayed:
+                delay = min(delay, self._deadlines.get(name, now) - now)
+        return max(0.0, delay)
+
+    def updated_metrics(self, collectors: Sequence[str]) -> frozenset:
+        """Returns the ids of the metrics that received new samples from the given collectors."""
+        return frozenset(
+            descriptor.id for name in collectors
+            for descriptor in self.registry.for_collector(name))
+
+    def enable_persistence(self, directory: str):
+        """
+        Keeps every metric history in a memory-mapped file in `directory`, one file per metric.
+        Files written by a previous run are mapped as they are, so their data shows up right away.
+        """
+        directory = Path(directory).expanduser()
+        for descriptor in self.registry:
+            if descriptor.kind != "value":
+                continue  # Per-core and process histories are only kept in memory
+            interval = self.collector_intervals[descriptor.collector] / 1000
+            file_name = descriptor.id.replace(":", "-")  # ":" is not allowed on Windows
+            history_file = HistoryFile(
+                directory / f"{file_name}.hist", int(self.history_seconds / interval), interval)
+            self.history_files[descriptor.id] = history_file
+            descriptor.history = history_file.open_history()
+
+    def enable_shared_memory(self, name: str = "hwmom"):
+        """
+        Publishes the metric histories in the shared memory segment `name`, where other processes
+        can read them with SharedMetricsReader. Call before any collector is enabled.
+        """
+        self.shared_metrics = SharedMetricsPublisher(self, name)
+
+    def close_shared_memory(self):
+        """Removes the shared memory segment, if there is one."""
+        if self.shared_metrics is not None:
+            self.shared_metrics.close()
+            self.shared_metrics = None
+
+    def enable_replay(self, source: MetricSource, speed: float = 1.0, loop: bool = True):
+        """
+        Replays the samples of a recording or a synthetic source (see collectors.replay) instead
+        of reading the hardware. The collectors the source provides stop reading the hardware;
+        the others keep collecting live. Call before any collector is enabled.
+        """
+        self.replay = MetricsReplay(source, self, speed, loop)
+
+    def flush_history(self):
+        """Writes persisted histories to disk. Does nothing if persistence is not enabled."""
+        for history_file in self.history_files.values():
+            history_file.flush()
+
+    def get_history_store(self, string: str) -> Optional[TieredHistory]:
+        """Returns the history store for a metric string, or None if the metric is unknown."""
+        descriptor = self.registry.get(string)
+        return descriptor.history if descriptor is not None else None
+
+    def get_metric_from_string(self, string: str) -> Sequence[float]:
+        """Returns a read-only view of a metric history based on a string."""
+        descriptor = self.registry.get(string)
+        if descriptor is None:
             return [0]
-        
-        # CPU
-        if string == "cpu":
-            return self.cpu_history
-        
-        # Memory
-        elif string in ["memory", "ram"]:
-            return self.system_memory_history
-        
-        # GPU
-        elif string == "gpu":
-            return self.gpu_history
-        elif string == "gpu_memory":
-            return self.gpu_memory_history
-        elif string == "gpu_temp":
-            return self.gpu_temp_history
-        
-        # Ping
-        elif string == "ping":
-            return self.ping_history
-        
-        # Fan speed
-        elif string == "fan_speed":
-            return self.fan_history
-        
-        return [0]
+        return descriptor.history.view()
+
+    def snapshot(self, updated: frozenset = frozenset()) -> MetricsSnapshot:
+        """
+        Returns a snapshot of the metric histories at their current cursors, keyed by metric id.
+        `updated` lists the metrics that changed since the previous snapshot, so widgets of other
+        metrics can skip redrawing.
+        """
+        stores = {descriptor.id: descriptor.history for descriptor in self.registry}
+        cursors = {
+            metric_id: store.cursors() if isinstance(store, TieredHistory) else (store.cursor(),)
+            for metric_id, store in stores.items()
+        }
+        # Peaks scan the histories, so only recompute the max values of updated metrics
+        max_values = {}
+        for descriptor in self.registry:
+            max_value = self._max_values.get(descriptor.id)
+            if max_value is None or descriptor.id in updated:
+                max_value = descriptor.max_value()
+            if max_value is not None:
+                max_values[descriptor.id] = max_value
+        self._max_values = max_values
+        return MetricsSnapshot(
+            timestamp=time.time(),
+            stores=MappingProxyType(stores),
+            cursors=MappingProxyType(cursors),
+            updated=updated,
+            processes=self.top_processes,
+            max_values=MappingProxyType(max_values)
+        )
 
     def update_max_values(self):
         """Updates the max values for each metric."""
         # System memory (in GB)
-        self.max_system_memory = psutil.virtual_memory().total / (1024**3)
-        
-        # GPU metrics
-        try:
-            # Add startupinfo to hide console window on Windows
-            startupinfo = None
-            if hasattr(subprocess, 'STARTUPINFO'):
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-
-            result = subprocess.run(
-                ['nvidia-smi', 
-                 '--query-gpu=memory.total', 
-                 '--format=csv,noheader,nounits'], 
-                capture_output=True,
-                text=True,
-                check=True,
-                startupinfo=startupinfo  # Add this parameter
-            )
-            gpu_memory_total = float(result.stdout.strip())
-            self.max_gpu_memory = gpu_memory_total / 1024  # Convert to GB
-            
-        except (subprocess.SubprocessError, ValueError, OSError):
-            # If no GPU is found or there's an error, set defaults
+        if self.linux_reader is not None:
+            self.max_system_memory = self.linux_reader.memory_total() / (1024**3)
+        else:
+            self.max_system_memory = psutil.virtual_memory().total / (1024**3)
+
+        # Core frequency (in MHz), only if it is reported for every core
+        self.max_cpu_freq = self._read_max_cpu_freq()
+
+        # GPU memory (in GB) is only known once the GPU backend has produced a sample
+        if self.gpu_backend is not None:
+            sample = self.gpu_backend.sample()
+            if sample is not None:
+                self.max_gpu_memory = sample.memory_total / 1024
+        elif self.max_gpu_memory is None:
             self.max_gpu_memory = 0
-            self.max_gpu_usage = 100
 
-    def collect_gpu_metrics(self):
-        """Get GPU temperature, memory and utilization using nvidia-smi."""
+    @staticmethod
+    def _read_max_cpu_freq() -> Optional[float]:
+        """Returns the highest core frequency, or None if per-core frequencies are unavailable."""
         try:
-            # Add startupinfo to hide console window on Windows
-            startupinfo = None
-            if hasattr(subprocess, 'STARTUPINFO'):
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-
-            result = subprocess.run(
-                ['nvidia-smi', 
-                 '--query-gpu=temperature.gpu,utilization.gpu,memory.used,memory.total', 
-                 '--format=csv,noheader,nounits'], 
-                capture_output=True,
-                text=True,
-                check=True,
-                startupinfo=startupinfo  # Add this parameter
-            )
-            temp, util, mem_used, mem_total = map(float, result.stdout.strip().split(','))
-            
-            # Update histories
-            self.gpu_temp_history.append(temp)
-            self.gpu_history.append(util)
-            self.gpu_memory_history.append(mem_used / 1024)  # Convert to GB
-            
-            # Keep only last 60 seconds worth of data
-            if len(self.gpu_temp_history) > self.history_size:
-                self.gpu_temp_history = self.gpu_temp_history[-self.history_size:]
-                self.gpu_history = self.gpu_history[-self.history_size:]
-                self.gpu_memory_history = self.gpu_memory_history[-self.history_size:]
-                
-        except (subprocess.SubprocessError, ValueError, OSError):
-            # In case of error, append None or 0
-            self.gpu_temp_history.append(0)
-            self.gpu_history.append(0)
-            self.gpu_memory_history.append(0)
+            freqs = psutil.cpu_freq(percpu=True)
+        except (AttributeError, NotImplementedError, OSError):
+            return None
+        if not freqs or len(freqs) != psutil.cpu_count():
+            return None
+        # Some platforms report a max of 0, then the current frequency is the best we have
+        return max(max(freq.max, freq.current) for freq in freqs) or None
+
+    def set_gpu_backend(self, name: str):
+        """
+        Selects the GPU backend ("auto", "nvml", "nvidia-smi" or "none") at runtime. The collector
+        thread switches to it on its next GPU collection, so the backend is never closed while
+        it is being sampled.
+        """
+        self.gpu_backend_name = name
+        self._gpu_backend_changed = True
+
+    def close_gpu_backend(self):
+        """
+        Closes the current GPU backend. It is reopened on the next GPU collection. Call on the
+        collector thread, or after it has stopped.
+        """
+        if self.gpu_backend is not None:
+            self.gpu_backend.close()
+        self.gpu_backend = None
+        self._gpu_backend_retry = 0.0
+        self._gpu_backend_changed = False
+        self._gpu_backend_sampled = False
+
+    def collect_gpu_metrics(self):
+        """Get GPU temperature, memory and utilization from the GPU backend."""
+        if self._gpu_backend_changed:
+            self.close_gpu_backend()
+        elif self.gpu_backend is not None and not self.gpu_backend.is_alive():
+            # The backend failed (e.g. nvidia-smi exited or hung). Reopen it right away if it was
+            # working, otherwise it is not usable here either: try again later.
+            sampled = self._gpu_backend_sampled
+            self.close_gpu_backend()
+            if not sampled:
+                self._gpu_backend_retry = time.monotonic() + self.GPU_REOPEN_DELAY
+        if self.gpu_backend is None and time.monotonic() >= self._gpu_backend_retry:
+            # open_gpu_backend already falls back between backends; try again later if none opens
+            self.gpu_backend = open_gpu_backend(
+                self.gpu_backend_name, self.collector_intervals["gpu"])
+            if self.gpu_backend is None:
+                self._gpu_backend_retry = time.monotonic() + self.GPU_REOPEN_DELAY
+
+        sample = self.gpu_backend.sample() if self.gpu_backend is not None else None
+        if sample is not None:
+            self._gpu_backend_sampled = True
+            self._record("gpu_temp", sample.temperature)
+            self._record("gpu", sample.utilization)
+            self._record("gpu_memory", sample.memory_used / 1024)  # Convert to GB
+            self.max_gpu_memory = sample.memory_total / 1024
+        else:
+            # In case of error, append 0
+            self._record("gpu_temp", 0)
+            self._record("gpu", 0)
+            self._record("gpu_memory", 0)
     
     def collect_memory_metrics(self):
         """Get memory usage in GB"""
-        mem = psutil.virtual_memory()
-        memory_used = mem.used / (1024**3)  # Convert to GB
+        if self.linux_reader is not None:
+            memory_used = self.linux_reader.memory_used() / (1024**3)  # Convert to GB
+        else:
+            memory_used = psutil.virtual_memory().used / (1024**3)  # Convert to GB
         
         # Update history
-        self.system_memory_history.append(memory_used)
-        
-        # Keep only last 60 seconds worth of data
-        if len(self.system_memory_history) > self.history_size:
-            self.system_memory_history = self.system_memory_history[-int(self.history_size):]
+        self._record("memory", memory_used)
     
     def collect_cpu_metrics(self):
-        """Get current CPU usage percentage (average of all cores)"""
-        # Get per-CPU utilization
-        per_cpu = psutil.cpu_percent(percpu=True)
-        
-        # Calculate average
-        avg_usage = sum(per_cpu) / len(per_cpu)
+        """Get current CPU usage percentage, per core and as the average of all cores"""
+        if self.linux_reader is not None:
+            avg_usage, per_cpu = self.linux_reader.cpu_percent()
+        else:
+            # Get per-CPU utilization
+            per_cpu = psutil.cpu_percent(percpu=True)
+
+            # Calculate average
+            avg_usage = sum(per_cpu) / len(per_cpu)
         
         # Update history
-        self.cpu_history.append(avg_usage)
-        
-        # Keep only last 60 seconds worth of data
-        if len(self.cpu_history) > self.history_size:
-            self.cpu_history = self.cpu_history[-int(self.history_size):]
+        self._record("cpu", avg_usage)
+        if len(per_cpu) == self.cpu_core_count:
+            self.registry["cpu_cores"].history.append(per_cpu)
+
+    def collect_cpu_freq_metrics(self):
+        """Get the current frequency of every core in MHz"""
+        try:
+            freqs = psutil.cpu_freq(percpu=True)
+        except (AttributeError, NotImplementedError, OSError):
+            freqs = None
+        if not freqs or len(freqs) != self.cpu_core_count:
+            return  # Keep the previous sample, e.g. while a core is offline
+
+        current = [freq.current for freq in freqs]
+        self.max_cpu_freq = max(self.max_cpu_freq or 0, max(current))
+        self.registry["cpu_core_freq"].history.append(current)
     
     def collect_ping(self):
         """Get ping time to Google DNS in milliseconds"""
@@ -191,18 +704,20 @@ class SystemMetrics:
             if response_time is not None:
                 # Convert to milliseconds and round to 1 decimal place
                 ms = round(response_time * 1000, 1)
-                self.ping_history.append(ms)
+                self._record("ping", ms)
             else:
-                self.ping_history.append(0)
+                self._record("ping", 0)
         except Exception:
-            self.ping_history.append(0)
-            
-        # Keep only last 60 seconds worth of data
-        if len(self.ping_history) > self.history_size:
-            self.ping_history = self.ping_history[-self.history_size:]
+            self._record("ping", 0)
     
     def collect_fan_metrics(self):
-        """Get fan speeds using psutil."""
+        """Get fan speeds from hwmon on Linux, or using psutil."""
+        if self.linux_reader is not None:
+            # Average RPM of the active fans
+            active = [rpm for rpm in self.linux_reader.fan_speeds() if rpm > 0]
+            self._record("fan_speed", sum(active) / max(len(active), 1))
+            return
+
         try:
             # Get all fans information
             fans = psutil.sensors_fans()
@@ -222,15 +737,116 @@ class SystemMetrics:
                 avg_rpm = total_rpm / max(fan_count, 1)
                 
                 # Update history
-                self.fan_history.append(avg_rpm)
+                self._record("fan_speed", avg_rpm)
             else:
-                self.fan_history.append(0)
+                self._record("fan_speed", 0)
                 
         except (AttributeError, IOError, OSError):
             # In case of error, append 0
-            self.fan_history.append(0)
-        
-        # Keep only last 60 seconds worth of data
-        if len(self.fan_history) > self.history_size:
-            self.fan_history = self.fan_history[-self.history_size:]
-    
\ No newline at end of file
+            self._record("fan_speed", 0)
+
+    def collect_disk_metrics(self):
+        """Get disk throughput in MB/s, IOPS and average I/O latency from the disk counters"""
+        # Keep every counter separate until the deltas are taken, since each one wraps on its own
+        if self.linux_reader is not None:
+            counters = self.linux_reader.disk_counters()
+            bytes_per_unit = self.linux_reader.SECTOR_SIZE
+        else:
+            try:
+                disks = psutil.disk_io_counters(perdisk=True) or {}
+            except (AttributeError, OSError, RuntimeError):
+                disks = {}
+            counters = {
+                name: (
+                    disk.read_count, disk.read_bytes, disk.read_time,
+                    disk.write_count, disk.write_bytes, disk.write_time
+                )
+                for name, disk in disks.items()
+            }
+            bytes_per_unit = 1
+
+        # Sum the per-second rates of all disks
+        reads = read_bytes = writes = write_bytes = io_ms = 0.0
+        for rates in self._disk_rates.update(counters).values():
+            reads += rates[0]
+            read_bytes += rates[1] * bytes_per_unit
+            io_ms += rates[2] + rates[5]
+            writes += rates[3]
+            write_bytes += rates[4] * bytes_per_unit
+
+        iops = reads + writes
+        self._record("disk_read", read_bytes / (1024**2))
+        self._record("disk_write", write_bytes / (1024**2))
+        self._record("disk_iops", iops)
+        self._record("disk_await", io_ms / iops if iops > 0 else 0)  # Milliseconds per I/O
+
+    def collect_net_metrics(self):
+        """Get the receive and transmit throughput of every network interface in MB/s"""
+        if self.linux_reader is not None:
+            counters = self.linux_reader.net_counters()
+        else:
+            try:
+                nics = psutil.net_io_counters(pernic=True)
+            except (AttributeError, OSError, RuntimeError):
+                nics = {}
+            counters = {name: (nic.bytes_recv, nic.bytes_sent) for name, nic in nics.items()}
+
+        rates = self._net_rates.update(counters)
+        for descriptor in self.registry.for_collector("net"):
+            direction, interface = descriptor.id[len("net_"):].split(":", 1)
+            interface_rates = rates.get(interface)
+            if interface_rates is None:
+                value = 0  # First sample, or the interface disappeared
+            else:
+                value = interface_rates[0 if direction == "rx" else 1] / (1024**2)
+            self._record(descriptor.id, value)
+
+    def collect_process_metrics(self):
+        """Continue the incremental process scan and publish the top processes"""
+        self.process_scanner.scan()
+        self.top_processes = self.process_scanner.top()
+        self._record("processes", self.process_scanner.process_count)
+
+    def collect_temp_metrics(self):
+        """Get the temperature of every discovered sensor in °C"""
+        readings = self.linux_reader.temperatures() if self.linux_reader is not None else {}
+        for descriptor in self.registry.for_collector("temps"):
+            self._record(descriptor.id, readings.get(descriptor.id[len("temp:"):], 0))
+
+    def record_widget_time(self, kind: str, nanoseconds: int):
+        """
+        Adds the duration of a widget update ("update") or paint event ("paint") to HWMom's
+        overhead. Called on the GUI thread.
+        """
+        if kind == "paint":
+            self.paint_ns += nanoseconds
+            self.paint_calls += 1
+        else:
+            self.update_display_ns += nanoseconds
+            self.update_display_calls += 1
+
+    def _average_ms(self, key: str, total_ns: int, calls: int) -> float:
+        """Returns the average milliseconds per call since the previous overhead tick."""
+        last_ns, last_calls = self._overhead_totals.get(key, (total_ns, calls))
+        self._overhead_totals[key] = (total_ns, calls)
+        if calls <= last_calls:
+            return 0
+        return (total_ns - last_ns) / (calls - last_calls) / 1e6
+
+    def collect_overhead_metrics(self):
+        """Get HWMom's own CPU usage and the average time spent per collector call and frame"""
+        for name, _, _ in self._collectors():
+            self._record(f"hwmom_collect_ms:{name}", self._average_ms(
+                name, self._collect_ns.get(name, 0), self._collect_calls.get(name, 0)))
+        self._record("hwmom_update_ms", self._average_ms(
+            "update", self.update_display_ns, self.update_display_calls))
+        self._record("hwmom_paint_ms", self._average_ms("paint", self.paint_ns, self.paint_calls))
+
+        # Process CPU time (all threads) per wall-clock time, in percent of one core
+        times = os.times()
+        now = (times.user + times.system, time.monotonic())
+        usage = 0
+        if self._overhead_cpu is not None and now[1] > self._overhead_cpu[1]:
+            usage = 100 * (now[0] - self._overhead_cpu[0]) / (now[1] - self._overhead_cpu[1])
+        self._overhead_cpu = now
+        self._record("hwmom_cpu", usage)
@@ -0,0 +1,216 @@
+import csv
+import json
+import signal
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import List, Sequence, TextIO, Union
+from collectors.metric_registry import MetricDescriptor, MetricRegistry
+from collectors.metrics_thread import MetricsThread
+from collectors.openmetrics import OpenMetricsExporter, parse_address
+from collectors.remote_agent import MetricsAgent
+from collectors.replay import MetricsRecorder, open_metric_source
+from collectors.shared_metrics import SharedMetricsReader
+from collectors.system_metrics import SystemMetrics
+
+def latest_value(descriptor: MetricDescriptor) -> Union[float, List[float]]:
+    """Returns the most recent sample of a metric; a list with one value per row for matrices."""
+    if descriptor.kind == "matrix":
+        return [round(value, 3) for value in descriptor.history.latest()]
+    return round(descriptor.history.latest(), 3)
+
+class SampleWriter(ABC):
+    """
+    Writes one record per sample with the latest value of every selected metric.
+
+    Args:
+        stream (TextIO): Where the records are written
+        descriptors (Sequence[MetricDescriptor]): The metrics included in every record
+    """
+    def __init__(self, stream: TextIO, descriptors: Sequence[MetricDescriptor]):
+        self.stream = stream
+        self.descriptors = descriptors
+
+    @abstractmethod
+    def write(self, timestamp: float, values: Sequence[Union[float, List[float]]]):
+        """
+        Writes a record with a value per descriptor (see latest_value) and flushes it, so
+        readers of a pipe see it right away.
+        """
+
+class JsonLinesWriter(SampleWriter):
+    """Writes a JSON object per sample, e.g. {"timestamp": 1700000000.0, "cpu": 12.5}."""
+    def write(self, timestamp: float, values: Sequence[Union[float, List[float]]]):
+        record = {"timestamp": round(timestamp, 3)}
+        for descriptor, value in zip(self.descriptors, values):
+            record[descriptor.id] = value
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+class CsvWriter(SampleWriter):
+    """Writes a CSV row per sample after a header row. Matrices get a column per row, e.g.
+    "cpu_cores[0]"."""
+    def __init__(self, stream: TextIO, descriptors: Sequence[MetricDescriptor]):
+        super().__init__(stream, descriptors)
+        self.writer = csv.writer(stream, lineterminator="\n")
+        header = ["timestamp"]
+        for descriptor in descriptors:
+            if descriptor.kind == "matrix":
+                header.extend(f"{descriptor.id}[{row}]" for row in range(descriptor.history.rows))
+            else:
+                header.append(descriptor.id)
+        self.writer.writerow(header)
+        self.stream.flush()
+
+    def write(self, timestamp: float, values: Sequence[Union[float, List[float]]]):
+        row = [round(timestamp, 3)]
+        for value in values:
+            if isinstance(value, list):
+                row.extend(value)
+            else:
+                row.append(value)
+        self.writer.writerow(row)
+        self.stream.flush()
+
+WRITERS = {"jsonl": JsonLinesWriter, "csv": CsvWriter}
+
+def list_metrics(registry: MetricRegistry, stream: TextIO):
+    """Prints the id, unit and label of every metric, one per line."""
+    for descriptor in registry:
+        unit = f" [{descriptor.unit}]" if descriptor.unit else ""
+        stream.write(f"{descriptor.id}{unit}  {descriptor.label or descriptor.title}\n")
+
+def resolve_metrics(registry: MetricRegistry, metrics: str) -> List[MetricDescriptor]:
+    """Returns the descriptors of comma-separated metric ids or aliases, without duplicates."""
+    descriptors = []
+    for string in metrics.split(","):
+        descriptor = registry.get(string.strip())
+        if descriptor is None:
+            raise KeyError(string.strip())
+        if descriptor not in descriptors:
+            descriptors.append(descriptor)
+    return descriptors
+
+def write_samples(args, descriptors: Sequence[MetricDescriptor], sample, stop: threading.Event):
+    """
+    Writes a record every `args.interval` seconds until `stop` is set, or until `args.count`
+    records were written. `sample` returns the values of a record.
+    """
+    if args.format == "none":
+        stop.wait()
+        return
+    stream = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        writer = WRITERS[args.format](stream, descriptors)
+        written = 0
+        # Wait one interval before the first sample, so rates have two readings to compare
+        while not stop.wait(args.interval):
+            writer.write(time.time(), sample())
+            written += 1
+            if args.count and written >= args.count:
+                break
+    except BrokenPipeError:
+        pass  # The reader went away, e.g. `| head`
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+
+def run_attached(args, stop: threading.Event) -> int:
+    """Writes samples from the shared memory of another HWMom process, without collecting."""
+    try:
+        reader = SharedMetricsReader(args.attach)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Cannot attach to {args.attach!r}: {e}", file=sys.stderr)
+        return 1
+    try:
+        if args.list_metrics:
+            list_metrics(reader.registry, sys.stdout)
+            return 0
+        descriptors = resolve_metrics(reader.registry, args.metrics)
+        write_samples(args, descriptors, lambda: reader.read(
+            lambda: [latest_value(descriptor) for descriptor in descriptors]), stop)
+    except KeyError as e:
+        print(f"Unknown metric: {e} (see --list-metrics)", file=sys.stderr)
+        return 2
+    finally:
+        reader.close()
+    return 0
+
+def run_headless(args) -> int:
+    """
+    Runs the collectors without a GUI and writes samples until interrupted, or until
+    `args.count` samples were written. Returns the exit status.
+
+    Args:
+        args: Parsed command line arguments (see main.parse_args)
+    """
+    stop = threading.Event()
+    # Stop cleanly when run as a service (SIGTERM) as well as on Ctrl+C
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    if args.attach:
+        try:
+            return run_attached(args, stop)
+        except KeyboardInterrupt:
+            return 0
+
+    system_metrics = SystemMetrics(gpu_backend=args.gpu_backend)
+    if args.replay:
+        try:
+            system_metrics.enable_replay(open_metric_source(args.replay), args.replay_speed)
+        except (OSError, ValueError) as e:
+            print(f"Cannot replay {args.replay!r}: {e}", file=sys.stderr)
+            return 1
+    if args.list_metrics:
+        list_metrics(system_metrics.registry, sys.stdout)
+        return 0
+
+    # Resolve the metrics and start their collectors
+    try:
+        descriptors = resolve_metrics(system_metrics.registry, args.metrics)
+    except KeyError as e:
+        print(f"Unknown metric: {e} (see --list-metrics)", file=sys.stderr)
+        return 2
+
+    # Optionally publish the histories to other local processes
+    if args.shared_memory:
+        try:
+            system_metrics.enable_shared_memory(args.shared_memory)
+        except FileExistsError:
+            print(f"Shared memory {args.shared_memory!r} is already used by another process",
+                  file=sys.stderr)
+            return 1
+    for collector in dict.fromkeys(descriptor.collector for descriptor in descriptors):
+        system_metrics.subscribe(collector)
+
+    # Optionally serve the metrics for Prometheus and remote dashboards. Both are fed with the
+    # snapshot of every collector tick.
+    servers = []
+    if args.openmetrics:
+        servers.append(OpenMetricsExporter(system_metrics, *parse_address(args.openmetrics)))
+    if args.agent:
+        servers.append(MetricsAgent(system_metrics, *parse_address(args.agent)))
+    for server in servers:
+        server.start()
+    # Optionally record the session for --replay
+    recorder = MetricsRecorder(system_metrics, args.record) if args.record else None
+    publishers = servers + [recorder] if recorder is not None else servers
+
+    def publish(snapshot):
+        for publisher in publishers:
+            publisher.publish(snapshot)
+
+    metrics_thread = MetricsThread(system_metrics, publish if publishers else None)
+    metrics_thread.start()
+    try:
+        write_samples(args, descriptors,
+                      lambda: [latest_value(descriptor) for descriptor in descriptors], stop)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        metrics_thread.stop()
+        for publisher in publishers:
+            publisher.close()
+        system_metrics.close_gpu_backend()
+        system_metrics.close_shared_memory()
+    return 0
@@ -18,6 +18,15 @@ class LayoutParser:
         self.filepath = filepath
         self.widgets: List[WidgetConfig] = []
         self.theme_str = 'light'  # Default
+        self.gpu_backend_str = 'auto'  # "auto", "nvml", "nvidia-smi" or "none"
+        self.history_dir: Optional[str] = None  # Persist histories in this directory if set
+        self.openmetrics: Optional[str] = None  # "[host:]port" to serve metrics for Prometheus
+        self.remote_hosts: List[Tuple[str, str]] = []  # (name, "host:port") of remote agents
+        self.shared_memory: Optional[str] = None  # Publish histories in this shared memory
+        self.replay: Optional[str] = None  # Recording or "synthetic[:N]" to replay
+        self.replay_speed = 1.0
+        self.record: Optional[str] = None  # Record the session to this file
+        self.graph_decimation = 'minmax'  # "minmax", "lttb" or "none", see GraphArea.decimation
         self.grid_size_cols = 6
         self.grid_size_rows = 5
         self.parse_file(filepath)
@@ -42,6 +51,25 @@ class LayoutParser:
 
             if line.startswith('theme:'):
                 self.theme_str = line.split('theme:')[1].strip()
+            elif line.startswith('gpu_backend:'):
+                self.gpu_backend_str = line.split('gpu_backend:')[1].strip()
+            elif line.startswith('history_dir:'):
+                self.history_dir = line.split('history_dir:')[1].strip()
+            elif line.startswith('openmetrics:'):
+                self.openmetrics = line.split('openmetrics:')[1].strip()
+            elif line.startswith('remote:'):
+                name, address = line.split('remote:')[1].split('=', 1)
+                self.remote_hosts.append((name.strip(), address.strip()))
+            elif line.startswith('shared_memory:'):
+                self.shared_memory = line.split('shared_memory:')[1].strip()
+            elif line.startswith('replay_speed:'):
+                self.replay_speed = float(line.split('replay_speed:')[1].strip())
+            elif line.startswith('replay:'):
+                self.replay = line.split('replay:')[1].strip()
+            elif line.startswith('record:'):
+                self.record = line.split('record:')[1].strip()
+            elif line.startswith('graph_decimation:'):
+                self.graph_decimation = line.split('graph_decimation:')[1].strip()
             elif line.startswith('size:'):
                 size_str = line.split('size:')[1].strip()
                 self.grid_size_cols, self.grid_size_rows = map(int, size_str.split('x'))
@@ -1,12 +1,63 @@
+import argparse
 import sys
-from PyQt6.QtWidgets import QApplication
-from app import MainWindow
 
-def main():
-    app = QApplication(sys.argv)
+def parse_args(argv=None):
+    """
+    Parses the HWMom command line. Arguments that HWMom does not know are returned separately
+    and passed on to Qt (e.g. -platform).
+    """
+    parser = argparse.ArgumentParser(prog="HWMom", description="Hardware monitoring dashboard")
+    parser.add_argument("--headless", action="store_true",
+                        help="collect metrics without a GUI and write samples (PyQt6 not needed)")
+    parser.add_argument("--metrics", default="cpu,memory",
+                        help="headless: comma-separated metric ids (default: cpu,memory)")
+    parser.add_argument("--format", choices=("jsonl", "csv", "none"), default="jsonl",
+                        help="headless: output format, none to only serve --openmetrics or --agent "
+                             "(default: jsonl)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="headless: output file, '-' for stdout (default)")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="headless: seconds between samples (default: 1)")
+    parser.add_argument("--count", type=int, default=0,
+                        help="headless: stop after this many samples (default: run until stopped)")
+    parser.add_argument("--list-metrics", action="store_true",
+                        help="headless: list the available metric ids and exit")
+    parser.add_argument("--openmetrics", metavar="[HOST:]PORT",
+                        help="headless: serve the metrics for Prometheus at /metrics")
+    parser.add_argument("--agent", metavar="[HOST:]PORT",
+                        help="headless: stream metrics to remote HWMom dashboards")
+    parser.add_argument("--shared-memory", metavar="NAME",
+                        help="headless: publish the histories in shared memory for other processes")
+    parser.add_argument("--attach", metavar="NAME",
+                        help="headless: read samples from another HWMom's --shared-memory instead "
+                             "of collecting them")
+    parser.add_argument("--replay", metavar="SOURCE",
+                        help="headless: replay a --record file, or 'synthetic[:N]' for generated "
+                             "samples of N extra metrics, instead of reading the hardware")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="headless: replay speed, e.g. 10 for ten times as fast (default: 1)")
+    parser.add_argument("--record", metavar="FILE",
+                        help="headless: record the collected samples for --replay")
+    parser.add_argument("--gpu-backend", choices=("auto", "nvml", "nvidia-smi", "none"),
+                        default="auto", help="headless: GPU backend (default: auto)")
+    return parser.parse_known_args(argv)
+
+def run_gui(qt_args):
+    # Qt is only imported here, so headless mode starts quickly and works without PyQt6
+    from PyQt6.QtWidgets import QApplication
+    from app import MainWindow
+
+    app = QApplication([sys.argv[0]] + qt_args)
     window = MainWindow()
     window.show()
-    sys.exit(app.exec())
+    return app.exec()
+
+def main():
+    args, qt_args = parse_args()
+    if args.headless or args.list_metrics:
+        from headless import run_headless
+        sys.exit(run_headless(args))
+    sys.exit(run_gui(qt_args))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
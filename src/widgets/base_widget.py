@@ -2,22 +2,37 @@ from PyQt6.QtWidgets import QWidget, QVBoxLayout
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QColor
 from typing import Optional
+import functools
+import time
 from theme_manager import theme
 
+def timed_paint(paint_event):
+    """
+    Decorator for the paintEvent of a widget or of a drawing area inside one. Reports the paint
+    time to the SystemMetrics of the owning BaseWidget, for the HWMom overhead metrics.
+    """
+    @functools.wraps(paint_event)
+    def wrapper(widget, event):
+        start = time.perf_counter_ns()
+        paint_event(widget, event)
+        owner = widget if isinstance(widget, BaseWidget) else widget.parent()
+        if isinstance(owner, BaseWidget):
+            owner.system_metrics.record_widget_time("paint", time.perf_counter_ns() - start)
+    return wrapper
+
 class BaseWidget(QWidget):
     """
     Base class for all widgets. Widgets should read and plot data from the global SystemMetrics 
     instance that always runs in the background. This instance contains all the metrics data, such
-    as cpu_history, ping_history, etc.
+    as the CPU, memory and ping histories.
     
-    Widgets should be created by specifying a string that determines which metric to read. For 
-    example, if the string is "gpu_memory_history", the widget will access data by calling
-    SystemMetrics.get_metric_from_string("gpu_memory_history"). That way we can use the same 
-    widget classes for different metrics.
+    Widgets should be created by specifying a string that determines which metric to read. The
+    string is resolved once to a MetricDescriptor from SystemMetrics.registry, which provides the
+    metric's collector, max value and formatting. That way we can use the same widget classes for
+    different metrics.
 
     If the widget requires plotting a relative value (such as the circle or graph widget), the 
-    widget should use the corresponding max value from SystemMetrics (e.g. max_gpu_memory for 
-    GPU memory widgets).
+    widget should use the descriptor's max value (e.g. max_gpu_memory for GPU memory widgets).
 
     Args:
         metric_str (str): The metric string identifier (e.g. "cpu_usage", "gpu_memory_history")
@@ -29,45 +44,112 @@ class BaseWidget(QWidget):
         self.metric_str = metric_str
         self.system_metrics = system_metrics
         self.color_scheme = 'A'  # Default color scheme
-        
-        # Enable the appropriate collector based on the metric string
-        if 'cpu' in metric_str:
-            self.system_metrics.collect_cpu_enabled = True
-        elif 'gpu' in metric_str:
-            self.system_metrics.collect_gpu_enabled = True
-        elif 'memory' in metric_str:
-            self.system_metrics.collect_memory_enabled = True
-        elif 'fan_speed' in metric_str:
-            self.system_metrics.collect_fan_enabled = True
-        elif 'ping' in metric_str:
-            self.system_metrics.collect_ping_enabled = True
+        self.snapshot = None  # Latest MetricsSnapshot, set by apply_snapshot
+
+        # Resolve the metric once. Unknown metrics keep the string and show a flat history until
+        # they appear (metrics of remote hosts are only known once the host is connected).
+        self.descriptor = system_metrics.registry.get(metric_str)
+        self.metric_id = self.descriptor.id if self.descriptor is not None else metric_str
+
+        # Keep the collector that samples this metric running while the widget is alive
+        self.subscription = None
+        self.subscribe()
 
         # Setup layout
         self.layout = QVBoxLayout()
         self.layout.setContentsMargins(16, 16, 16, 16)
         self.setLayout(self.layout)
 
+    def _resolve_metric(self):
+        """Looks up a metric that was unknown when the widget was created."""
+        self.descriptor = self.system_metrics.registry.get(self.metric_str)
+        if self.descriptor is not None:
+            self.metric_id = self.descriptor.id
+            if not self.isHidden():
+                self.subscribe()
+
+    def subscribe(self):
+        """Claims this widget's collector, unless the widget already holds a claim."""
+        if self.descriptor is None or self.subscription is not None:
+            return
+        self.subscription = self.system_metrics.subscribe(self.descriptor.collector)
+        # Also release when the widget is deleted without being hidden or unsubscribed first
+        self.destroyed.connect(self.subscription.release)
+
+    def unsubscribe(self):
+        """Releases this widget's collector. Called when the card is hidden or removed."""
+        if self.subscription is not None:
+            self.subscription.release()
+            self.subscription = None
+
+    def showEvent(self, event):
+        self.subscribe()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        # Spontaneous hides come from the window system (e.g. minimizing), keep collecting then
+        if not event.spontaneous():
+            self.unsubscribe()
+        super().hideEvent(event)
+
     def get_max_value(self) -> float:
-        """Returns the max value based on the metric string. Use to calculate relative values."""
-        if 'cpu' in self.metric_str:
-            return self.system_metrics.max_cpu_usage
-        elif 'gpu_memory' in self.metric_str:
-            return self.system_metrics.max_gpu_memory
-        elif 'gpu_temp' in self.metric_str:
-            return self.system_metrics.max_gpu_temp
-        elif 'gpu' in self.metric_str:
-            return self.system_metrics.max_gpu_usage
-        elif 'memory' in self.metric_str:
-            return self.system_metrics.max_system_memory
-        elif 'fan_speed' in self.metric_str:
-            return self.system_metrics.max_fan_speed
-        elif 'ping' in self.metric_str:
-            return self.system_metrics.max_ping
-        return 100.0  # Default max value
+        """
+        Returns the max value of the metric. Use to calculate relative values. Reads from the
+        latest snapshot if one has been received, since peaks are computed from the histories.
+        """
+        if self.descriptor is None:
+            return 100.0  # Default max value
+        if self.snapshot is not None and self.metric_id in self.snapshot.max_values:
+            return self.snapshot.max_values[self.metric_id]
+        return self.descriptor.max_value()
+
+    def format_value(self, value: float) -> str:
+        """Formats a value of the metric for display, including its unit."""
+        if self.descriptor is None:
+            return f"{value:.1f}"
+        return self.descriptor.format(value)
 
     def get_history(self):
-        """Gets the full history for this widget's metric."""
-        return self.system_metrics.get_metric_from_string(self.metric_str)
+        """
+        Gets the full history for this widget's metric. Reads from the latest snapshot if one has
+        been received, since the live histories are owned by the collector thread.
+        """
+        if self.snapshot is not None:
+            return self.snapshot.get_history(self.metric_id)
+        return self.system_metrics.get_metric_from_string(self.metric_id)
+
+    def fetch_history(
+            self, window_seconds: float, max_points: int, decimation: Optional[str] = None
+        ):
+        """
+        Gets about max_points values covering the last window_seconds, as a tuple of
+        (values, seconds per value, position), see TieredHistory.fetch. Long windows are served
+        from downsampled history tiers. decimation ("minmax" or "lttb") reduces finer samples to
+        max_points columns instead.
+        """
+        if self.snapshot is not None:
+            return self.snapshot.fetch(self.metric_id, window_seconds, max_points, decimation)
+        store = self.system_metrics.get_history_store(self.metric_id)
+        if store is None:
+            return [0], window_seconds, None
+        return store.fetch(window_seconds, max_points, decimation)
+
+    def apply_snapshot(self, snapshot):
+        """
+        Store a new MetricsSnapshot and refresh the display if this widget's metric received a
+        new sample. Called after every collection tick, so each widget follows its metric's own
+        sampling interval.
+        """
+        self.snapshot = snapshot
+        if self.descriptor is None:
+            self._resolve_metric()
+        if self.metric_id in snapshot.updated:
+            start = time.perf_counter_ns()
+            self.update_display()
+            self.system_metrics.record_widget_time("update", time.perf_counter_ns() - start)
+
+    def update_display(self):
+        """Refresh the widget from the current history. Implemented by subclasses."""
 
     def get_average_value(self):
         """
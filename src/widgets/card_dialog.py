@@ -3,8 +3,30 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QSpinBox
                             QRadioButton, QFormLayout, QWidget)
 
 class AddCardDialog(QDialog):
-    def __init__(self, parent=None):
+    """
+    Dialog for adding a card. The metric list is built from the metric registry, so new metrics
+    show up here without changes to the dialog. Only metrics the selected widget type can show
+    are listed: per-core metrics for the heatmap, the process table for the process list and
+    single values for the other widgets.
+
+    Args:
+        registry (MetricRegistry): Registry of the global SystemMetrics instance
+        parent (Optional[QWidget]): Parent widget
+    """
+    # Kind of metric (see MetricDescriptor.kind) shown by each widget type
+    METRIC_KINDS = {
+        "Heatmap Widget": "matrix",
+        "Process List": "table",
+    }
+
+    # Widget types that always show the same metric, so no metric is selected
+    FIXED_METRICS = {
+        "Overhead Widget": "hwmom_cpu",
+    }
+
+    def __init__(self, registry, parent=None):
         super().__init__(parent)
+        self.registry = registry
         self.setWindowTitle("Add Card")
         self._init_ui()
         
@@ -20,6 +42,9 @@ class AddCardDialog(QDialog):
             "Circle Widget",
             "Graph Widget",
             "Text Widget",
+            "Heatmap Widget",
+            "Process List",
+            "Overhead Widget",
         ])
         type_layout.addWidget(self.type_combo)
         layout.addLayout(type_layout)
@@ -31,15 +56,7 @@ class AddCardDialog(QDialog):
         self.metric_layout = QHBoxLayout()
         self.metric_layout.addWidget(QLabel("Metric:"))
         self.metric_combo = QComboBox()
-        self.metric_combo.addItems([
-            "Memory Usage",     # memory
-            "CPU Usage",        # cpu
-            "GPU Usage",        # gpu_usage
-            "GPU Temperature",  # gpu_temp
-            "GPU Memory",       # gpu_memory
-            "Fan Speed",        # fan_speed
-            "Ping"              # ping
-        ])
+        self._populate_metrics(self.type_combo.currentText())
         self.metric_layout.addWidget(self.metric_combo)
         layout.addLayout(self.metric_layout)
         
@@ -148,42 +165,41 @@ class AddCardDialog(QDialog):
         # Initial state update
         self._handle_widget_type_change(self.type_combo.currentText())
 
+    def _populate_metrics(self, widget_type: str):
+        """Fill the metric selection with the registered metrics the widget type can show."""
+        kind = self.METRIC_KINDS.get(widget_type, "value")
+        self.metric_combo.clear()
+        for descriptor in self.registry:
+            if descriptor.label and descriptor.kind == kind:
+                self.metric_combo.addItem(descriptor.label, descriptor.id)
+
     def _handle_widget_type_change(self, widget_type):
         """Show/hide metric selection based on widget type."""
         is_separator = (widget_type == "Separator")
+        has_fixed_metric = widget_type in self.FIXED_METRICS
+        self._populate_metrics(widget_type)
         
         # Iterate over widgets in metric_layout and hide them
         for i in range(self.metric_layout.count()):
             widget = self.metric_layout.itemAt(i).widget()
             if widget:
-                widget.setVisible(not is_separator)
+                widget.setVisible(not is_separator and not has_fixed_metric)
         
         # Also hide/show style and size groups
         self.size_group.setVisible(not is_separator)
         self.style_group.setVisible(not is_separator)
 
-    def _get_metric_str(self, display_name: str) -> str:
-        """Convert display name to metric string."""
-        metric_map = {
-            "CPU Usage": "cpu",
-            "Memory Usage": "memory",
-            "GPU Usage": "gpu",
-            "GPU Temperature": "gpu_temp",
-            "GPU Memory": "gpu_memory",
-            "Fan Speed": "fan_speed",
-            "Ping": "ping"
-        }
-        return metric_map.get(display_name, "")
-
     def get_values(self):
         """Get the dialog values."""
         widget_type_text = self.type_combo.currentText().split(' ')[0].lower()
+        metric_str = self.FIXED_METRICS.get(
+            self.type_combo.currentText(), self.metric_combo.currentData() or "")
         
         return {
             'size': (self.row_spin.value(), self.col_spin.value()),
             'position': (self.row_pos_spin.value() - 1, self.col_pos_spin.value() - 1),
             'widget_type': widget_type_text,
-            'metric_str': self._get_metric_str(self.metric_combo.currentText()),
+            'metric_str': metric_str,
             'color_scheme': 'B' if self.bg_b.isChecked() else 'A',
             'accent_scheme': (
                 'C' if self.accent_c.isChecked() 
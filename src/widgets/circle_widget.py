@@ -1,8 +1,8 @@
 from PyQt6.QtWidgets import QLabel, QVBoxLayout, QWidget, QSizePolicy
-from PyQt6.QtCore import Qt, QTimer, QRectF, QPointF
+from PyQt6.QtCore import Qt, QRectF, QPointF
 from PyQt6.QtGui import QFont, QColor, QPainter, QPen, QBrush
 import math
-from .base_widget import BaseWidget
+from .base_widget import BaseWidget, timed_paint
 from theme_manager import theme
 from typing import Optional
 
@@ -47,6 +47,7 @@ class CircularProgressLabel(QWidget):
         self._update_label_style()  # Update style when value changes
         self.update()  # Trigger repaint
     
+    @timed_paint
     def paintEvent(self, event):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
@@ -129,11 +130,6 @@ class CircleWidget(BaseWidget):
         self.layout.addWidget(self.header)
         self.layout.addWidget(self.circular_progress, 1)
 
-        # Setup update timer
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_display)
-        self.timer.start(system_metrics.update_interval)
-        
         # Initial update
         self.update_display()
         self._update_style()
@@ -157,19 +153,7 @@ class CircleWidget(BaseWidget):
         # Calculate relative value (0-1)
         relative = current / max_val if max_val > 0 else 0
         
-        # Format the display value based on the metric type
-        if 'memory' in self.metric_str:
-            display_text = f"{current:.1f}GB"
-        elif 'temp' in self.metric_str:
-            display_text = f"{current:.0f}°C"
-        elif any(x in self.metric_str for x in ['cpu', 'gpu']):
-            display_text = f"{current:.0f}%"
-        elif 'ping' in self.metric_str:
-            display_text = f"{current:.0f}ms"
-        else:
-            display_text = f"{current:.1f}"
-        
-        self.circular_progress.set_value(display_text, relative)
+        self.circular_progress.set_value(self.format_value(current), relative)
     
     def _get_accent_color(self):
         """Get the appropriate accent color based on scheme"""
@@ -1,98 +1,363 @@
-from PyQt6.QtWidgets import QLabel, QVBoxLayout, QWidget, QSizePolicy
-from PyQt6.QtCore import Qt, QTimer, QRectF
+from PyQt6.QtWidgets import QLabel, QHBoxLayout, QVBoxLayout, QWidget, QSizePolicy
+from PyQt6.QtCore import Qt, QPointF, QRectF, pyqtSignal
 from PyQt6.QtGui import (QPainter, QPen, QColor, QFont, 
-                        QLinearGradient, QPainterPath)
-from .base_widget import BaseWidget
+                        QLinearGradient, QPixmap, QPolygonF, QTransform)
+import math
+from array import array
+from .base_widget import BaseWidget, timed_paint
 from theme_manager import theme
-from typing import Optional, List
+from typing import List, Optional, Sequence, Tuple
 
 class GraphArea(QWidget):
-    def __init__(self, parent=None):
+    PADDING = 8
+    LABEL_WIDTH = 25 # Width reserved for labels
+    LABEL_SPACING = 4 # Space between labels and lines
+    LINE_WIDTH = 2.5
+    STROKE_MARGIN = 3 # Pixels the line and its antialiasing reach beyond a point
+    SCROLL_LIMIT = 16 # Most samples added between two frames that are scrolled in
+    POLYLINE_CHUNK = 32 # Segments drawn per polyline
+
+    def __init__(self, parent=None, decimation: Optional[str] = "minmax"):
         super().__init__(parent)
+        # How windows with more samples than pixel columns are reduced: "minmax", "lttb" or None
+        # to draw a downsampled tier's means (see TieredHistory.fetch)
+        self.decimation = decimation
         self.setSizePolicy(
             QSizePolicy.Policy.Expanding,
             QSizePolicy.Policy.Expanding
         )
         self.values = []
-        self.max_points = 60  # Keep 60 seconds of history
+        self.max_value = 100.0  # Value drawn at the top of the graph
+        self.max_points = 60  # Number of values spanning the full width
+        self.position: Optional[int] = None  # Position after the last value, see set_values
+        # Grid lines and labels, pre-rendered for the size, theme and pixel ratio in the key.
+        # Only the bands holding them are copied, as (target, source) rectangles.
+        self._background: Optional[QPixmap] = None
+        self._background_key = None
+        self._background_bands: List[Tuple[QRectF, QRectF]] = []
+        # In scroll-blit mode the curve and its fill are kept in a pixmap between frames. New
+        # samples scroll it to the left, and only the strip they reach into is drawn again.
+        self.scroll_blit = True
+        self._plot: Optional[QPixmap] = None
+        self._plot_key = None
+        # (position, number of values, last value) of the values drawn into _plot, or None
+        self._plot_drawn: Optional[Tuple[int, int, float]] = None
+        self._plot_offset = 0.0  # Logical pixels the curve in _plot lies right of its place
+        self._plot_top = 0  # First row of device pixels in _plot that was drawn on
+        # Samples dropped from the front since the last full redraw, modulo POLYLINE_CHUNK. Chunks
+        # stay aligned to the same samples, so scrolled and redrawn parts of the line match.
+        self._plot_phase = 0
+        self._buffer = QPolygonF()  # Reused by _polyline
     
-    def set_values(self, values: List[float]):
-        """Update the values to plot"""
-        self.values = values[-self.max_points:]  # Keep only last 60 values
+    def set_values(
+            self, values: Sequence[float], max_value: float = 100.0,
+            max_points: Optional[int] = None, position: Optional[int] = None
+        ):
+        """
+        Update the values to plot. Values are a read-only view of the metric history and are
+        scaled to percentages of max_value while painting, so no copy is made here. max_points
+        is the number of values that fill the whole width for the current time window.
+
+        position counts the values of the series up to the last one (see TieredHistory.fetch),
+        so the next frame knows how many were appended and can scroll the curve instead of
+        redrawing it. Without it, every frame is redrawn.
+        """
+        if max_points is not None:
+            self.max_points = max(2, max_points)
+        self.values = values[-self.max_points:]  # Keep only the values inside the window
+        self.max_value = max_value
+        self.position = position
+
+    def plot_width(self) -> int:
+        """Width in pixels available to the plotted line."""
+        return max(2, self.width() - 2 * self.PADDING - self.LABEL_WIDTH - self.LABEL_SPACING)
     
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        # Get dimensions
+    def _draw_background(self, painter: QPainter):
+        """
+        Draws the grid lines and their labels, which only change with the size, the theme and
+        the device pixel ratio. They are rendered once into a pixmap at the pixel ratio of the
+        paint device, and redrawn only when one of those changed. Only the bands around the lines
+        are copied from the pixmap, since blending the whole (mostly empty) pixmap costs more
+        than drawing the lines did.
+        """
         width = self.width()
         height = self.height()
-        padding = 8
-        label_width = 25 # Width reserved for labels
-        label_spacing = 4 # Space between labels and lines
-        
+        dpr = painter.paintEngine().paintDevice().devicePixelRatioF()
+        line_color = QColor(theme.get_color("color_font_legend"))
+        line_color.setAlpha(160)
+        key = (width, height, dpr, line_color.rgba())
+        if self._background is None or self._background_key != key:
+            self._render_background(width, height, dpr, line_color)
+            self._background_key = key
+        for target, source in self._background_bands:
+            painter.drawPixmap(target, self._background, source)
+
+    def _render_background(self, width: int, height: int, dpr: float, line_color: QColor):
+        """Renders the grid lines and labels into a pixmap and finds the bands holding them."""
+        pixmap = QPixmap(round(width * dpr), round(height * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        background = QPainter(pixmap)
+        background.setRenderHint(QPainter.RenderHint.Antialiasing)
+        padding = self.PADDING
+        label_width = self.LABEL_WIDTH
+
         # Setup font for labels
-        font = painter.font()
+        font = self.font()
         font.setPointSize(8)
         font.setBold(True)  # Make labels bold
-        painter.setFont(font)
-        
-        # Draw horizontal lines and labels
-        line_color = QColor(theme.get_color("color_font_legend"))
-        line_color.setAlpha(160)
-        
+        background.setFont(font)
+        background.setPen(QPen(line_color, 1, Qt.PenStyle.SolidLine))
+
         # Draw horizontal lines for percentages (including 0%)
+        bands = []
         for percent in [0, 25, 50, 75, 100]:
             y = int(height - (height - 2 * padding) * (percent / 100) - padding)
-            
+            # Rows of device pixels covered by the label, which is taller than the line
+            bands.append((max(0, math.floor((y - 11) * dpr)),
+                          min(pixmap.height(), math.ceil((y + 11) * dpr))))
+
             # Draw line (start after label_width + spacing)
-            painter.setPen(QPen(line_color, 1, Qt.PenStyle.SolidLine))
-            painter.drawLine(padding + label_width + label_spacing, y, width - padding, y)
-            
+            background.drawLine(padding + label_width + self.LABEL_SPACING, y, width - padding, y)
+
             # Draw label (same color as lines, no % sign)
             label_rect = QRectF(0, y - 10, label_width + padding, 20)
-            painter.drawText(label_rect, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, str(percent))
-        
-        # Calculate points (adjusted for label_width + spacing)
-        points = []
-        x_step = (width - 2 * padding - label_width - label_spacing) / (self.max_points - 1)
-        
-        for i, value in enumerate(self.values):
-            x = int(width - padding - (len(self.values) - 1 - i) * x_step)
-            y = int(height - (height - 2 * padding) * (value / 100) - padding)
-            points.append((x, y))
-        
-        if len(points) > 1:
-            # Create gradient for fill
-            gradient = QLinearGradient(0, 0, 0, height)
-            fill_color = self.parent()._get_accent_color()
-            fill_color.setAlpha(128)
-            gradient.setColorAt(0, fill_color)
-            gradient.setColorAt(1, QColor(fill_color.red(), fill_color.green(), fill_color.blue(), 0))
-            
-            # Create fill path
-            path = QPainterPath()
-            path.moveTo(points[0][0], height - padding)  # Start at bottom
-            for point in points:
-                path.lineTo(point[0], point[1])
-            path.lineTo(points[-1][0], height - padding)  # Back to bottom
-            path.closeSubpath()
-            
-            # Fill under the curve
-            painter.fillPath(path, gradient)
-            
-            # PLot graph line
-            painter.setPen(QPen(self.parent()._get_accent_color(), 2.5, Qt.PenStyle.SolidLine))
-            for i in range(len(points) - 1):
-                painter.drawLine(
-                    points[i][0], points[i][1],
-                    points[i+1][0], points[i+1][1]
-                )
+            background.drawText(label_rect, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, str(percent))
+        background.end()
+
+        # Merge overlapping bands (small graphs), so no pixel is blended twice
+        merged: List[List[int]] = []
+        for top, bottom in sorted(bands):
+            if merged and top <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], bottom)
+            else:
+                merged.append([top, bottom])
+        self._background = pixmap
+        self._background_bands = [
+            (QRectF(0, top / dpr, pixmap.width() / dpr, (bottom - top) / dpr),
+             QRectF(0, top, pixmap.width(), bottom - top))
+            for top, bottom in merged
+        ]
+
+    def _polyline(self, first: int, offset: float) -> QPolygonF:
+        """
+        Returns the points of the values from index `first` on, in logical pixels. The last value
+        is drawn at the right edge, moved right by `offset` logical pixels.
+
+        The values are copied into a reused polygon as (index, value) pairs, then scaled and moved
+        into place by a QTransform, so no Python object is created per point. Indices are only
+        written when the number of values changes.
+        """
+        count = len(self.values)
+        buffer = self._buffer
+        if buffer.size() != count:
+            buffer.resize(count)
+            self._buffer_data(buffer)[0::2] = array('d', range(count))
+        values = self.values[first:]
+        if not isinstance(values, memoryview) or values.format != 'd':
+            values = array('d', values)
+        self._buffer_data(buffer)[2 * first + 1::2] = values
+
+        height = self.height()
+        padding = self.PADDING
+        x_step = self.plot_width() / (self.max_points - 1)
+        # Scale factor from metric value to pixels above the bottom line
+        scale = (height - 2 * padding) / self.max_value if self.max_value > 0 else 0
+        transform = QTransform(
+            x_step, 0, 0, -scale,
+            self.width() - padding + offset - (count - 1) * x_step, height - padding)
+        line = transform.map(buffer.mid(first))
+
+        # Values above the max value are clamped to the top line like the labels. This takes
+        # a slower path, but is rare since the max value is usually the metric's maximum.
+        if line.boundingRect().top() < padding - 0.01:
+            self._buffer_data(buffer)[2 * first + 1::2] = array(
+                'd', (min(value, self.max_value) for value in values))
+            line = transform.map(buffer.mid(first))
+        return line
+
+    @staticmethod
+    def _buffer_data(buffer: QPolygonF) -> memoryview:
+        """The coordinates of a polygon's points as a flat, writable view of doubles."""
+        data = buffer.data()
+        data.setsize(16 * buffer.size())
+        return memoryview(data).cast('B').cast('d')
+
+    def _draw_curve(
+            self, painter: QPainter, line: QPolygonF, accent: QColor, chunk_start: int = 0
+        ):
+        """
+        Fills the area under the line with a gradient and draws the line. chunk_start is the
+        index of the first point that starts a polyline chunk, see below.
+        """
+        height = self.height()
+        bottom = height - self.PADDING
+
+        # Create gradient for fill
+        gradient = QLinearGradient(0, 0, 0, height)
+        fill_color = QColor(accent)
+        fill_color.setAlpha(128)
+        gradient.setColorAt(0, fill_color)
+        gradient.setColorAt(1, QColor(fill_color.red(), fill_color.green(), fill_color.blue(), 0))
+
+        # Fill under the curve, closing the line along the bottom
+        area = QPolygonF(line)
+        area.append(QPointF(line.last().x(), bottom))
+        area.append(QPointF(line.first().x(), bottom))
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(gradient)
+        painter.drawPolygon(area)
+
+        # PLot graph line. Qt strokes one long polyline as a single outline, which gets slower
+        # than linear with its length, so the line is drawn as a polyline per chunk of points.
+        painter.setPen(QPen(accent, self.LINE_WIDTH, Qt.PenStyle.SolidLine))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        start, end = 0, chunk_start or self.POLYLINE_CHUNK
+        while start < line.size() - 1:
+            end = min(end, line.size() - 1)
+            painter.drawPolyline(line.mid(start, end - start + 1))
+            start, end = end, end + self.POLYLINE_CHUNK
+
+    def _appended(self) -> Optional[int]:
+        """
+        Returns how many values were appended since the curve was drawn, dropping as many from
+        the front once the window is full. None if the values changed in any other way, e.g.
+        after the window was switched or the history was cleared. The positions tell how far the
+        series moved; the last drawn value must then be found that far from the end.
+        """
+        if self._plot_drawn is None or self.position is None:
+            return None
+        position, count, last = self._plot_drawn
+        appended = self.position - position
+        if not 0 <= appended <= self.SCROLL_LIMIT:
+            return None
+        kept = len(self.values) - appended
+        if kept < 2 or kept > count or self.values[kept - 1] != last:
+            return None
+        return appended
+
+    def _draw_plot(self, painter: QPainter):
+        """
+        Draws the curve from the pixmap kept between frames. When only a few samples were
+        appended since the last frame, the pixmap is scrolled by their width and just the new
+        end of the curve is drawn. Everything is redrawn after a change of size, pixel ratio,
+        scale or accent color, or of the values already drawn.
+        """
+        dpr = painter.paintEngine().paintDevice().devicePixelRatioF()
+        accent = self.parent()._get_accent_color()
+        key = (self.width(), self.height(), dpr, accent.rgba(), self.max_value, self.max_points)
+        appended = self._appended() if self._plot_key == key else None
+        x_step = self.plot_width() / (self.max_points - 1)
+        if appended is None or appended * x_step > self.plot_width() / 2:
+            self._render_plot(dpr, accent)
+            self._plot_key = key
+        elif appended:
+            dropped = appended - (len(self.values) - self._plot_drawn[1])
+            self._plot_phase = (self._plot_phase + dropped) % self.POLYLINE_CHUNK
+            self._scroll_plot(appended, dpr, accent)
+        self._plot_drawn = None if self.position is None else (
+            self.position, len(self.values), self.values[-1])
+
+        # Samples that left the window were scrolled beyond the first point and are cut off
+        first_x = self.width() - self.PADDING - (len(self.values) - 1) * x_step
+        left = max(0, math.floor((first_x + self._plot_offset) * dpr))
+        pixmap = self._plot
+        top = self._plot_top
+        painter.drawPixmap(
+            QRectF(left / dpr, top / dpr, (pixmap.width() - left) / dpr,
+                   (pixmap.height() - top) / dpr),
+            pixmap, QRectF(left, top, pixmap.width() - left, pixmap.height() - top))
+
+    def _render_plot(self, dpr: float, accent: QColor):
+        """Draws the whole curve into a new pixmap at the pixel ratio of the paint device."""
+        pixmap = QPixmap(round(self.width() * dpr), round(self.height() * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        self._plot = pixmap
+        self._plot_offset = 0.0
+        self._plot_phase = 0
+        line = self._polyline(0, 0.0)
+        self._plot_top = self._top_row(line, dpr)
+        plot = QPainter(pixmap)
+        plot.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self._draw_curve(plot, line, accent)
+        plot.end()
+
+    def _scroll_plot(self, appended: int, dpr: float, accent: QColor):
+        """
+        Scrolls the curve left by the width of the appended samples and draws its new end. The
+        pixmap only scrolls by whole device pixels; the remainder is kept in _plot_offset and new
+        points are drawn that much to the right, so they line up with the scrolled ones.
+        """
+        pixmap = self._plot
+        x_step = self.plot_width() / (self.max_points - 1)
+        shift = round((self._plot_offset + appended * x_step) * dpr)
+        self._plot_offset += appended * x_step - shift / dpr
+        # Rows above the highest point drawn so far are empty and need no scrolling
+        pixmap.scroll(-shift, 0, 0, self._plot_top, pixmap.width(),
+                      pixmap.height() - self._plot_top)
+
+        # Redraw the columns scrolled in and the end of the previous curve, whose line cap and
+        # fill edge now continue into the new segments
+        previous_x = self.width() - self.PADDING - appended * x_step + self._plot_offset
+        left = max(0, min(math.floor((previous_x - self.STROKE_MARGIN) * dpr),
+                          pixmap.width() - shift))
+        strip = QRectF(left / dpr, 0, (pixmap.width() - left) / dpr, pixmap.height() / dpr)
+        # Start at a point far enough left of the strip that its line does not reach into it
+        reach = previous_x + appended * x_step - left / dpr + self.STROKE_MARGIN
+        first = max(0, len(self.values) - 1 - math.ceil(reach / x_step))
+
+        plot = QPainter(pixmap)
+        plot.setRenderHint(QPainter.RenderHint.Antialiasing)
+        plot.setCompositionMode(QPainter.CompositionMode.CompositionMode_Clear)
+        plot.fillRect(strip, Qt.GlobalColor.transparent)
+        plot.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
+        plot.setClipRect(strip)
+        line = self._polyline(first, self._plot_offset)
+        self._plot_top = min(self._plot_top, self._top_row(line, dpr))
+        self._draw_curve(plot, line, accent, -(first + self._plot_phase) % self.POLYLINE_CHUNK)
+        plot.end()
+
+    def _top_row(self, line: QPolygonF, dpr: float) -> int:
+        """First row of device pixels that the line reaches."""
+        return max(0, math.floor((line.boundingRect().top() - self.STROKE_MARGIN) * dpr))
+
+    @timed_paint
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        # Grid lines and labels
+        self._draw_background(painter)
+
+        if len(self.values) < 2:
+            self._plot_drawn = None
+        elif self.scroll_blit:
+            self._draw_plot(painter)
+        else:
+            self._draw_curve(painter, self._polyline(0, 0.0), self.parent()._get_accent_color())
+
+class WindowLabel(QLabel):
+    """Small label showing the graph's time window. Clicking it switches to the next window."""
+    clicked = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.setAlignment(Qt.AlignmentFlag.AlignRight)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.clicked.emit()
+            event.accept()
+            return
+        super().mousePressEvent(event)
 
 class GraphWidget(BaseWidget):
     """
     A widget that displays a metric's history as a line graph with gradient fill.
-    Shows the last 60 seconds of data with percentage-based Y-axis labels.
+    Shows the last 60 seconds of data with percentage-based Y-axis labels. Clicking the window
+    label in the header switches between 60 second, 6 minute, 1 hour and 24 hour windows.
     
     Args:
         metric_str (str): The metric history to display (e.g. "cpu_history", "memory_history")
@@ -100,10 +365,13 @@ class GraphWidget(BaseWidget):
         title (str): The title shown above the graph
         parent (Optional[QWidget]): Parent widget
         accent_scheme (str): Color scheme to use ('A', 'B', or 'C')
+        decimation (Optional[str]): "minmax", "lttb" or None, see GraphArea
     """
+    WINDOWS = (60, 360, 3600, 86400)  # Selectable time windows in seconds
+
     def __init__(
             self, metric_str: str, system_metrics, title: str, parent: Optional[QWidget] = None,
-            accent_scheme: str = 'A'
+            accent_scheme: str = 'A', decimation: Optional[str] = "minmax"
         ):
         super().__init__(metric_str, system_metrics, parent)
         
@@ -122,19 +390,25 @@ class GraphWidget(BaseWidget):
         header_font = self.header.font()
         header_font.setStyleStrategy(QFont.StyleStrategy.PreferAntialias)
         self.header.setFont(header_font)
+
+        # Create window label (right side of the header)
+        self.window_seconds = self.WINDOWS[0]
+        self.window_label = WindowLabel()
+        self.window_label.setFont(header_font)
+        self.window_label.setText(self._format_window(self.window_seconds))
+        self.window_label.clicked.connect(self._next_window)
         
         # Create graph area
-        self.graph_area = GraphArea(self)
+        self.graph_area = GraphArea(self, decimation)
         
         # Add widgets to layout
-        self.layout.addWidget(self.header)
+        header_layout = QHBoxLayout()
+        header_layout.setContentsMargins(0, 0, 0, 0)
+        header_layout.addWidget(self.header, 1)
+        header_layout.addWidget(self.window_label)
+        self.layout.addLayout(header_layout)
         self.layout.addWidget(self.graph_area, 1)
 
-        # Setup update timer with 1 second interval
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_display)
-        self.timer.start(1000) # Update every 1000ms (1 second)
-        
         # Initial update
         self.update_display()
         self._update_style()
@@ -148,20 +422,40 @@ class GraphWidget(BaseWidget):
                 font-weight: 400;
             }}
         """)
+        self.window_label.setStyleSheet(f"""
+            QLabel {{
+                color: {theme.get_color("color_font_legend").name()};
+                font-size: {theme.get_font_size_secondary()}px;
+                font-weight: 400;
+            }}
+        """)
         self.graph_area.update()
 
+    @staticmethod
+    def _format_window(seconds: int) -> str:
+        """Format a window length as a short label, e.g. 60s, 6m or 24h."""
+        if seconds >= 3600:
+            return f"{seconds // 3600}h"
+        if seconds >= 120:
+            return f"{seconds // 60}m"
+        return f"{seconds}s"
+
+    def _next_window(self):
+        """Switch to the next time window and redraw immediately."""
+        index = (self.WINDOWS.index(self.window_seconds) + 1) % len(self.WINDOWS)
+        self.window_seconds = self.WINDOWS[index]
+        self.window_label.setText(self._format_window(self.window_seconds))
+        self.update_display()
+
     def update_display(self):
         """Update the graph with latest history values."""
-        history = self.get_history()
-        max_val = self.get_max_value()
-        
-        # Convert values to percentages relative to max value
-        if max_val > 0:
-            percentage_values = [min(100, (val / max_val) * 100) for val in history]
-        else:
-            percentage_values = [0] * len(history)
-            
-        self.graph_area.set_values(percentage_values)
+        # Fetch about one value per pixel, decimated from the finest history covering the window
+        values, seconds_per_value, position = self.fetch_history(
+            self.window_seconds, self.graph_area.plot_width(), self.graph_area.decimation)
+        points_in_window = round(self.window_seconds / seconds_per_value)
+
+        # Values are scaled to percentages of the max value by the graph area when painting
+        self.graph_area.set_values(values, self.get_max_value(), points_in_window, position)
         self.graph_area.update() # Force repaint
     
     def _get_accent_color(self):
@@ -0,0 +1,180 @@
+from PyQt6.QtWidgets import QLabel, QWidget, QSizePolicy
+from PyQt6.QtCore import Qt, QRectF
+from PyQt6.QtGui import QColor, QFont, QImage, QPainter
+from .base_widget import BaseWidget, timed_paint
+from theme_manager import theme
+from typing import Optional, Sequence
+
+class HeatmapArea(QWidget):
+    """
+    Draws rows (e.g. CPU cores) over time as a heatmap. The image has one pixel per row and sample
+    and is used as a ring of columns: a new sample overwrites the oldest column, and painting draws
+    the two halves of the ring in order. Adding a sample therefore touches one column of pixels,
+    no matter how many samples are shown, and the image is scaled to the widget when painted.
+    """
+    PADDING = 8
+    COLUMNS = 240  # Samples shown across the full width (60 seconds at the CPU sampling rate)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSizePolicy(
+            QSizePolicy.Policy.Expanding,
+            QSizePolicy.Policy.Expanding
+        )
+        self.image: Optional[QImage] = None
+        self.rows = 0
+        self.next_column = 0  # Column the next sample is written to, i.e. the oldest column
+        self.color_table = []
+
+    def reset(self, rows: int):
+        """Clears the heatmap and sizes it for `rows` values per sample."""
+        self.rows = rows
+        self.next_column = 0
+        self.image = QImage(self.COLUMNS, max(1, rows), QImage.Format.Format_Indexed8)
+        self.image.setColorTable(self.color_table)
+        self.image.fill(0)
+        self.update()
+
+    def set_colors(self, low: QColor, high: QColor):
+        """Sets the colors of the lowest and highest value. Does not touch the pixel data."""
+        self.color_table = [
+            QColor(
+                round(low.red() + (high.red() - low.red()) * i / 255),
+                round(low.green() + (high.green() - low.green()) * i / 255),
+                round(low.blue() + (high.blue() - low.blue()) * i / 255),
+            ).rgb()
+            for i in range(256)
+        ]
+        if self.image is not None:
+            self.image.setColorTable(self.color_table)
+            self.update()
+
+    def add_column(self, values: Sequence[float], max_value: float, repaint: bool = True):
+        """Writes one sample into the oldest column of the ring."""
+        if self.image is None or len(values) != self.rows:
+            return
+        scale = 255 / max_value if max_value else 0
+        x = self.next_column
+        for y, value in enumerate(values):
+            self.image.setPixel(x, y, min(255, max(0, int(value * scale))))
+        self.next_column = (x + 1) % self.COLUMNS
+        if repaint:
+            self.update()
+
+    @timed_paint
+    def paintEvent(self, event):
+        if self.image is None:
+            return
+        painter = QPainter(self)  # No smooth transform, so every value stays a sharp cell
+
+        target = QRectF(self.rect()).adjusted(
+            self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+        if target.width() <= 0 or target.height() <= 0:
+            return
+
+        # Oldest columns (from next_column to the end of the image) on the left, newest on the right
+        split = self.next_column
+        left_width = target.width() * (self.COLUMNS - split) / self.COLUMNS
+        painter.drawImage(
+            QRectF(target.x(), target.y(), left_width, target.height()),
+            self.image,
+            QRectF(split, 0, self.COLUMNS - split, self.rows)
+        )
+        if split > 0:
+            painter.drawImage(
+                QRectF(target.x() + left_width, target.y(),
+                       target.width() - left_width, target.height()),
+                self.image,
+                QRectF(0, 0, split, self.rows)
+            )
+
+class HeatmapWidget(BaseWidget):
+    """
+    A widget that shows a per-core metric (e.g. "cpu_cores") as a heatmap with one row per core
+    and one column per sample, newest on the right. Unlike the CPU average, a single busy core
+    stands out as a bright row.
+
+    Args:
+        metric_str (str): The per-core metric to display (e.g. "cpu_cores", "cpu_core_freq")
+        system_metrics: The global SystemMetrics instance
+        title (str): The title shown above the heatmap
+        parent (Optional[QWidget]): Parent widget
+        accent_scheme (str): Color scheme to use ('A', 'B', or 'C')
+    """
+    def __init__(
+            self, metric_str: str, system_metrics, title: str, parent: Optional[QWidget] = None,
+            accent_scheme: str = 'A'
+        ):
+        super().__init__(metric_str, system_metrics, parent)
+        self.samples_shown = 0  # Samples of the history already drawn into the heatmap
+        self.appended_shown = 0  # Samples appended to the history when it was last drawn
+
+        # Create header label
+        self.header = QLabel(title)
+        self.header.setAlignment(Qt.AlignmentFlag.AlignLeft)
+
+        # Set anti-aliased font for header
+        header_font = self.header.font()
+        header_font.setStyleStrategy(QFont.StyleStrategy.PreferAntialias)
+        self.header.setFont(header_font)
+
+        # Create heatmap area
+        self.heatmap_area = HeatmapArea(self)
+
+        # Add widgets to layout
+        self.layout.addWidget(self.header)
+        self.layout.addWidget(self.heatmap_area, 1)
+
+        # Initial update
+        self._update_style()
+        self.update_display()
+
+    def _update_style(self):
+        """Update the style of the widget when the theme changes."""
+        self.header.setStyleSheet(f"""
+            QLabel {{
+                color: {theme.get_color("color_font_secondary").name()};
+                font-size: {theme.get_font_size_secondary()}px;
+                font-weight: 400;
+            }}
+        """)
+        self.heatmap_area.set_colors(theme.get_color("color_widget"), self.get_chart_color())
+
+    def set_color_scheme(self, scheme: str):
+        super().set_color_scheme(scheme)
+        self._update_style()
+
+    def _rows(self) -> int:
+        """Number of values per sample, or 0 if the metric is not a per-core metric."""
+        if self.descriptor is None or self.descriptor.kind != "matrix":
+            return 0
+        return self.descriptor.history.rows
+
+    def update_display(self):
+        """Draw the samples added since the last update, one column each."""
+        rows = self._rows()
+        if rows == 0:
+            return
+        values = self.get_history()
+        samples = len(values) // rows
+        max_value = self.get_max_value()
+        # Count the samples appended rather than those stored, which stops growing once the
+        # history is full. An update can also come without a new sample, e.g. when the number of
+        # cores changed.
+        if self.snapshot is not None:
+            appended = self.snapshot.appended(self.metric_id)
+        else:
+            appended = self.descriptor.history.appended
+        new_samples = appended - self.appended_shown
+
+        if rows != self.heatmap_area.rows or samples < self.samples_shown or new_samples < 0:
+            # First update, or the history was cleared or replaced: start over from the stored
+            # samples
+            self.heatmap_area.reset(rows)
+            new_samples = samples
+        new_samples = min(new_samples, samples, HeatmapArea.COLUMNS)
+        for i in range(samples - new_samples, samples):
+            self.heatmap_area.add_column(values[i * rows:(i + 1) * rows], max_value, repaint=False)
+        self.samples_shown = samples
+        self.appended_shown = appended
+        self.heatmap_area.update()
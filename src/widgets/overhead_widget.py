@@ -0,0 +1,105 @@
+from PyQt6.QtWidgets import QLabel, QGridLayout, QWidget
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QFont
+from .base_widget import BaseWidget
+from theme_manager import theme
+from typing import Optional
+
+class OverheadWidget(BaseWidget):
+    """
+    A widget that shows what HWMom itself costs: its CPU usage, the average time of a widget
+    update and of a paint event, and the average time of one call of every running collector.
+    Each value is also a metric of its own (e.g. "hwmom_collect_ms:gpu") that can be graphed.
+
+    Args:
+        metric_str (str): Any overhead metric; the card always shows all of them ("hwmom_cpu")
+        system_metrics: The global SystemMetrics instance
+        title (str): The title shown above the values
+        parent (Optional[QWidget]): Parent widget
+        accent_scheme (str): Color scheme to use ('A', 'B', or 'C')
+    """
+    COLLECTOR_PREFIX = "hwmom_collect_ms:"
+
+    def __init__(
+            self, metric_str: str, system_metrics, title: str, parent: Optional[QWidget] = None,
+            accent_scheme: str = 'A'
+        ):
+        super().__init__(metric_str, system_metrics, parent)
+
+        # Create header label
+        self.header = QLabel(title)
+        self.header.setAlignment(Qt.AlignmentFlag.AlignLeft)
+
+        # Set anti-aliased font for header
+        header_font = self.header.font()
+        header_font.setStyleStrategy(QFont.StyleStrategy.PreferAntialias)
+        self.header.setFont(header_font)
+
+        # Create a name and a value label for every overhead metric
+        self.rows = []  # (descriptor, name label, value label)
+        grid = QGridLayout()
+        grid.setContentsMargins(0, 0, 0, 0)
+        grid.setHorizontalSpacing(8)
+        grid.setVerticalSpacing(2)
+        grid.setColumnStretch(0, 1)
+        for row, descriptor in enumerate(system_metrics.registry.for_collector("overhead")):
+            if descriptor.id.startswith(self.COLLECTOR_PREFIX):
+                name = descriptor.id[len(self.COLLECTOR_PREFIX):]  # Collector name, e.g. "gpu"
+            else:
+                name = descriptor.label.replace("HWMom ", "")
+            name_label = QLabel(name)
+            value_label = QLabel()
+            grid.addWidget(name_label, row, 0, Qt.AlignmentFlag.AlignLeft)
+            grid.addWidget(value_label, row, 1, Qt.AlignmentFlag.AlignRight)
+            self.rows.append((descriptor, name_label, value_label))
+
+        # Add widgets to layout
+        self.layout.addWidget(self.header)
+        self.layout.addLayout(grid)
+        self.layout.addStretch(1)
+
+        # Initial update
+        self.update_display()
+        self._update_style()
+
+    def _update_style(self):
+        """Update the style of the widget when the theme changes."""
+        self.header.setStyleSheet(f"""
+            QLabel {{
+                color: {theme.get_color("color_font_secondary").name()};
+                font-size: {theme.get_font_size_secondary()}px;
+                font-weight: 400;
+            }}
+        """)
+        for _, name_label, value_label in self.rows:
+            for label, color in ((name_label, "color_font_secondary"),
+                                 (value_label, "color_font_primary")):
+                label.setStyleSheet(f"""
+                    QLabel {{
+                        color: {theme.get_color(color).name()};
+                        font-size: {theme.get_font_size_secondary()}px;
+                    }}
+                """)
+
+    def _is_shown(self, metric_id: str) -> bool:
+        """Collector times are only shown while their collector is running."""
+        if not metric_id.startswith(self.COLLECTOR_PREFIX):
+            return True
+        collector = metric_id[len(self.COLLECTOR_PREFIX):]
+        return getattr(self.system_metrics, f"collect_{collector}_enabled", False)
+
+    def update_display(self):
+        """Show the latest value of every overhead metric."""
+        for descriptor, name_label, value_label in self.rows:
+            shown = self._is_shown(descriptor.id)
+            name_label.setVisible(shown)
+            value_label.setVisible(shown)
+            if not shown:
+                continue
+            if self.snapshot is not None:
+                history = self.snapshot.get_history(descriptor.id)
+            else:
+                history = self.system_metrics.get_metric_from_string(descriptor.id)
+            text = descriptor.format(history[-1] if len(history) else 0)
+            if value_label.text() != text:  # Avoid relayouts for unchanged values
+                value_label.setText(text)
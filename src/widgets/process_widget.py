@@ -0,0 +1,142 @@
+from PyQt6.QtWidgets import QLabel, QHBoxLayout, QGridLayout, QWidget
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QFont
+from .base_widget import BaseWidget
+from .graph_widget import WindowLabel
+from theme_manager import theme
+from typing import Optional
+
+def format_bytes(value: float) -> str:
+    """Format a number of bytes with a binary unit, e.g. 512M or 1.2G."""
+    for unit in ("B", "K", "M", "G"):
+        if value < 1024:
+            if unit in ("B", "K") or value >= 10:
+                return f"{value:.0f}{unit}"
+            return f"{value:.1f}{unit}"
+        value /= 1024
+    return f"{value:.1f}T"
+
+class ProcessListWidget(BaseWidget):
+    """
+    A widget that lists the processes using the most CPU, memory (RSS) or disk I/O. Clicking the
+    sort label in the header switches between the three orders. The rows are created once and
+    only their text changes on updates.
+
+    Args:
+        metric_str (str): The process metric ("processes")
+        system_metrics: The global SystemMetrics instance
+        title (str): The title shown above the list
+        parent (Optional[QWidget]): Parent widget
+        accent_scheme (str): Color scheme to use ('A', 'B', or 'C')
+    """
+    SORT_KEYS = ("cpu", "rss", "io")
+    SORT_LABELS = {"cpu": "CPU", "rss": "RSS", "io": "I/O"}
+    ROWS = 8  # Number of processes shown
+
+    def __init__(
+            self, metric_str: str, system_metrics, title: str, parent: Optional[QWidget] = None,
+            accent_scheme: str = 'A'
+        ):
+        super().__init__(metric_str, system_metrics, parent)
+        self.sort_key = self.SORT_KEYS[0]
+
+        # Create header label
+        self.header = QLabel(title)
+        self.header.setAlignment(Qt.AlignmentFlag.AlignLeft)
+
+        # Set anti-aliased font for header
+        header_font = self.header.font()
+        header_font.setStyleStrategy(QFont.StyleStrategy.PreferAntialias)
+        self.header.setFont(header_font)
+
+        # Create sort label (right side of the header)
+        self.sort_label = WindowLabel()
+        self.sort_label.setFont(header_font)
+        self.sort_label.setText(self.SORT_LABELS[self.sort_key])
+        self.sort_label.clicked.connect(self._next_sort_key)
+
+        # Create one row of labels per process: name, CPU, RSS and I/O
+        self.rows = []
+        grid = QGridLayout()
+        grid.setContentsMargins(0, 0, 0, 0)
+        grid.setHorizontalSpacing(8)
+        grid.setVerticalSpacing(2)
+        grid.setColumnStretch(0, 1)
+        for row in range(self.ROWS):
+            labels = [QLabel() for _ in range(4)]
+            labels[0].setTextFormat(Qt.TextFormat.PlainText)
+            for column, label in enumerate(labels):
+                if column == 0:
+                    grid.addWidget(label, row, column, Qt.AlignmentFlag.AlignLeft)
+                else:
+                    grid.addWidget(label, row, column, Qt.AlignmentFlag.AlignRight)
+            self.rows.append(labels)
+
+        # Add widgets to layout
+        header_layout = QHBoxLayout()
+        header_layout.setContentsMargins(0, 0, 0, 0)
+        header_layout.addWidget(self.header, 1)
+        header_layout.addWidget(self.sort_label)
+        self.layout.addLayout(header_layout)
+        self.layout.addLayout(grid)
+        self.layout.addStretch(1)
+
+        # Initial update
+        self.update_display()
+        self._update_style()
+
+    def _update_style(self):
+        """Update the style of the widget when the theme changes."""
+        self.header.setStyleSheet(f"""
+            QLabel {{
+                color: {theme.get_color("color_font_secondary").name()};
+                font-size: {theme.get_font_size_secondary()}px;
+                font-weight: 400;
+            }}
+        """)
+        self.sort_label.setStyleSheet(f"""
+            QLabel {{
+                color: {theme.get_color("color_font_legend").name()};
+                font-size: {theme.get_font_size_secondary()}px;
+                font-weight: 400;
+            }}
+        """)
+        for labels in self.rows:
+            for column, label in enumerate(labels):
+                color = "color_font_primary" if column == 0 else "color_font_secondary"
+                label.setStyleSheet(f"""
+                    QLabel {{
+                        color: {theme.get_color(color).name()};
+                        font-size: {theme.get_font_size_secondary()}px;
+                    }}
+                """)
+
+    def _next_sort_key(self):
+        """Switch to the next sort order and redraw immediately."""
+        index = (self.SORT_KEYS.index(self.sort_key) + 1) % len(self.SORT_KEYS)
+        self.sort_key = self.SORT_KEYS[index]
+        self.sort_label.setText(self.SORT_LABELS[self.sort_key])
+        self.update_display()
+
+    def update_display(self):
+        """Show the top processes for the current sort order."""
+        if self.snapshot is not None:
+            top = self.snapshot.processes
+        else:
+            top = self.system_metrics.top_processes
+        processes = top.get(self.sort_key, ())
+
+        for row, labels in enumerate(self.rows):
+            if row < len(processes):
+                process = processes[row]
+                texts = (
+                    process.name,
+                    f"{process.cpu_percent:.0f}%",
+                    format_bytes(process.rss),
+                    f"{format_bytes(process.io_rate)}/s",
+                )
+            else:
+                texts = ("", "", "", "")
+            for label, text in zip(labels, texts):
+                if label.text() != text:  # Avoid relayouts for unchanged cells
+                    label.setText(text)
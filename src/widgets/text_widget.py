@@ -1,5 +1,5 @@
 from PyQt6.QtWidgets import QLabel, QVBoxLayout, QWidget
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont
 from .base_widget import BaseWidget
 from theme_manager import theme
@@ -76,11 +76,6 @@ class TextWidget(BaseWidget):
         self.layout.addWidget(self.header)
         self.layout.addWidget(self.value_label, 1)
 
-        # Setup update timer
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_display)
-        self.timer.start(system_metrics.update_interval)
-        
         # Initial update
         self.update_display()
         self._update_style()
@@ -100,16 +95,4 @@ class TextWidget(BaseWidget):
         """Update the displayed text value by averaging the 4 most recent values."""
         current = self.get_average_value()
 
-        # Format the display value based on the metric type.
-        if 'memory' in self.metric_str:
-            display_text = f"{current:.1f}GB"
-        elif 'temp' in self.metric_str:  # Check for temp before the general gpu check
-            display_text = f"{current:.0f}°C"
-        elif any(x in self.metric_str for x in ['cpu', 'gpu']):
-            display_text = f"{current:.0f}%"
-        elif 'ping' in self.metric_str:
-            display_text = f"{current:.0f}ms"
-        else:
-            display_text = f"{current:.1f}"
-            
-        self.value_label.set_value(display_text) 
\ No newline at end of file
+        self.value_label.set_value(self.format_value(current)) 
\ No newline at end of file
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Import the application modules as src/main.py does
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
@@ -0,0 +1,209 @@
+import contextlib
+import itertools
+import os
+import sys
+from collections import namedtuple
+from typing import Dict, Iterator, List
+
+# Make the application modules importable as they are when running src/main.py
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+import collectors.gpu_backends as gpu_backends
+import collectors.processes as processes
+import collectors.system_metrics as system_metrics
+from collectors.gpu_backends import NvidiaSmiStreamBackend
+from collectors.processes import ProcessScanner
+from collectors.system_metrics import SystemMetrics
+
+def _write(path: str, text: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+def build_fake_procfs(
+        root: str, cores: int = 8, disks: int = 2, nics: int = 3, fans: int = 3,
+        temperatures: int = 6, process_count: int = 300
+    ):
+    """
+    Writes a /proc and /sys tree with the files LinuxProcReader and ProcessScanner read, sized
+    like a typical desktop. Pass `root` as procfs_root to SystemMetrics.
+    """
+    cpu_line = "{} 2000 10 1000 90000 300 0 50 0 0 0\n"
+    _write(os.path.join(root, "proc", "stat"),
+           cpu_line.format("cpu ") + "".join(cpu_line.format(f"cpu{i}") for i in range(cores))
+           + "intr 123456 0 0 0\nctxt 987654\nbtime 1700000000\nprocesses 4242\n")
+    _write(os.path.join(root, "proc", "meminfo"),
+           "MemTotal:       32000000 kB\nMemFree:         2000000 kB\n"
+           "MemAvailable:   16000000 kB\nBuffers:          500000 kB\n"
+           "Cached:          8000000 kB\nSwapCached:            0 kB\n"
+           + "".join(f"Field{i}:          {i} kB\n" for i in range(40)))
+
+    diskstats = []
+    for i in range(disks):
+        name = f"nvme{i}n1"
+        os.makedirs(os.path.join(root, "sys", "block", name), exist_ok=True)
+        diskstats.append(f" 259 {i * 8} {name} 12000 30 900000 4000 8000 20 700000 6000 0 5000 10000")
+        diskstats.append(f" 259 {i * 8 + 1} {name}p1 100 0 800 10 50 0 400 5 0 10 15")
+    diskstats.append("   7       0 loop0 10 0 80 1 0 0 0 0 0 1 1")
+    os.makedirs(os.path.join(root, "sys", "block", "loop0"), exist_ok=True)
+    _write(os.path.join(root, "proc", "diskstats"), "\n".join(diskstats) + "\n")
+
+    net_dev = [
+        "Inter-|   Receive                            |  Transmit",
+        " face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets",
+    ]
+    for name in ["lo"] + [f"eth{i}" for i in range(nics - 1)]:
+        net_dev.append(f"  {name}: 123456789 1000 0 0 0 0 0 0 987654321 900 0 0 0 0 0 0")
+    _write(os.path.join(root, "proc", "net", "dev"), "\n".join(net_dev) + "\n")
+
+    hwmon = os.path.join(root, "sys", "class", "hwmon")
+    for i in range(fans):
+        _write(os.path.join(hwmon, "hwmon0", f"fan{i + 1}_input"), f"{1200 + 100 * i}\n")
+    _write(os.path.join(hwmon, "hwmon1", "name"), "coretemp\n")
+    for i in range(temperatures):
+        _write(os.path.join(hwmon, "hwmon1", f"temp{i + 1}_input"), f"{45000 + 1000 * i}\n")
+        _write(os.path.join(hwmon, "hwmon1", f"temp{i + 1}_label"), f"Core {i}\n")
+    _write(os.path.join(root, "sys", "class", "thermal", "thermal_zone0", "type"), "acpitz\n")
+    _write(os.path.join(root, "sys", "class", "thermal", "thermal_zone0", "temp"), "40000\n")
+
+    for pid in range(1, process_count + 1):
+        fields = ["S", "1"] + ["0"] * 9 + [str(100 * pid), str(50 * pid)] + ["0"] * 8 + [
+            str(1000 + pid)] + ["0"] * 20
+        _write(os.path.join(root, "proc", str(pid), "stat"),
+               f"{pid} (worker {pid}) " + " ".join(fields) + "\n")
+        _write(os.path.join(root, "proc", str(pid), "io"),
+               f"rchar: 1\nwchar: 2\nsyscr: 3\nsyscw: 4\n"
+               f"read_bytes: {4096 * pid}\nwrite_bytes: {8192 * pid}\ncancelled_write_bytes: 0\n")
+
+class StubPsutil:
+    """
+    Stands in for the parts of psutil that SystemMetrics and ProcessScanner use. Counters grow
+    on every call, so rates and deltas are computed like on real hardware, without any syscalls.
+    """
+    Error = type("Error", (Exception,), {})
+    NoSuchProcess = type("NoSuchProcess", (Error,), {})
+    AccessDenied = type("AccessDenied", (Error,), {})
+
+    _freq = namedtuple("scpufreq", "current min max")
+    _memory = namedtuple("svmem", "total available percent used free")
+    _fan = namedtuple("sfan", "label current")
+    _disk = namedtuple("sdiskio", "read_count write_count read_bytes write_bytes read_time write_time")
+    _nic = namedtuple("snetio", "bytes_sent bytes_recv packets_sent packets_recv")
+    _times = namedtuple("pcputimes", "user system")
+    _memory_info = namedtuple("pmem", "rss vms")
+    _io = namedtuple("pio", "read_count write_count read_bytes write_bytes")
+
+    def __init__(self, cores: int = 8, disks: int = 2, nics: int = 3, process_count: int = 300):
+        self.cores = cores
+        self.disks = [f"nvme{i}n1" for i in range(disks)]
+        self.nics = ["lo"] + [f"eth{i}" for i in range(nics - 1)]
+        self.process_count = process_count
+        self._tick = itertools.count(1)
+
+    def cpu_count(self, logical: bool = True) -> int:
+        return self.cores
+
+    def cpu_percent(self, interval=None, percpu: bool = False):
+        values = [float((next(self._tick) * 7 + i * 13) % 100) for i in range(self.cores)]
+        return values if percpu else sum(values) / len(values)
+
+    def cpu_freq(self, percpu: bool = False):
+        freqs = [self._freq(3000.0 + (i * 37) % 800, 800.0, 4800.0) for i in range(self.cores)]
+        return freqs if percpu else freqs[0]
+
+    def virtual_memory(self):
+        total = 32 * 1024**3
+        used = 12 * 1024**3 + next(self._tick) % 1024 * 4096
+        return self._memory(total, total - used, 37.5, used, total - used)
+
+    def sensors_fans(self) -> Dict[str, List]:
+        return {"nct6798": [self._fan(f"fan{i}", 1200.0 + 100 * i) for i in range(3)]}
+
+    def disk_io_counters(self, perdisk: bool = False):
+        tick = next(self._tick)
+        return {
+            name: self._disk(100 * tick, 50 * tick, 409600 * tick, 204800 * tick, 3 * tick, 2 * tick)
+            for name in self.disks
+        }
+
+    def net_io_counters(self, pernic: bool = False):
+        tick = next(self._tick)
+        return {name: self._nic(1000 * tick, 5000 * tick, tick, tick) for name in self.nics}
+
+    def pids(self) -> List[int]:
+        return list(range(1, self.process_count + 1))
+
+    def Process(self, pid: int) -> "StubProcess":
+        return StubProcess(self, pid)
+
+class StubProcess:
+    """A psutil.Process of StubPsutil."""
+    def __init__(self, stub: StubPsutil, pid: int):
+        self._stub = stub
+        self.pid = pid
+        self._calls = 0
+
+    @contextlib.contextmanager
+    def oneshot(self):
+        self._calls += 1
+        yield
+
+    def name(self) -> str:
+        return f"worker {self.pid}"
+
+    def cpu_times(self):
+        return self._stub._times(0.01 * self.pid * self._calls, 0.005 * self._calls)
+
+    def memory_info(self):
+        return self._stub._memory_info(4096 * (1000 + self.pid), 0)
+
+    def io_counters(self):
+        return self._stub._io(self._calls, self._calls, 4096 * self._calls, 8192 * self._calls)
+
+# Prints a reading in the format of `nvidia-smi --query-gpu=... --format=csv,noheader,nounits`
+STUB_NVIDIA_SMI = """
+import sys, time
+interval = int(sys.argv[1]) / 1000
+tick = 0
+while True:
+    print(f"0, {55 + tick % 10}, {tick * 7 % 100}, {2048 + tick % 512}, 8192", flush=True)
+    tick += 1
+    time.sleep(interval)
+"""
+
+@contextlib.contextmanager
+def fake_backends(stub: StubPsutil) -> Iterator[StubPsutil]:
+    """
+    Replaces psutil, ping and the nvidia-smi command with stubs for the duration of the block,
+    and restores them afterwards.
+    """
+    saved = (system_metrics.psutil, processes.psutil, system_metrics.ping,
+             gpu_backends.GPU_BACKENDS.copy())
+    system_metrics.psutil = stub
+    processes.psutil = stub
+    system_metrics.ping = lambda host, timeout=2: 0.0123
+    gpu_backends.GPU_BACKENDS.clear()
+    gpu_backends.GPU_BACKENDS[NvidiaSmiStreamBackend.name] = lambda interval_ms: (
+        NvidiaSmiStreamBackend(
+            interval_ms, command=[sys.executable, "-c", STUB_NVIDIA_SMI, str(interval_ms)]))
+    try:
+        yield stub
+    finally:
+        system_metrics.psutil, processes.psutil, system_metrics.ping, backends = saved
+        gpu_backends.GPU_BACKENDS.clear()
+        gpu_backends.GPU_BACKENDS.update(backends)
+
+def create_system_metrics(backend: str, procfs_root: str) -> SystemMetrics:
+    """
+    Creates a SystemMetrics reading the fake procfs tree ("procfs"), or only the stub psutil
+    ("psutil", the path used on Windows and macOS). Call inside fake_backends().
+    """
+    if backend == "procfs":
+        return SystemMetrics(gpu_backend="nvidia-smi", procfs_root=procfs_root)
+    # Point the Linux fast path at a directory without procfs, so it is not used
+    metrics = SystemMetrics(gpu_backend="nvidia-smi", procfs_root=os.path.join(procfs_root, "none"))
+    metrics.process_scanner = ProcessScanner(None)
+    metrics.top_processes = metrics.process_scanner.top()
+    return metrics
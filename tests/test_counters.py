@@ -0,0 +1,40 @@
+import os
+import pytest
+from collectors.counters import CounterRates, counter_delta
+from fake_backends import build_fake_procfs, create_system_metrics, fake_backends, StubPsutil
+
+def test_counter_delta_grows():
+    assert counter_delta(150, 100) == 50
+
+def test_counter_delta_wraps_at_32_bits():
+    assert counter_delta(10, 2**32 - 10) == 20
+
+def test_counter_delta_wraps_at_64_bits():
+    assert counter_delta(10, 2**64 - 10) == 20
+
+def test_counter_delta_treats_a_large_drop_as_a_reset():
+    assert counter_delta(5, 2**31 - 100) == 5
+
+def test_counter_rates_are_per_key_and_skip_new_keys():
+    rates = CounterRates()
+    assert rates.update({"sda": (100, 2**32 - 1)}, now=0.0) == {}
+    result = rates.update({"sda": (300, 1), "sdb": (5, 5)}, now=2.0)
+    assert result == {"sda": [100.0, 1.0]}
+
+def _write_diskstats(root: str, reads: int, read_ms: int, writes: int, write_ms: int):
+    line = f" 259 0 nvme0n1 {reads} 0 800 {read_ms} {writes} 0 400 {write_ms} 0 0 0\n"
+    with open(os.path.join(root, "proc", "diskstats"), "w") as f:
+        f.write(line)
+
+def test_disk_await_survives_a_wrapping_field(tmp_path):
+    # read_ms is a 32-bit field that wraps while the sum of both fields is above 2**32
+    root = str(tmp_path)
+    build_fake_procfs(root, disks=1, process_count=1)
+    with fake_backends(StubPsutil(disks=1, process_count=1)):
+        metrics = create_system_metrics("procfs", root)
+        _write_diskstats(root, 1000, 2**32 - 100, 1000, 2**32)
+        metrics.collect_disk_metrics()
+        _write_diskstats(root, 1010, 100, 1010, 2**32 + 200)
+        metrics.collect_disk_metrics()
+        assert metrics.registry["disk_await"].history.latest() == pytest.approx(20.0)  # 400 ms, 20 I/Os
+        metrics.close_gpu_backend()
@@ -0,0 +1,163 @@
+import ctypes
+import sys
+import time
+import pytest
+from collectors.gpu_backends import GpuBackend, NvidiaSmiStreamBackend, NvmlBackend
+from fake_backends import STUB_NVIDIA_SMI, StubPsutil, create_system_metrics, fake_backends
+
+class FakeNvml:
+    """Stands in for the NVML library, reporting one GPU."""
+    def __init__(self):
+        self.initialized = 0
+
+    def nvmlInit_v2(self):
+        self.initialized += 1
+        return 0
+
+    def nvmlShutdown(self):
+        self.initialized -= 1
+        return 0
+
+    def nvmlDeviceGetHandleByIndex_v2(self, index, handle):
+        return 0
+
+    def nvmlDeviceGetTemperature(self, handle, sensor, temperature):
+        ctypes.cast(temperature, ctypes.POINTER(ctypes.c_uint)).contents.value = 61
+        return 0
+
+    def nvmlDeviceGetUtilizationRates(self, handle, utilization):
+        utilization._obj.gpu = 40
+        return 0
+
+    def nvmlDeviceGetMemoryInfo(self, handle, memory):
+        memory._obj.total = 8 * 1024**3
+        memory._obj.used = 2 * 1024**3
+        return 0
+
+class FakeNvmlWithoutDevices(FakeNvml):
+    """An NVML library that initializes but lacks the device functions (an old driver)."""
+    def __getattribute__(self, name):
+        if name == "nvmlDeviceGetHandleByIndex_v2":
+            raise AttributeError(name)
+        return super().__getattribute__(name)
+
+def test_backends_must_implement_open_and_sample():
+    with pytest.raises(TypeError):
+        GpuBackend()
+
+def test_nvml_samples_the_fake_library():
+    library = FakeNvml()
+    backend = NvmlBackend(library)
+    assert backend.open()
+    sample = backend.sample()
+    assert (sample.temperature, sample.utilization) == (61.0, 40.0)
+    assert (sample.memory_used, sample.memory_total) == (2048.0, 8192.0)
+    backend.close()
+    assert library.initialized == 0
+
+def test_nvml_shuts_down_when_a_function_is_missing():
+    library = FakeNvmlWithoutDevices()
+    assert not NvmlBackend(library).open()
+    assert library.initialized == 0
+
+def _stub_stream(interval_ms: int = 50, **kwargs) -> NvidiaSmiStreamBackend:
+    return NvidiaSmiStreamBackend(
+        interval_ms, command=[sys.executable, "-c", STUB_NVIDIA_SMI, str(interval_ms)], **kwargs)
+
+def _wait_until(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def test_stream_backend_parses_the_stub_stream():
+    backend = _stub_stream()
+    assert backend.open()
+    try:
+        assert _wait_until(lambda: backend.sample() is not None)
+        assert backend.sample().memory_total == 8192.0
+        assert backend.is_alive()
+    finally:
+        backend.close()
+    assert backend.sample() is None
+
+def test_stream_backend_opens_without_waiting_for_a_sample():
+    backend = NvidiaSmiStreamBackend(
+        command=[sys.executable, "-c", "import time; time.sleep(60)"], startup_timeout=0.3)
+    start = time.monotonic()
+    assert backend.open()
+    try:
+        assert time.monotonic() - start < 0.3
+        assert backend.sample() is None
+        assert backend.is_alive()
+        assert _wait_until(lambda: not backend.is_alive())  # Never printed a sample
+    finally:
+        backend.close()
+
+def test_stream_backend_dies_when_the_command_exits():
+    backend = NvidiaSmiStreamBackend(command=[sys.executable, "-c", "pass"])
+    assert backend.open()
+    assert _wait_until(lambda: not backend.is_alive())
+    assert backend.sample() is None
+    backend.close()
+
+def test_stream_backend_dies_when_the_stream_stalls():
+    # Prints a single reading, then hangs without exiting
+    script = "import time; print('0, 50, 10, 100, 8192', flush=True); time.sleep(60)"
+    backend = NvidiaSmiStreamBackend(50, command=[sys.executable, "-c", script])
+    assert backend.open()
+    try:
+        assert _wait_until(lambda: backend.sample() is not None)
+        assert _wait_until(lambda: not backend.is_alive())
+        assert backend.process.poll() is None
+        assert backend.sample() is None
+    finally:
+        backend.close()
+
+def test_system_metrics_reopens_a_dead_stream(tmp_path):
+    with fake_backends(StubPsutil(process_count=1)):
+        metrics = create_system_metrics("psutil", str(tmp_path))
+        try:
+            metrics.collect_gpu_metrics()
+            backend = metrics.gpu_backend
+            assert _wait_until(lambda: backend.sample() is not None)
+            metrics.collect_gpu_metrics()
+            backend.process.kill()
+            backend.process.wait()
+            metrics.collect_gpu_metrics()
+            assert metrics.gpu_backend is not backend
+            assert metrics.gpu_backend.is_alive()
+        finally:
+            metrics.close_gpu_backend()
+
+def test_system_metrics_waits_before_restarting_a_failing_stream(tmp_path):
+    with fake_backends(StubPsutil(process_count=1)):
+        metrics = create_system_metrics("psutil", str(tmp_path))
+        try:
+            metrics.set_gpu_backend("nvidia-smi")
+            metrics.collect_gpu_metrics()
+            backend = metrics.gpu_backend
+            backend.process.kill()  # Exits before its first sample, like nvidia-smi without a GPU
+            backend.process.wait()
+            metrics.collect_gpu_metrics()
+            assert metrics.gpu_backend is None
+            metrics.collect_gpu_metrics()
+            assert metrics.gpu_backend is None
+        finally:
+            metrics.close_gpu_backend()
+
+def test_set_gpu_backend_switches_on_the_next_collection(tmp_path):
+    with fake_backends(StubPsutil(process_count=1)):
+        metrics = create_system_metrics("psutil", str(tmp_path))
+        try:
+            metrics.collect_gpu_metrics()
+            backend = metrics.gpu_backend
+            metrics.set_gpu_backend("none")
+            assert backend.is_alive()  # Not closed by the calling thread
+            metrics.collect_gpu_metrics()
+            assert metrics.gpu_backend is None
+            assert not backend.is_alive()
+        finally:
+            metrics.close_gpu_backend()
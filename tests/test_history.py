@@ -0,0 +1,129 @@
+import pytest
+from collectors.decimation import DECIMATORS, decimate
+from collectors.history import MatrixRingBuffer, RingBuffer, TieredHistory
+from collectors.history_file import HistoryFile
+
+METHODS = sorted(DECIMATORS)
+
+def _filled(count: int, capacity: int = 2000) -> TieredHistory:
+    history = TieredHistory(capacity, 1.0, tiers=())
+    for i in range(count):
+        history.append(float(i * 37 % 101))
+    return history
+
+def test_ring_buffer_view_is_oldest_first():
+    buffer = RingBuffer(3)
+    for value in (1.0, 2.0, 3.0, 4.0):
+        buffer.append(value)
+    assert list(buffer.view()) == [2.0, 3.0, 4.0]
+    assert buffer.appended == 5  # Including the initial sample
+
+def test_view_at_cursor_ignores_later_appends():
+    buffer = RingBuffer(3)
+    buffer.append(1.0)
+    cursor = buffer.cursor()
+    buffer.append(2.0)
+    assert list(buffer.view(cursor)) == [0.0, 1.0]
+
+def test_fetch_at_cursors_ignores_later_appends():
+    history = _filled(3000)
+    cursors = history.cursors()
+    expected = list(history.fetch(1000, 100, "minmax")[0])
+    for _ in range(7):
+        history.append(1000.0)
+    assert list(history.fetch(1000, 100, "minmax", cursors)[0]) == expected
+
+def test_matrix_ring_buffer_counts_appends():
+    buffer = MatrixRingBuffer(2, 3)
+    for _ in range(5):
+        buffer.append([1.0, 2.0])
+    assert len(buffer) == 3
+    assert buffer.appended == 6
+
+@pytest.mark.parametrize("method", METHODS)
+def test_decimated_series_only_appends(method):
+    history = _filled(3000)
+    per_bucket = DECIMATORS[method][1]
+    values, _, previous_position = history.fetch(1000, 100, method)
+    previous = list(values)
+    for i in range(50):
+        history.append(float(i))
+        values, _, position = history.fetch(1000, 100, method)
+        values = list(values)
+        # Unchanged until a bucket is finished, then shifted by one bucket
+        shift = position - previous_position
+        assert shift in (0, per_bucket)
+        assert values[:len(values) - shift] == previous[shift:]
+        previous, previous_position = values, position
+
+def test_fetch_position_counts_appended_values():
+    history = _filled(500)
+    position = history.fetch(100, 200)[2]
+    history.append(1.0)
+    history.append(2.0)
+    values, _, new_position = history.fetch(100, 200)
+    assert new_position == position + 2
+    assert list(values[-2:]) == [1.0, 2.0]
+
+@pytest.mark.parametrize("method", METHODS)
+def test_cached_decimation_matches_uncached(method):
+    buffer = RingBuffer(500)
+    cache = {}
+    for i in range(1500):
+        buffer.append(float(i * 13 % 97))
+        view = buffer.view()
+        cached = decimate(method, view, view, view, 400, 50, buffer.appended, cache)
+        assert cached == decimate(method, view, view, view, 400, 50, buffer.appended)
+
+def test_minmax_keeps_a_single_sample_spike():
+    history = TieredHistory(2000, 1.0, tiers=())
+    for i in range(2000):
+        history.append(100.0 if i == 1234 else 0.0)
+    values, seconds_per_value, _ = history.fetch(2000, 100, "minmax")
+    assert max(values) == 100.0
+    assert seconds_per_value == 10.0  # Buckets of 20 samples, two values each
+
+@pytest.mark.parametrize("method", METHODS)
+def test_decimated_fetch_is_not_empty_after_a_clear(method):
+    history = _filled(3000)
+    history.fetch(1000, 100, method)
+    history.clear()
+    history.append(5.0)
+    values, seconds_per_value, _ = history.fetch(1000, 100, method)
+    assert list(values) == [0.0, 5.0]
+    assert seconds_per_value == 1.0
+
+@pytest.mark.parametrize("method", METHODS)
+def test_refilled_history_is_decimated_from_its_new_samples(method):
+    history = _filled(3000)
+    history.fetch(1000, 100, method)
+    caches = dict(history._decimated)
+    history.clear()
+    assert history._decimated == caches  # Left to the drawing thread
+    for i in range(3000):
+        history.append(float(i % 7))
+    view = history.view()
+    expected = decimate(method, view, view, view, 1000, 100, history.appended)[0]
+    assert list(history.fetch(1000, 100, method)[0]) == list(expected)
+    assert history.cursors()[0][3] == 1
+
+def test_fetch_uses_tiers_for_long_windows():
+    history = TieredHistory(60, 1.0, tiers=((10, 36),))
+    for i in range(360):
+        history.append(float(i))
+    values, seconds_per_value, _ = history.fetch(360, 60)
+    assert seconds_per_value == 10
+    assert list(values)[-1] == sum(range(350, 360)) / 10
+
+def test_history_file_is_restored(tmp_path):
+    path = tmp_path / "cpu.hist"
+    history_file = HistoryFile(path, 100, 1.0)
+    history = history_file.open_history()
+    history.append(42.0)
+    history_file.flush()
+    assert not history_file.restored
+
+    restored = HistoryFile(path, 100, 1.0)
+    assert restored.restored
+    assert 42.0 in list(restored.open_history().view())
+    assert not HistoryFile(path, 200, 1.0).restored  # Another layout resets the file
@@ -0,0 +1,78 @@
+import os
+import pytest
+from collectors.linux_procfs import LinuxProcReader
+
+def _write(root, relative_path: str, text: str):
+    path = os.path.join(root, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+def _write_stat(root, *cores):
+    """Writes /proc/stat with one (user, idle, iowait) line per core and their sum as "cpu"."""
+    lines = []
+    for name, (user, idle, iowait) in [("cpu", tuple(map(sum, zip(*cores))))] + [
+            (f"cpu{i}", core) for i, core in enumerate(cores)]:
+        lines.append(f"{name} {user} 0 0 {idle} {iowait} 0 0 0 0 0\n")
+    _write(root, "proc/stat", "".join(lines) + "intr 1 0\nctxt 2\n")
+
+@pytest.fixture
+def root(tmp_path):
+    _write_stat(tmp_path, (100, 900, 0), (100, 900, 0))
+    _write(tmp_path, "proc/meminfo",
+           "MemTotal:       16000000 kB\nMemFree:         1000000 kB\n"
+           "MemAvailable:    4000000 kB\nBuffers:          100000 kB\n")
+    return tmp_path
+
+def test_create_fails_without_procfs(tmp_path):
+    assert LinuxProcReader.create(str(tmp_path)) is None
+
+def test_cpu_percent_is_the_busy_share_since_the_last_call(root):
+    reader = LinuxProcReader(str(root))
+    assert reader.cpu_percent() == (0.0, [0.0, 0.0])
+    # Core 0 is busy for 50 of 100 ticks, core 1 waits on I/O for all of them
+    _write_stat(root, (150, 950, 0), (100, 900, 100))
+    average, cores = reader.cpu_percent()
+    assert cores == [50.0, 0.0]
+    assert average == 25.0
+
+def test_memory_is_computed_like_psutil(root):
+    reader = LinuxProcReader(str(root))
+    assert reader.memory_total() == 16000000 * 1024
+    assert reader.memory_used() == (16000000 - 4000000) * 1024
+
+def test_fans_are_read_in_hwmon_order(root):
+    _write(root, "sys/class/hwmon/hwmon10/fan1_input", "900\n")
+    _write(root, "sys/class/hwmon/hwmon2/fan1_input", "1200\n")
+    _write(root, "sys/class/hwmon/hwmon2/fan2_input", "not a number\n")
+    assert LinuxProcReader(str(root)).fan_speeds() == [1200.0, 900.0]
+
+def _write_hwmon(root, index: int, name: str, *labels: str):
+    _write(root, f"sys/class/hwmon/hwmon{index}/name", f"{name}\n")
+    for i, label in enumerate(labels, 1):
+        value = 40000 + index * 1000 + i
+        _write(root, f"sys/class/hwmon/hwmon{index}/temp{i}_input", f"{value}\n")
+        if label:
+            _write(root, f"sys/class/hwmon/hwmon{index}/temp{i}_label", f"{label}\n")
+
+def test_temperature_sensors_are_keyed_by_device_and_label(root):
+    _write_hwmon(root, 0, "coretemp", "Package id 0", "Core 0")
+    _write(root, "sys/class/thermal/thermal_zone0/type", "acpitz\n")
+    _write(root, "sys/class/thermal/thermal_zone0/temp", "35000\n")
+    _write(root, "sys/class/thermal/thermal_zone1/type", "coretemp\n")  # Also an hwmon device
+    _write(root, "sys/class/thermal/thermal_zone1/temp", "99000\n")
+    reader = LinuxProcReader(str(root))
+    assert reader.temperatures() == {
+        "coretemp0_package_id_0": 40.001, "coretemp0_core_0": 40.002, "acpitz0": 35.0}
+    assert reader.temperature_sensors()[0].aliases == ["coretemp0"]
+
+def test_temperature_devices_are_numbered_in_hwmon_order(root):
+    _write_hwmon(root, 10, "nvme", "Composite")
+    _write_hwmon(root, 2, "nvme", "Composite")
+    temperatures = LinuxProcReader(str(root)).temperatures()
+    assert temperatures == {"nvme0_composite": 42.001, "nvme1_composite": 50.001}
+
+def test_duplicate_temperature_keys_are_disambiguated(root):
+    _write_hwmon(root, 0, "k10temp", "Tctl", "Tctl")
+    assert LinuxProcReader(str(root)).temperatures() == {
+        "k10temp0_tctl": 40.001, "k10temp0_tctl_2": 40.002}
@@ -0,0 +1,49 @@
+import urllib.request
+import pytest
+from collectors.openmetrics import CONTENT_TYPE, OpenMetricsExporter, _format_number
+from collectors.system_metrics import SystemMetrics
+
+@pytest.fixture
+def metrics():
+    return SystemMetrics(gpu_backend="none")
+
+def _publish(metrics: SystemMetrics, exporter: OpenMetricsExporter, cpu: float) -> str:
+    metrics.registry["cpu"].history.append(cpu)
+    exporter.publish(metrics.snapshot(frozenset({"cpu"})))
+    return exporter.body.decode()
+
+@pytest.mark.parametrize("value, text", [
+    (42, "42.0"), (0.125, "0.125"),
+    (float("inf"), "+Inf"), (float("-inf"), "-Inf"), (float("nan"), "NaN"),
+])
+def test_numbers_use_the_openmetrics_spelling(value, text):
+    assert _format_number(value) == text
+
+def test_only_running_collectors_are_exposed(metrics):
+    exporter = OpenMetricsExporter(metrics)
+    subscription = metrics.subscribe("cpu")
+    body = _publish(metrics, exporter, 12.5)
+    assert "# TYPE hwmom_cpu gauge\nhwmom_cpu 12.5\n" in body
+    assert 'hwmom_max_value{metric="cpu"} 100.0\n' in body
+    assert "hwmom_memory" not in body
+    assert body.endswith("# EOF\n")
+
+    subscription.release()
+    assert "hwmom_cpu" not in _publish(metrics, exporter, 20.0)
+
+def test_non_finite_samples_are_exposed(metrics):
+    exporter = OpenMetricsExporter(metrics)
+    metrics.subscribe("cpu")
+    assert "hwmom_cpu NaN\n" in _publish(metrics, exporter, float("nan"))
+
+def test_scrapes_get_the_latest_exposition(metrics):
+    exporter = OpenMetricsExporter(metrics, port=0)
+    metrics.subscribe("cpu")
+    _publish(metrics, exporter, 7.0)
+    exporter.start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{exporter.port}/metrics") as response:
+            assert response.headers["Content-Type"] == CONTENT_TYPE
+            assert b"hwmom_cpu 7.0\n" in response.read()
+    finally:
+        exporter.close()
@@ -0,0 +1,75 @@
+import os
+import shutil
+from types import SimpleNamespace
+import pytest
+import collectors.processes as processes
+from collectors.processes import ProcessScanner
+
+TICKS = os.sysconf("SC_CLK_TCK")
+PAGE = os.sysconf("SC_PAGE_SIZE")
+
+def _write_process(root, pid: int, name: str, cpu_ticks: int, rss_pages: int, io_bytes: int):
+    directory = os.path.join(root, "proc", str(pid))
+    os.makedirs(directory, exist_ok=True)
+    # Fields 3 to 13, then utime and stime (14, 15), then fields 16 to 23 and rss (24)
+    fields = ["S"] + ["0"] * 10 + [str(cpu_ticks), "0"] + ["0"] * 8 + [str(rss_pages)]
+    with open(os.path.join(directory, "stat"), "w") as f:
+        f.write(f"{pid} ({name}) " + " ".join(fields) + " 0 0 0\n")
+    with open(os.path.join(directory, "io"), "w") as f:
+        f.write(f"rchar: 1\nread_bytes: {io_bytes}\nwrite_bytes: 0\n")
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the scanner's clocks. perf_counter advances by a millisecond per call."""
+    state = SimpleNamespace(now=100.0, perf=0.0)
+
+    def perf_counter():
+        state.perf += 0.001
+        return state.perf
+
+    monkeypatch.setattr(processes, "time", SimpleNamespace(
+        monotonic=lambda: state.now, perf_counter=perf_counter))
+    return state
+
+def test_top_lists_hold_rates_since_the_previous_pass(tmp_path, clock):
+    for pid, rss in ((1, 300), (2, 100), (3, 200)):
+        _write_process(tmp_path, pid, f"worker {pid}", 0, rss, 0)
+    scanner = ProcessScanner(str(tmp_path), top_n=2, budget=1.0)
+    scanner.scan()
+
+    clock.now += 2.0
+    _write_process(tmp_path, 1, "worker 1", TICKS, 300, 0)  # One second of CPU in two
+    _write_process(tmp_path, 2, "worker 2", 0, 100, 4096)
+    scanner.scan()
+    top = scanner.top()
+    assert [process.pid for process in top["rss"]] == [1, 3]
+    assert top["rss"][0].rss == 300 * PAGE
+    assert top["cpu"][0].pid == 1 and top["cpu"][0].cpu_percent == pytest.approx(50.0)
+    assert top["io"][0].pid == 2 and top["io"][0].io_rate == pytest.approx(2048.0)
+    assert scanner.process_count == 3
+
+def test_a_pass_is_spread_over_scans_within_the_budget(tmp_path, clock):
+    for pid in range(1, 6):
+        _write_process(tmp_path, pid, "worker", 0, pid, 0)
+    scanner = ProcessScanner(str(tmp_path), budget=0.0025)  # Two visits per scan
+    scanner.scan()
+    assert len(scanner.top()["rss"]) == 2
+    scanner.scan()
+    scanner.scan()
+    assert len(scanner.top()["rss"]) == 5
+
+def test_exited_processes_are_dropped(tmp_path, clock):
+    for pid in (1, 2):
+        _write_process(tmp_path, pid, "worker", 0, pid, 0)
+    scanner = ProcessScanner(str(tmp_path), budget=1.0)
+    scanner.scan()
+    shutil.rmtree(os.path.join(tmp_path, "proc", "2"))
+    scanner.scan()
+    assert [process.pid for process in scanner.top()["rss"]] == [1]
+    assert scanner.process_count == 1
+
+def test_names_may_contain_parentheses(tmp_path, clock):
+    _write_process(tmp_path, 7, "tmux: server (1)", 0, 1, 0)
+    scanner = ProcessScanner(str(tmp_path), budget=1.0)
+    scanner.scan()
+    assert scanner.top()["rss"][0].name == "tmux: server (1)"
@@ -0,0 +1,105 @@
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import socket
+import struct
+import time
+import pytest
+from PyQt6.QtWidgets import QApplication
+from collectors.remote_agent import MetricsAgent
+from collectors.remote_protocol import (
+    HEADER, MAX_FRAME, SAMPLES, SUBSCRIBE, decode_samples, encode_entry, encode_frame,
+    encode_samples, read_frame)
+from collectors.system_metrics import SystemMetrics
+from widgets.text_widget import TextWidget
+
+def test_samples_survive_encoding():
+    entries = [encode_entry(0, [1.5, 2.5], 2, 100.0), encode_entry(1, [1, 2, 3, 4, 5, 6], 2, 0)]
+    frame = encode_samples(12.0, entries)
+    frame_type, length = HEADER.unpack_from(frame)
+    assert (frame_type, length) == (SAMPLES, len(frame) - HEADER.size)
+    decoded = list(decode_samples(frame[HEADER.size:], rows_of=[1, 3]))
+    assert [(index, samples, max_value) for index, samples, max_value, _ in decoded] == [
+        (0, 2, 100.0), (1, 2, 0.0)]
+    assert list(decoded[1][3]) == [1, 2, 3, 4, 5, 6]
+
+def test_frames_are_read_whole():
+    sender, receiver = socket.socketpair()
+    with sender, receiver:
+        frame = encode_frame(SUBSCRIBE, b"cpu")
+        sender.sendall(frame[:2])
+        sender.sendall(frame[2:])
+        assert read_frame(receiver) == (SUBSCRIBE, b"cpu")
+        sender.sendall(struct.pack("!BI", SAMPLES, MAX_FRAME + 1))
+        with pytest.raises(ConnectionError):
+            read_frame(receiver)
+        sender.close()
+        assert read_frame(receiver) is None
+
+@pytest.fixture
+def hosts():
+    """An agent and a dashboard that connects to it as "rack"."""
+    agent_metrics = SystemMetrics(gpu_backend="none")
+    agent = MetricsAgent(agent_metrics, port=0)
+    agent.start()
+    dashboard = SystemMetrics(gpu_backend="none")
+    dashboard.add_remote_host("rack", "127.0.0.1", agent.port)
+    yield agent, dashboard
+    dashboard.close_remote_hosts()
+    agent.close()
+
+def _tick(agent: MetricsAgent, dashboard: SystemMetrics):
+    """Runs a collection tick on both sides. Returns what the dashboard collected."""
+    agent_metrics = agent.system_metrics
+    collected = agent_metrics.update()
+    agent.publish(agent_metrics.snapshot(agent_metrics.updated_metrics(collected)))
+    time.sleep(0.01)
+    return dashboard.update()
+
+def _until(condition, agent, dashboard, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        _tick(agent, dashboard)
+
+def test_catalog_counts_as_collected(hosts):
+    agent, dashboard = hosts
+    collected = []
+    _until(lambda: collected.extend(_tick(agent, dashboard)) or "rack:cpu" in collected,
+           agent, dashboard)
+    assert dashboard.registry.get("rack:cpu") is not None
+
+def test_subscriptions_start_collectors_on_the_agent(hosts):
+    agent, dashboard = hosts
+    _until(lambda: dashboard.registry.get("rack:cpu") is not None, agent, dashboard)
+    subscription = dashboard.subscribe("rack:cpu")
+    history = dashboard.registry["rack:cpu"].history
+    _until(lambda: len(history) > 2, agent, dashboard)
+    assert agent.system_metrics._subscribers["cpu"] == 1
+
+    subscription.release()
+    _until(lambda: agent.system_metrics._subscribers["cpu"] == 0, agent, dashboard)
+    dashboard.update()
+    assert len(history) == 1  # Cleared once released
+
+def test_dashboard_with_only_remote_cards_shows_data(hosts):
+    agent, dashboard = hosts
+    app = QApplication.instance() or QApplication([])
+    widget = TextWidget("rack:cpu", dashboard, "CPU")
+    widget.show()
+
+    def dispatch():
+        # What MetricsWorker and MainWindow do with every tick that collected something
+        collected = _tick(agent, dashboard)
+        if collected:
+            widget.apply_snapshot(dashboard.snapshot(dashboard.updated_metrics(collected)))
+        app.processEvents()
+        return widget.descriptor is not None and len(widget.get_history()) > 2
+
+    deadline = time.monotonic() + 5
+    while not dispatch():
+        assert time.monotonic() < deadline, "The remote card never received samples"
+    assert widget.subscription is not None
+    widget.close()
+    widget.deleteLater()
+    app.processEvents()
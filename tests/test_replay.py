@@ -0,0 +1,38 @@
+import pytest
+from collectors.replay import MetricSource, SyntheticSource
+from fake_backends import StubPsutil, build_fake_procfs, create_system_metrics, fake_backends
+
+@pytest.fixture
+def metrics(tmp_path):
+    root = str(tmp_path)
+    build_fake_procfs(root, process_count=1)
+    with fake_backends(StubPsutil(process_count=1)):
+        yield create_system_metrics("procfs", root)
+
+def test_sources_must_implement_catalog_and_samples():
+    with pytest.raises(TypeError):
+        MetricSource()
+
+def test_synthetic_samples_are_reproducible():
+    first = SyntheticSource(3, seed=7).samples()
+    second = SyntheticSource(3, seed=7).samples()
+    assert [next(first) for _ in range(5)] == [next(second) for _ in range(5)]
+
+def test_replayed_histories_use_the_source_interval(metrics):
+    assert metrics.registry["cpu"].history.interval == 0.25
+    metrics.enable_replay(SyntheticSource(2, interval=1.0))
+    assert metrics.registry["cpu"].history.interval == 1.0
+    assert metrics.collector_intervals["cpu"] == 1000
+    assert metrics.registry["synthetic_000"].history.interval == 1.0
+
+def test_replay_only_collectors_are_released(metrics):
+    metrics.enable_replay(SyntheticSource(2, interval=0.01), speed=100)
+    subscription = metrics.subscribe("synthetic")
+    for _ in range(5):
+        metrics.update()
+    history = metrics.registry["synthetic_000"].history
+    assert len(history) > 1
+    subscription.release()
+    metrics.update()
+    assert len(history) == 1
+    assert "synthetic" not in metrics._running
@@ -0,0 +1,62 @@
+import os
+import threading
+from multiprocessing import shared_memory
+import pytest
+from collectors.shared_metrics import SharedMetricsReader
+from collectors.system_metrics import SystemMetrics
+
+@pytest.fixture
+def published(request):
+    name = f"hwmom-test-{os.getpid()}-{request.node.name}"[:30]
+    metrics = SystemMetrics(gpu_backend="none")
+    metrics.enable_shared_memory(name)
+    reader = SharedMetricsReader(name)
+    yield metrics, reader
+    reader.close()
+    metrics.close_shared_memory()
+
+def test_readers_see_the_published_histories(published):
+    metrics, reader = published
+    assert reader.registry["cpu"].unit == metrics.registry["cpu"].unit
+    metrics.registry["cpu"].history.append(33.0)
+    assert reader.latest(["cpu"]) == {"cpu": 33.0}
+    assert reader.registry["cpu"].history.view()[-1] == 33.0
+
+def test_reads_wait_for_the_write_to_finish(published):
+    metrics, reader = published
+    history = metrics.registry["cpu"].history
+    history.append(1.0)
+    metrics.shared_metrics.begin_write()
+    assert reader.sequence() & 1
+    results = []
+    thread = threading.Thread(target=lambda: results.append(reader.latest(["cpu"])))
+    thread.start()
+    thread.join(0.05)
+    assert not results  # Still retrying
+    history.append(2.0)
+    metrics.shared_metrics.end_write()
+    thread.join(5)
+    assert results == [{"cpu": 2.0}]
+
+def test_reads_retry_when_a_write_started_meanwhile(published):
+    metrics, reader = published
+    calls = []
+
+    def read():
+        calls.append(reader.sequence())
+        if len(calls) == 1:
+            metrics.shared_metrics.begin_write()
+            metrics.shared_metrics.end_write()
+        return len(calls)
+
+    assert reader.read(read) == 2
+    assert calls[1] == calls[0] + 2
+
+def test_other_segments_are_rejected():
+    segment = shared_memory.SharedMemory(f"hwmom-test-{os.getpid()}-other", create=True, size=64)
+    try:
+        with pytest.raises(ValueError):
+            SharedMetricsReader(segment.name)
+    finally:
+        segment.close()
+        segment.unlink()